@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+"""
+Single-regeneration transactions for creating many gears in one Part.
+Creating gears one at a time costs two AddParameter calls and a full Part.Regenerate() per
+gear. GearTransaction queues the gears instead and commit() runs each phase over all of them:
+geometry, sketch emission, parameters, then one Regenerate() for the whole batch. A gear
+that fails is recorded in its GearJob and skipped by the later phases, so it cannot take the
+other gears down. Geometry and the queued sketch entities are complete before AddSketch is
+called, so a gear whose geometry fails leaves no empty sketch behind; a sketch whose
+emission fails partway is removed again, or reported on its job when the Part refuses. Jobs
+may arrive with their profile (and full outline) already generated, e.g. by a process pool in
+gear_train, which skips their geometry phase. The geometry phase also runs gear_validate on every profile,
+so a self-intersecting or degenerate outline fails there instead of in the CAD sketch; a gear
+whose parameters gear_domain already rules out fails before any geometry is generated.
+Headless: AlibreScript's ParameterTypes is only imported when no parameter_types is given,
+and RecordingPart stands in for a Part outside Alibre.
+"""
+import time
+from collections import OrderedDict
+from gear_geometry import profile_cache, generate_full_gear_outline
+from gear_fit import fitted_profile
+from gear_sketch import SketchEmitter, RecordingSketch, emit_external_gear, emit_internal_gear
+from gear_domain import check_parameters, default_map
+from gear_trace import instrumentation, log
+from gear_validate import validate_profile
+_timer = getattr(time, 'perf_counter', time.time)
+PHASES = ('geometry', 'emission', 'parameters', 'regenerate')
+try:
+    _string_types = (basestring,)
+except NameError:
+    _string_types = (str,)
+class GearJob(object):
+    """
+    One queued gear: its inputs and, after commit(), its sketch, parameters, error and phase timings.
+    plane: design plane, or its name for Part.GetPlane; offset: (dx, dy) of the gear center in the
+    sketch; rotation: angle (radians) the gear is turned about its center, e.g. a mesh phase;
+    fit_tolerance: fit the flanks with gear_fit.fitted_profile (fewer spline points) when set.
+    """
+    def __init__(self, name, plane, z, m, alpha_deg, profile_shift=0.0, thickness=10.0, internal=False,
+                 undercut_auto_suppress=False, full_outline=False, offset=None, profile=None, outline=None,
+                 rotation=None, fit_tolerance=None):
+        self.name = name
+        self.plane = plane
+        self.z = z
+        self.m = m
+        self.alpha_deg = alpha_deg
+        self.profile_shift = profile_shift
+        self.thickness = thickness
+        self.internal = internal
+        self.undercut_auto_suppress = undercut_auto_suppress
+        self.full_outline = full_outline
+        self.offset = offset
+        self.rotation = rotation
+        self.fit_tolerance = fit_tolerance
+        self.profile = profile
+        self.outline = outline
+        self.sketch = None
+        self.sketch_name = None
+        self.entities = 0
+        self.parameters = None
+        self.error = None
+        self.failed_phase = None
+        self.warnings = []
+        self.timings = OrderedDict((phase, 0.0) for phase in PHASES[:3])
+    @property
+    def ok(self):
+        return self.error is None
+    def fail(self, phase, error):
+        self.error = error
+        self.failed_phase = phase
+    def __repr__(self):
+        state = 'ok' if self.ok else 'failed in %s: %s' % (self.failed_phase, self.error)
+        return '<GearJob %s %s z=%d m=%g %s>' % (self.name, 'internal' if self.internal else 'external',
+                                                 self.z, self.m, state)
+class BatchReport(object):
+    """Outcome of GearTransaction.commit(): the jobs in queue order and the time of each phase."""
+    def __init__(self, jobs):
+        self.jobs = list(jobs)
+        self.timings = OrderedDict((phase, 0.0) for phase in PHASES)
+        self.timings['total'] = 0.0
+        self.regenerations = 0
+        self.regenerate_error = None
+    @property
+    def succeeded(self):
+        return [job for job in self.jobs if job.ok]
+    @property
+    def failed(self):
+        return [job for job in self.jobs if not job.ok]
+    @property
+    def ok(self):
+        return not self.failed and self.regenerate_error is None
+    def format(self):
+        lines = ['%d of %d gears created, %d regeneration(s), %.1f ms' % (
+            len(self.succeeded), len(self.jobs), self.regenerations, 1000 * self.timings['total'])]
+        lines.append('  ' + ', '.join('%s %.1f ms' % (phase, 1000 * self.timings[phase]) for phase in PHASES))
+        for job in self.failed:
+            lines.append('  %s failed in %s: %s' % (job.name, job.failed_phase, job.error))
+        for job in self.jobs:
+            for warning in job.warnings:
+                lines.append('  %s: %s' % (job.name, warning))
+        if self.regenerate_error is not None:
+            lines.append('  Regenerate failed: %s' % self.regenerate_error)
+        return '\n'.join(lines)
+def _alibre_parameter_types():
+    from AlibreScript.API import ParameterTypes
+    return ParameterTypes
+class GearTransaction(object):
+    """
+    Queue of gears for one Part (AddSketch / AddParameter / Regenerate), created together by commit().
+    parameter_types: the AlibreScript ParameterTypes enum (imported on commit when None).
+    Used as a context manager, the queue is committed when the block exits normally and
+    discarded when it raises. validate: fail gears whose outline gear_validate rejects.
+    """
+    def __init__(self, part, parameter_types=None, add_parameters=True, validate=True):
+        self.part = part
+        self.parameter_types = parameter_types
+        self.add_parameters = add_parameters
+        self.validate = validate
+        self.jobs = []
+        self.report = None
+        self._planes = {}
+    def __len__(self):
+        return len(self.jobs)
+    def __enter__(self):
+        return self
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+        return False
+    def add(self, name, plane, z, m, alpha_deg, profile_shift=0.0, thickness=10.0, internal=False,
+            undercut_auto_suppress=False, full_outline=False, offset=None, profile=None, outline=None,
+            rotation=None, fit_tolerance=None):
+        """
+        Queue a gear sketch named name on plane; returns its GearJob. profile / outline: its tooth
+        profile and full outline when already generated.
+        """
+        job = GearJob(name, plane, z, m, alpha_deg, profile_shift, thickness, internal,
+                      undercut_auto_suppress, full_outline, offset, profile, outline, rotation, fit_tolerance)
+        self.jobs.append(job)
+        return job
+    def discard(self):
+        del self.jobs[:]
+    def commit(self, progress=None):
+        """
+        Create every queued gear with a single Regenerate(); returns the BatchReport (also kept in report).
+        progress: optional callable receiving (phase, jobs done, job count) after every job of a phase.
+        """
+        started = _timer()
+        jobs = self.jobs
+        self.jobs = []
+        report = BatchReport(jobs)
+        for phase, run in (('geometry', self._geometry), ('emission', self._emit), ('parameters', self._parameters)):
+            if phase == 'parameters' and not self.add_parameters:
+                continue
+            phase_started = _timer()
+            for done, job in enumerate(jobs, 1):
+                if job.ok:
+                    job_started = _timer()
+                    try:
+                        run(job)
+                    except Exception as ex:
+                        job.fail(phase, str(ex))
+                    job.timings[phase] = _timer() - job_started
+                if progress is not None:
+                    progress(phase, done, len(jobs))
+            report.timings[phase] = _timer() - phase_started
+        if report.succeeded:
+            phase_started = _timer()
+            try:
+                with instrumentation.span('part.Regenerate'):
+                    self.part.Regenerate()
+                report.regenerations = 1
+            except Exception as ex:
+                report.regenerate_error = str(ex)
+            report.timings['regenerate'] = _timer() - phase_started
+            if progress is not None:
+                progress('regenerate', 1, 1)
+        report.timings['total'] = _timer() - started
+        instrumentation.count('batch.gears', len(jobs))
+        instrumentation.count('batch.failed', len(report.failed))
+        for job in report.failed:
+            log.warning('%s failed in %s: %s', job.name, job.failed_phase, job.error)
+        self.report = report
+        return report
+    def _geometry(self, job):
+        if job.profile is None and self.validate:
+            check = check_parameters('internal' if job.internal else 'external', job.z, job.m, job.alpha_deg,
+                                     job.profile_shift, job.undercut_auto_suppress, default_map(), limits=False)
+            if not check.valid:
+                raise ValueError(check.reason)
+        if job.profile is None and job.internal:
+            job.profile = profile_cache.internal(job.z, job.m, job.alpha_deg, job.thickness,
+                                                 job.profile_shift, job.undercut_auto_suppress)
+        elif job.profile is None:
+            job.profile = profile_cache.external(job.z, job.m, job.alpha_deg,
+                                                 job.profile_shift, job.undercut_auto_suppress)
+        if job.fit_tolerance and 'fit_tolerance' not in job.profile.parameters:
+            job.profile = fitted_profile(job.profile, job.fit_tolerance)
+            job.outline = None
+        if self.validate:
+            report = validate_profile(job.profile)
+            if not report.valid:
+                raise ValueError(report.message())
+        if job.full_outline and job.outline is None:
+            job.outline = generate_full_gear_outline(job.profile)
+        job.parameters = job.profile.parameters
+    def _emit(self, job):
+        emitter = SketchEmitter(None, job.offset, job.rotation)
+        if job.internal:
+            emit_internal_gear(emitter, job.profile, job.full_outline, job.outline)
+        else:
+            emit_external_gear(emitter, job.profile, job.full_outline, job.outline)
+        with instrumentation.span('part.AddSketch'):
+            emitter.sketch = self.part.AddSketch(job.name, self._plane(job.plane))
+        job.sketch = emitter.sketch
+        job.sketch_name = str(emitter.sketch.Name)
+        try:
+            job.entities = len(emitter.flush())
+        except Exception:
+            self._remove_sketch(job)
+            raise
+    def _remove_sketch(self, job):
+        """Take the half-filled sketch of a failed emission out of the Part, or record on the job that it stays."""
+        try:
+            self.part.RemoveSketch(job.sketch)
+        except Exception as ex:
+            job.warnings.append('partial sketch %s left in the Part: %s' % (job.sketch_name, ex))
+            return
+        job.sketch = None
+        job.sketch_name = None
+    def _plane(self, plane):
+        if not isinstance(plane, _string_types):
+            return plane
+        if plane not in self._planes:
+            self._planes[plane] = self.part.GetPlane(plane)
+        return self._planes[plane]
+    def _parameters(self, job):
+        types = self.parameter_types
+        if types is None:
+            types = self.parameter_types = _alibre_parameter_types()
+        for suffix, kind, value in (('_pitch_radius', types.Distance, float(job.parameters['pitch_radius'])),
+                                    ('_z', types.Count, int(job.parameters['z']))):
+            try:
+                with instrumentation.span('part.AddParameter'):
+                    self.part.AddParameter(job.sketch_name + suffix, kind, value)
+            except Exception as ex:
+                job.warnings.append('could not add parameter %s: %s' % (job.sketch_name + suffix, ex))
+class RecordingParameterTypes(object):
+    Distance = 'Distance'
+    Count = 'Count'
+class RecordingPart(object):
+    """
+    In-memory Part that records AddSketch / AddParameter / Regenerate calls; sketches are
+    RecordingSketches and planes are plain names (any name, or only those in planes when given).
+    regenerate_seconds simulates the cost of a full regeneration, so batching can be measured
+    without Alibre.
+    """
+    def __init__(self, regenerate_seconds=0.0, planes=None):
+        self.planes = planes
+        self.sketches = OrderedDict()
+        self.parameters = OrderedDict()
+        self.regenerations = 0
+        self.regenerate_seconds = regenerate_seconds
+    def GetPlane(self, name):
+        if self.planes is not None and name not in self.planes:
+            raise ValueError("No plane named '%s'." % name)
+        return name
+    def AddSketch(self, name, plane):
+        if name in self.sketches:
+            raise ValueError("A sketch named '%s' already exists." % name)
+        sketch = RecordingSketch(name)
+        self.sketches[name] = sketch
+        return sketch
+    def RemoveSketch(self, sketch):
+        del self.sketches[sketch.Name]
+    def AddParameter(self, name, kind, value):
+        if name in self.parameters:
+            raise ValueError("A parameter named '%s' already exists." % name)
+        self.parameters[name] = (kind, value)
+        return name
+    def Regenerate(self):
+        if self.regenerate_seconds:
+            time.sleep(self.regenerate_seconds)
+        self.regenerations += 1
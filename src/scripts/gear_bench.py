@@ -0,0 +1,395 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for the py-gear geometry core and the sketch-emission path.
+Every case runs over a grid of realistic gears (z 6..200, m 0.1..100, several point
+densities) and reports the best wall time, points per second and tracemalloc peak/retained
+memory. Results can be saved as a JSON baseline and later runs compared against it; times
+are normalized by a fixed calibration loop so baselines survive moderate machine changes.
+Example:
+    python gear_bench.py --save-baseline bench.json
+    python gear_bench.py --baseline bench.json --threshold 0.25
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+from collections import OrderedDict
+from gear_geometry import (involute_function, inverse_involute_array, generate_external_tooth_profile,
+                           generate_internal_tooth_profile, generate_full_gear_outline, profile_cache, get_array_backend,
+                           set_array_backend)
+from gear_fit import fit_profile, basis_cache
+from gear_envelope import generate_external_envelope_profile, generate_internal_envelope_profile
+from gear_domain import ValidityMap
+from gear_catalog import standard_catalog
+from gear_batch import GearTransaction, RecordingPart, RecordingParameterTypes
+from gear_pair import generate_gear_pair, balanced_shift_split
+from gear_mesh import analyze_pair
+from gear_preview import PreviewEngine
+from gear_trace import instrumentation
+from gear_validate import validate_profile
+from gear_sketch import RecordingSketch, SketchEmitter, create_external_gear_in_alibre, create_internal_gear_in_alibre
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+_timer = getattr(time, 'perf_counter', time.time)
+BASELINE_VERSION = 1
+FULL_GRID = {
+    'z': [6, 8, 12, 17, 20, 30, 45, 60, 90, 120, 160, 200],
+    'm': [0.1, 0.5, 1.0, 2.0, 5.0, 12.0, 25.0, 50.0, 100.0],
+    'density': [5, 10, 40, 160],
+}
+QUICK_GRID = {
+    'z': [6, 20, 60, 200],
+    'm': [0.1, 2.0, 100.0],
+    'density': [10, 80],
+}
+BENCHMARKS = OrderedDict()
+def benchmark(name):
+    """Register fn(grid) as a benchmark case; fn returns the number of points (or evaluations) it produced."""
+    def register(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return register
+@benchmark('involute_function')
+def bench_involute_function(grid):
+    count = 200 * len(grid['z']) * len(grid['m'])
+    step = 1.4 / count
+    for i in range(count):
+        involute_function(i * step)
+    return count
+def _involute_values(grid):
+    count = 200 * len(grid['z']) * len(grid['m'])
+    step = 1.4 / count
+    return [involute_function(i * step) for i in range(count)]
+@benchmark('inverse_involute')
+def bench_inverse_involute(grid):
+    values = _involute_values(grid)
+    inverse_involute_array(values)
+    return len(values)
+def _inverse_involute_bisection(value, tolerance=1e-12):
+    low, high = 0.0, math.pi / 2
+    while high - low > tolerance:
+        middle = 0.5 * (low + high)
+        if involute_function(middle) < value:
+            low = middle
+        else:
+            high = middle
+    return 0.5 * (low + high)
+@benchmark('inverse_involute_bisection')
+def bench_inverse_involute_bisection(grid):
+    """Reference for inverse_involute: per-value bisection to the same 1e-12 rad."""
+    values = _involute_values(grid)
+    for value in values:
+        _inverse_involute_bisection(value)
+    return len(values)
+@benchmark('balanced_shift_split')
+def bench_balanced_shift_split(grid):
+    z1 = [z for z in grid['z'] for m in grid['m']]
+    m = [m for z in grid['z'] for m in grid['m']]
+    balanced_shift_split(z1, [z + 23 for z in z1], m, 20.0, [mi * (2 * z + 23) / 2.0 + 0.2 * mi for z, mi in zip(z1, m)])
+    return len(z1)
+@benchmark('external_profile')
+def bench_external_profile(grid):
+    points = 0
+    for n in grid['density']:
+        num_points = [n, n, max(2, n // 2), max(2, n // 2)]
+        for z in grid['z']:
+            for m in grid['m']:
+                points += generate_external_tooth_profile(z, m, 20.0, num_points=num_points).point_count
+    return points
+@benchmark('internal_profile')
+def bench_internal_profile(grid):
+    points = 0
+    for n in grid['density']:
+        num_points = [n, max(2, n // 2), max(4, n // 2), n]
+        for z in grid['z']:
+            for m in grid['m']:
+                try:
+                    profile = generate_internal_tooth_profile(z, m, 20.0, 10.0 * m, num_points=num_points)
+                except ValueError:
+                    continue
+                points += profile.point_count
+    return points
+@benchmark('bspline_fit')
+def bench_bspline_fit(grid):
+    """Least-squares flank fits at 1e-4 m over the external profiles (basis matrices built once per run, then cached)."""
+    basis_cache.clear()
+    points = 0
+    for n in grid['density']:
+        num_points = [n, n, max(2, n // 2), max(2, n // 2)]
+        for z in grid['z']:
+            for m in grid['m']:
+                fits = fit_profile(profile_cache.external(z, m, 20.0, num_points=num_points), 1e-4 * m)
+                points += sum(fit.point_count for fit in fits.values())
+    return points
+@benchmark('envelope_profile')
+def bench_envelope_profile(grid):
+    """Cutter-swept external (rack) and internal (shaper, z >= 30) profiles, one module per tooth count."""
+    points = 0
+    for z in grid['z']:
+        points += generate_external_envelope_profile(z, 1.0, 20.0).point_count
+        if z >= 30:
+            points += generate_internal_envelope_profile(z, 1.0, 20.0, 10.0).point_count
+    return points
+@benchmark('full_outline')
+def bench_full_outline(grid):
+    points = 0
+    for z in grid['z']:
+        for m in grid['m']:
+            outline = generate_full_gear_outline(generate_external_tooth_profile(z, m, 20.0))
+            points += len(outline['points'])
+    return points
+@benchmark('outline_validation')
+def bench_outline_validation(grid):
+    """Self-intersection and degeneracy checks of one external and one internal profile per grid point."""
+    teeth = 0
+    for z in grid['z']:
+        for m in grid['m']:
+            validate_profile(generate_external_tooth_profile(z, m, 20.0))
+            validate_profile(generate_internal_tooth_profile(max(z, 12), m, 20.0, 10.0 * m))
+            teeth += z + max(z, 12)
+    return teeth
+_domain = []
+@benchmark('domain_check')
+def bench_domain_check(grid):
+    """ValidityMap.check() of both kinds over 41 shifts per grid point (the map is built on first use)."""
+    if not _domain:
+        _domain.append(ValidityMap.build((6, 200), (20.0, 20.0, 1.0)))
+    domain = _domain[0]
+    checks = 0
+    for z in grid['z']:
+        for m in grid['m']:
+            for k in range(-20, 21):
+                domain.check('external', z, m, 20.0, 0.05 * k * m)
+                domain.check('internal', z, m, 20.0, 0.05 * k * m)
+                checks += 2
+    return checks
+@benchmark('catalog_query')
+def bench_catalog_query(grid):
+    """Ratio and center-distance pair searches, external and ring, around each grid gear (catalog built on first use)."""
+    catalog = standard_catalog(20.0)
+    queries = 0
+    for z in grid['z']:
+        for m in grid['m']:
+            for ratio in (1.5, 2.0, 3.0, 4.5):
+                catalog.find_pairs(ratio, m * z * (1.0 + ratio) / 2.0, 0.05, 0.5)
+                catalog.find_pairs(ratio, m * z * (ratio - 1.0) / 2.0, 0.05, 0.5, internal=True)
+                queries += 2
+    return queries
+def _emit(create, sketch, full_outline, *args):
+    create(*args, sketch=sketch, full_outline=full_outline)
+@benchmark('sketch_emission')
+def bench_sketch_emission(grid):
+    profile_cache.clear()
+    entities = 0
+    for z in grid['z']:
+        for m in grid['m']:
+            sketch = RecordingSketch('bench')
+            _emit(create_external_gear_in_alibre, sketch, False, z, m, 20.0)
+            _emit(create_internal_gear_in_alibre, sketch, False, max(z, 12), m, 20.0, 0.0, 10.0 * m)
+            entities += sketch.call_count()
+    return entities
+@benchmark('sketch_emission_full_outline')
+def bench_sketch_emission_full_outline(grid):
+    profile_cache.clear()
+    entities = 0
+    for z in grid['z']:
+        for m in grid['m']:
+            emitter = SketchEmitter(RecordingSketch('bench'))
+            _emit(create_external_gear_in_alibre, emitter, True, z, m, 20.0)
+            entities += len(emitter.flush())
+    return entities
+@benchmark('sketch_emission_instrumented')
+def bench_sketch_emission_instrumented(grid):
+    """sketch_emission with gear_trace instrumentation on: the cost of the spans when enabled."""
+    instrumentation.enable()
+    try:
+        return bench_sketch_emission(grid)
+    finally:
+        instrumentation.enable(False)
+        instrumentation.reset()
+@benchmark('preview_update')
+def bench_preview_update(grid):
+    engine = PreviewEngine()
+    points = 0
+    for z in grid['z']:
+        for m in grid['m']:
+            for thickness in (5.0, 10.0):
+                points += len(engine.compute({'z': z, 'm': m, 'thickness': thickness}))
+                points += len(engine.compute({'kind': 'internal', 'z': max(z, 12), 'm': m, 'thickness': thickness * m}))
+    return points
+@benchmark('gear_pair')
+def bench_gear_pair(grid):
+    profile_cache.clear()
+    points = 0
+    for z in grid['z']:
+        for m in grid['m']:
+            pair = generate_gear_pair(z, z + 11, m, 20.0, m * (2 * z + 11) / 2.0 + 0.3 * m)
+            points += pair.profile_1.point_count + pair.profile_2.point_count
+            pair = generate_gear_pair(z, 2 * z + 12, m, 20.0, internal=True, rim_thickness=5.0 * m)
+            points += pair.profile_1.point_count + pair.profile_2.point_count
+    return points
+@benchmark('mesh_analysis')
+def bench_mesh_analysis(grid):
+    """Contact ratio, backlash and interference sweeps: a 200 x 200 pair and a 160 / 200 ring pair, then the grid."""
+    steps = 0
+    pairs = [generate_gear_pair(200, 200, 1.0, 20.0), generate_gear_pair(160, 200, 1.0, 20.0, internal=True)]
+    pairs.extend(generate_gear_pair(z, z + 11, 2.0, 20.0) for z in grid['z'])
+    for pair in pairs:
+        steps += analyze_pair(pair).steps
+    return steps
+@benchmark('batch_commit')
+def bench_batch_commit(grid):
+    profile_cache.clear()
+    transaction = GearTransaction(RecordingPart(), RecordingParameterTypes)
+    for z in grid['z']:
+        for m in grid['m']:
+            transaction.add('gear_%d_%g' % (z, m), 'XY-Plane', z, m, 20.0)
+            transaction.add('ring_%d_%g' % (z, m), 'XY-Plane', max(z, 12), m, 20.0, 0.0, 10.0 * m, True)
+    report = transaction.commit()
+    return sum(job.entities for job in report.jobs)
+def calibrate(loops=200000):
+    """Seconds taken by a fixed pure-Python float loop on this interpreter and machine."""
+    best = None
+    for _ in range(3):
+        started = _timer()
+        total = 0.0
+        for i in range(loops):
+            total += math.sqrt(i) * 0.5
+        elapsed = _timer() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+def run_case(fn, grid, repeat=3, min_time=0.2):
+    """
+    Best per-call wall time of repeat runs, each looping fn until it takes at least min_time
+    seconds, plus one tracemalloc run; returns the case result dict.
+    """
+    points = fn(grid)
+    loops = 1
+    while True:
+        started = _timer()
+        for _ in range(loops):
+            fn(grid)
+        elapsed = _timer() - started
+        if elapsed >= min_time:
+            break
+        loops *= 2 if elapsed <= 0 else max(2, int(math.ceil(min_time / elapsed)))
+    best = elapsed / loops
+    for _ in range(repeat - 1):
+        started = _timer()
+        for _ in range(loops):
+            fn(grid)
+        best = min(best, (_timer() - started) / loops)
+    result = {
+        'seconds': best,
+        'loops': loops,
+        'points': points,
+        'points_per_second': points / best if best > 0 else 0.0,
+        'peak_bytes': None,
+        'retained_bytes': None,
+    }
+    if tracemalloc is not None:
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            fn(grid)
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        result['peak_bytes'] = peak - before
+        result['retained_bytes'] = current - before
+    return result
+def run(names=None, grid=None, repeat=3, backend=None, min_time=0.2):
+    """
+    Run the selected benchmark cases (default: all) and return the report dict. backend: array
+    backend for the run; the previous default is restored afterwards.
+    """
+    grid = FULL_GRID if grid is None else grid
+    previous = get_array_backend().name
+    if backend is not None:
+        set_array_backend(backend)
+    try:
+        return _run(names, grid, repeat, min_time)
+    finally:
+        set_array_backend(previous)
+def _run(names, grid, repeat, min_time):
+    report = {
+        'version': BASELINE_VERSION,
+        'python': '%s %s' % (platform.python_implementation(), platform.python_version()),
+        'backend': get_array_backend().name,
+        'grid': grid,
+        'calibration_seconds': calibrate(),
+        'cases': OrderedDict(),
+    }
+    for name in names or BENCHMARKS:
+        report['cases'][name] = run_case(BENCHMARKS[name], grid, repeat, min_time)
+    return report
+def compare(report, baseline, threshold=0.25):
+    """
+    Regressions of report against baseline as a list of messages (empty when within threshold).
+    Times are compared relative to each run's calibration, memory peaks as is.
+    """
+    if baseline.get('version') != BASELINE_VERSION:
+        raise ValueError("Unsupported baseline version %r." % baseline.get('version'))
+    scale = baseline['calibration_seconds'] / report['calibration_seconds']
+    regressions = []
+    for name, result in report['cases'].items():
+        reference = baseline['cases'].get(name)
+        if reference is None:
+            continue
+        ratio = result['seconds'] * scale / reference['seconds']
+        if ratio > 1.0 + threshold:
+            regressions.append('%s: %.2fx slower than baseline' % (name, ratio))
+        if result['peak_bytes'] is not None and reference.get('peak_bytes'):
+            ratio = float(result['peak_bytes']) / reference['peak_bytes']
+            if ratio > 1.0 + threshold:
+                regressions.append('%s: %.2fx peak memory of baseline' % (name, ratio))
+    return regressions
+def format_report(report):
+    lines = ['%s, %s backend, calibration %.4f s' % (report['python'], report['backend'], report['calibration_seconds'])]
+    lines.append('%-30s %10s %12s %14s %12s' % ('case', 'seconds', 'points', 'points/s', 'peak KiB'))
+    for name, result in report['cases'].items():
+        peak = '-' if result['peak_bytes'] is None else '%.1f' % (result['peak_bytes'] / 1024.0)
+        lines.append('%-30s %10.4f %12d %14.0f %12s' % (name, result['seconds'], result['points'],
+                                                       result['points_per_second'], peak))
+    return '\n'.join(lines)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the py-gear geometry core and sketch emission.')
+    parser.add_argument('cases', nargs='*', help='cases to run (default: all of %s)' % ', '.join(BENCHMARKS))
+    parser.add_argument('--quick', action='store_true', help='use the small grid')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per case, best is kept (default: 3)')
+    parser.add_argument('--min-time', type=float, default=0.2, help='minimum seconds per timed run (default: 0.2)')
+    parser.add_argument('--backend', choices=('math', 'numpy'), help='array backend (default: numpy if available)')
+    parser.add_argument('--save-baseline', metavar='PATH', help='write the results as a JSON baseline')
+    parser.add_argument('--baseline', metavar='PATH', help='compare against this JSON baseline')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed slowdown/memory growth before failing, as a fraction (default: 0.25)')
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.cases if name not in BENCHMARKS]
+    if unknown:
+        parser.error('unknown case(s): %s' % ', '.join(unknown))
+    report = run(args.cases, QUICK_GRID if args.quick else FULL_GRID, args.repeat, args.backend, args.min_time)
+    print(format_report(report))
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        sys.stderr.write('baseline written to %s\n' % args.save_baseline)
+    if args.baseline:
+        if not os.path.exists(args.baseline):
+            parser.error('baseline %s does not exist' % args.baseline)
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for message in regressions:
+            sys.stderr.write('REGRESSION %s\n' % message)
+        if regressions:
+            return 1
+        sys.stderr.write('no regression beyond %d%%\n' % round(100 * args.threshold))
+    return 0
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Indexed catalog of standard gears for finding meshing pairs by ratio and center distance.
+GearCatalog holds every tooth count z_min..z_max in every module of the standard series at
+one pressure angle, unshifted. The radii come from the 'parameters' dict of one generated
+module-1 profile per tooth count and kind (every radius of an unshifted gear scales with m),
+and gear_domain flags the tooth counts that undercut or cannot be generated. Per module the
+pitch radii are a sorted array, so find_pairs() turns "ratio r +/- e and center distance
+C +/- d" into bisect ranges: the pinions whose pitch radius can satisfy both, then per pinion
+the mates inside both the ratio and the center-distance window. A query only visits those
+ranges instead of every pair of tooth counts. Headless.
+Example:
+    python gear_catalog.py --ratio 3 --ratio-tolerance 0.05 --center 60 --center-tolerance 1
+"""
+import argparse
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from gear_geometry import generate_external_tooth_profile, generate_internal_tooth_profile, contact_ratio
+from gear_domain import classify, VALID, UNDERCUT
+from gear_pair import generate_gear_pair
+_timer = getattr(time, 'perf_counter', time.time)
+# ISO 54 / DIN 780 module series I (preferred) and II, in mm
+MODULE_SERIES_1 = (0.1, 0.12, 0.15, 0.2, 0.25, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 1.25, 1.5, 2.0, 2.5, 3.0,
+                   4.0, 5.0, 6.0, 8.0, 10.0, 12.0, 16.0, 20.0, 25.0, 32.0, 40.0, 50.0)
+MODULE_SERIES_2 = (0.11, 0.14, 0.18, 0.22, 0.28, 0.35, 0.45, 0.55, 0.65, 0.75, 0.85, 0.95, 1.125, 1.375, 1.75, 2.25,
+                   2.75, 3.5, 4.5, 5.5, 7.0, 9.0, 11.0, 14.0, 18.0, 22.0, 28.0, 36.0, 45.0)
+STANDARD_MODULES = tuple(sorted(MODULE_SERIES_1 + MODULE_SERIES_2))
+RADII = ('pitch_radius', 'base_radius', 'addendum_radius', 'dedendum_radius')
+KINDS = ('external', 'internal')
+_SLACK = 1e-9
+class CatalogGear(object):
+    """One catalog gear: z teeth of module m, unshifted, radii in mm; undercut per gear_domain."""
+    __slots__ = ('z', 'm', 'alpha_deg', 'internal', 'pitch_radius', 'base_radius', 'addendum_radius',
+                 'dedendum_radius', 'undercut')
+    def __init__(self, z, m, alpha_deg, internal, radii, undercut):
+        self.z = z
+        self.m = m
+        self.alpha_deg = alpha_deg
+        self.internal = internal
+        self.pitch_radius, self.base_radius, self.addendum_radius, self.dedendum_radius = radii
+        self.undercut = undercut
+    @property
+    def parameters(self):
+        """The gear's profile 'parameters' dict."""
+        p = dict((name, getattr(self, name)) for name in RADII)
+        p.update(z=self.z, m=self.m, alpha_deg=self.alpha_deg, profile_shift=0.0)
+        return p
+    def to_dict(self):
+        d = dict((name, getattr(self, name)) for name in self.__slots__)
+        d['kind'] = 'internal' if d.pop('internal') else 'external'
+        return d
+    def __repr__(self):
+        return 'CatalogGear(%s z=%d m=%g)' % ('internal' if self.internal else 'external', self.z, self.m)
+class CatalogPair(object):
+    """A pinion (gear_1, external) and its mate (gear_2: external, or the internal ring around it)."""
+    __slots__ = ('gear_1', 'gear_2')
+    def __init__(self, gear_1, gear_2):
+        self.gear_1 = gear_1
+        self.gear_2 = gear_2
+    @property
+    def internal(self):
+        return self.gear_2.internal
+    @property
+    def m(self):
+        return self.gear_1.m
+    @property
+    def ratio(self):
+        return self.gear_2.z / float(self.gear_1.z)
+    @property
+    def center_distance(self):
+        if self.internal:
+            return self.gear_2.pitch_radius - self.gear_1.pitch_radius
+        return self.gear_1.pitch_radius + self.gear_2.pitch_radius
+    def contact_ratio(self):
+        return contact_ratio(self.gear_1.parameters, self.gear_2.parameters, self.center_distance, self.internal)
+    def generate(self, **kwargs):
+        """gear_pair.generate_gear_pair() of the two gears at their standard center distance."""
+        return generate_gear_pair(self.gear_1.z, self.gear_2.z, self.m, self.gear_1.alpha_deg,
+                                  internal=self.internal, **kwargs)
+    def to_dict(self):
+        return {'kind': 'internal' if self.internal else 'external', 'm': self.m, 'z1': self.gear_1.z,
+                'z2': self.gear_2.z, 'ratio': self.ratio, 'center_distance': self.center_distance,
+                'gear_1': self.gear_1.to_dict(), 'gear_2': self.gear_2.to_dict()}
+    def __repr__(self):
+        return 'CatalogPair(%s %d/%d m=%g C=%g)' % ('internal' if self.internal else 'external',
+                                                   self.gear_1.z, self.gear_2.z, self.m, self.center_distance)
+class GearCatalog(object):
+    """
+    Standard gears z_min..z_max in each of modules at alpha_deg. Module-1 radii and gear_domain
+    flags are kept per kind and tooth count, the pitch radii of every module as a sorted array.
+    """
+    def __init__(self, alpha_deg=20.0, modules=STANDARD_MODULES, z_range=(6, 200)):
+        started = _timer()
+        self.alpha_deg = float(alpha_deg)
+        self.modules = tuple(sorted(float(m) for m in modules))
+        self.z_min, self.z_max = int(z_range[0]), int(z_range[1])
+        teeth = range(self.z_min, self.z_max + 1)
+        self._radii = {}
+        self._flags = {}
+        for kind in KINDS:
+            radii = dict((name, array('d')) for name in RADII)
+            flags = array('B')
+            for z in teeth:
+                try:
+                    if kind == 'internal':
+                        parameters = generate_internal_tooth_profile(z, 1.0, self.alpha_deg, 10.0)['parameters']
+                    else:
+                        parameters = generate_external_tooth_profile(z, 1.0, self.alpha_deg)['parameters']
+                    flags.append(classify(kind, z, self.alpha_deg, 0.0))
+                except ValueError:
+                    parameters = dict((name, float('nan')) for name in RADII)
+                    flags.append(0)
+                for name in RADII:
+                    radii[name].append(parameters[name])
+            self._radii[kind] = radii
+            self._flags[kind] = flags
+        unit = self._radii['external']['pitch_radius']
+        self._pitch = [array('d', [m * r for r in unit]) for m in self.modules]
+        self.build_seconds = _timer() - started
+    def __len__(self):
+        return len(self.modules) * (self.z_max - self.z_min + 1)
+    def _gear(self, kind, index, m):
+        radii = self._radii[kind]
+        return CatalogGear(self.z_min + index, m, self.alpha_deg, kind == 'internal',
+                           [m * radii[name][index] for name in RADII], bool(self._flags[kind][index] & UNDERCUT))
+    def gear(self, z, m, internal=False):
+        """CatalogGear of z teeth in module m; KeyError when the catalog has no such gear."""
+        k = bisect_left(self.modules, m * (1.0 - _SLACK))
+        if k == len(self.modules) or abs(self.modules[k] - m) > _SLACK * m or not self.z_min <= z <= self.z_max:
+            raise KeyError('No catalog gear with z=%r, m=%r.' % (z, m))
+        return self._gear('internal' if internal else 'external', int(z) - self.z_min, self.modules[k])
+    def _usable(self, kind, index, undercut_free):
+        flags = self._flags[kind][index]
+        return flags & VALID and not (undercut_free and flags & UNDERCUT)
+    def find_pairs(self, ratio=None, center_distance=None, ratio_tolerance=0.0, center_tolerance=0.0, internal=False,
+                   modules=None, undercut_free=False, limit=None):
+        """
+        CatalogPairs of one module whose ratio z2 / z1 (at least 1, over 1 for internal) is within
+        ratio +/- ratio_tolerance and whose standard center distance (mm) is within center_distance
+        +/- center_tolerance; either criterion may be None but not both. internal: the mates are
+        ring gears; modules: restrict to these; undercut_free: skip gears that undercut.
+        Sorted by center distance error, then ratio error, module and z1; at most limit pairs.
+        """
+        if ratio is None and center_distance is None:
+            raise ValueError('Give a ratio, a center distance or both.')
+        if ratio is not None and ratio < 1.0:
+            raise ValueError('The ratio is z2 / z1 and at least 1, got %g.' % ratio)
+        low_ratio, high_ratio = (1.0, float('inf')) if ratio is None else (ratio - ratio_tolerance, ratio + ratio_tolerance)
+        low_ratio = max(low_ratio, 1.0)
+        low_center, high_center = ((0.0, float('inf')) if center_distance is None
+                                   else (center_distance - center_tolerance, center_distance + center_tolerance))
+        low_center = max(low_center, 0.0)
+        kind = 'internal' if internal else 'external'
+        sign = -1.0 if internal else 1.0
+        # pinion pitch radius r1: external r1 (1 + ratio) = C, internal r1 (ratio - 1) = C
+        if internal:
+            low_pinion = low_center / (high_ratio - 1.0) if high_ratio > 1.0 else float('inf')
+            high_pinion = high_center / (low_ratio - 1.0) if low_ratio > 1.0 else float('inf')
+        else:
+            low_pinion = low_center / (1.0 + high_ratio)
+            high_pinion = high_center / (1.0 + low_ratio)
+        wanted = None if modules is None else set(float(m) for m in modules)
+        found = []
+        for k, m in enumerate(self.modules):
+            if wanted is not None and m not in wanted:
+                continue
+            pitch = self._pitch[k]
+            for i in range(bisect_left(pitch, low_pinion * (1.0 - _SLACK)), bisect_right(pitch, high_pinion * (1.0 + _SLACK))):
+                if not self._usable('external', i, undercut_free):
+                    continue
+                r1 = pitch[i]
+                if internal:
+                    low, high = max(r1 * low_ratio, low_center + r1), min(r1 * high_ratio, high_center + r1)
+                else:
+                    low, high = max(r1 * low_ratio, low_center - r1), min(r1 * high_ratio, high_center - r1)
+                first = max(bisect_left(pitch, low * (1.0 - _SLACK)), i + 1 if internal else i)
+                for j in range(first, bisect_right(pitch, high * (1.0 + _SLACK))):
+                    if self._usable(kind, j, undercut_free):
+                        center_error = 0.0 if center_distance is None else abs(pitch[j] + sign * r1 - center_distance)
+                        ratio_error = 0.0 if ratio is None else abs((self.z_min + j) / float(self.z_min + i) - ratio)
+                        found.append((center_error, ratio_error, m, i, j))
+        # sort the index tuples, build CatalogPairs only for what is returned
+        found.sort()
+        return [CatalogPair(self._gear('external', i, m), self._gear(kind, j, m))
+                for _, _, m, i, j in (found if limit is None else found[:limit])]
+_catalogs = {}
+def standard_catalog(alpha_deg=20.0):
+    """The GearCatalog of STANDARD_MODULES and z 6..200 at alpha_deg, built once per pressure angle."""
+    key = float(alpha_deg)
+    if key not in _catalogs:
+        _catalogs[key] = GearCatalog(key)
+    return _catalogs[key]
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Find standard gear pairs by ratio and center distance.')
+    parser.add_argument('--ratio', type=float, help='tooth ratio z2 / z1 (at least 1)')
+    parser.add_argument('--ratio-tolerance', type=float, default=0.0)
+    parser.add_argument('--center', type=float, help='center distance in mm')
+    parser.add_argument('--center-tolerance', type=float, default=0.0, help='in mm')
+    parser.add_argument('--internal', action='store_true', help='pair a pinion with a ring gear')
+    parser.add_argument('--alpha', type=float, default=20.0, help='pressure angle (default: 20)')
+    parser.add_argument('--modules', help='comma-separated modules (default: ISO 54 series I and II)')
+    parser.add_argument('--undercut-free', action='store_true', help='skip gears that undercut')
+    parser.add_argument('--limit', type=int, default=50, help='most pairs listed (default: 50)')
+    args = parser.parse_args(argv)
+    if args.ratio is None and args.center is None:
+        parser.error('give --ratio, --center or both')
+    modules = None if args.modules is None else [float(m) for m in args.modules.split(',')]
+    catalog = standard_catalog(args.alpha)
+    started = _timer()
+    pairs = catalog.find_pairs(args.ratio, args.center, args.ratio_tolerance, args.center_tolerance, args.internal,
+                               modules, args.undercut_free)
+    seconds = _timer() - started
+    sys.stdout.write('%8s %5s %5s %9s %11s\n' % ('m', 'z1', 'z2', 'ratio', 'center'))
+    for pair in pairs[:args.limit]:
+        sys.stdout.write('%8g %5d %5d %9.4f %11.4f\n' % (pair.m, pair.gear_1.z, pair.gear_2.z, pair.ratio,
+                                                         pair.center_distance))
+    sys.stderr.write('%d pairs in %.3f ms (catalog of %d gears built in %.0f ms)\n'
+                     % (len(pairs), seconds * 1e3, len(catalog), catalog.build_seconds * 1e3))
+    return 0 if pairs else 1
+if __name__ == '__main__':
+    sys.exit(main())
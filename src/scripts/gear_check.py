@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Regression check of the tooth profile generators against pinned baseline outputs.
+BASELINE holds every segment point of two gears as the original per-point generator produced
+them, before the array backends: an external z=20, m=1, 20 deg gear and an internal z=40, m=1,
+20 deg gear with a 10 mm rim. check_backend() regenerates both with one array backend and
+compares every point; the run fails when a backend drifts from the baseline by more than the
+tolerance or changes the segment keys or point counts.
+Example:
+    python gear_check.py
+    python gear_check.py --backend math --tolerance 1e-12
+"""
+import argparse
+import sys
+from collections import OrderedDict
+from gear_geometry import generate_external_tooth_profile, generate_internal_tooth_profile, get_array_backend
+BASELINE = [
+    ('external z=20 m=1 alpha=20', 'external', (20, 1.0, 20.0), OrderedDict([
+        ('trochoid_1', (
+            (9.396926207859085, 1.3877787807814457e-16),
+            (9.264874435292906, -0.020773778421041847),
+            (9.14676547636696, -0.03144122267738153),
+            (9.0431771961488, -0.03317364295919048),
+            (8.954615164281917, -0.027171591765574057),
+            (8.881511274572908, -0.0146609187242885),
+            (8.82422256593117, 0.003111236788865032),
+            (8.783030247367815, 0.02488050537932065),
+            (8.758138929292436, 0.04936938974555464),
+            (8.749676062873379, 0.07529139911458267),
+        )),
+        ('involute_1', (
+            (9.396926207859085, -0.0),
+            (9.418380831603125, -0.000967739327050239),
+            (9.482450498771762, -0.007731300710857336),
+            (9.588254838039171, -0.026033514633143396),
+            (9.734334019074353, -0.06151159171219955),
+            (9.918659885264969, -0.1196452187740968),
+            (10.138651439645054, -0.20570573594179656),
+            (10.391194584845687, -0.3247067448099677),
+            (10.672665990552717, -0.48135648904468264),
+            (10.978960935364627, -0.6800123379303245),
+        )),
+        ('upper_arc', (
+            (10.978960935364627, -0.6800123379303242),
+            (10.966853028520557, -0.853308063262899),
+            (10.952009933259442, -1.026390969263917),
+            (10.934435351524046, -1.1992178881843032),
+            (10.914133666503629, -1.3717457161194502),
+        )),
+        ('involute_2', (
+            (9.233298786518592, -1.7459712697588166),
+            (9.254559632035885, -1.7490067017368396),
+            (9.318770348458619, -1.7542652100967833),
+            (9.426132925830325, -1.7559403884082079),
+            (9.57626036080946, -1.7482219460962871),
+            (9.768177951667038, -1.7253487770610172),
+            (10.000329071542053, -1.6816617749377982),
+            (10.270585387544275, -1.611656032599207),
+            (10.576261464813133, -1.5100320669955325),
+            (10.914133666503627, -1.3717457161194497),
+        )),
+        ('trochoid_2', (
+            (9.233298786518592, -1.7459712697588168),
+            (9.107406231342832, -1.7010236885216201),
+            (8.993335924497375, -1.668597069183235),
+            (8.89187330098552, -1.6476478661272655),
+            (8.803738192547705, -1.6370903679588293),
+            (8.72958273826175, -1.6358003175039504),
+            (8.66998948143248, -1.6426186303379677),
+            (8.625469657260869, -1.6563552026657706),
+            (8.596461675343955, -1.675792799177185),
+            (8.583329800609524, -1.6996910113219046),
+        )),
+        ('lower_arc', (
+            (8.583329800609523, -1.6996910113219046),
+            (8.533319219364957, -1.9351907142234468),
+            (8.476848541448286, -2.1692253929331753),
+            (8.413960517637854, -2.4016178729413555),
+            (8.344702756924121, -2.6321922229546515),
+        )),
+    ])),
+    ('internal z=40 m=1 alpha=20 thickness=10', 'internal', (40, 1.0, 20.0, 10.0), OrderedDict([
+        ('involute_1', (
+            (18.99998896448857, -0.020478020230866836),
+            (19.132308180706676, -0.043253762378458606),
+            (19.296161561098806, -0.07859150456677126),
+            (19.49066789279584, -0.1291755166522931),
+            (19.7147763911059, -0.1976357063700023),
+            (19.967269816536426, -0.2865381255129414),
+            (20.24676808939327, -0.39837564645890705),
+            (20.551732392961014, -0.5355588340548793),
+            (20.880469755047333, -0.7004070374069198),
+            (21.231138096476343, -0.8951397256019686),
+        )),
+        ('upper_arc', (
+            (21.231138096476347, -0.8951397256019679),
+            (21.225365903150216, -1.0229087336552387),
+            (21.218824802797204, -1.1506406859650768),
+            (21.21151503237426, -1.2783309553323035),
+            (21.203436856684068, -1.4059749160677388),
+        )),
+        ('involute_2', (
+            (18.890788066175045, -2.03423849114563),
+            (19.024794260747235, -2.0259048708502005),
+            (19.191508117611836, -2.0084929146641612),
+            (19.390343859433376, -1.979238801736517),
+            (19.62054125287598, -1.9354144176198491),
+            (19.88116768071678, -1.8743371294838158),
+            (20.171120727039302, -1.7933794457867955),
+            (20.48913126926843, -1.6899785345689293),
+            (20.833767069544148, -1.5616455748579305),
+            (21.203436856684064, -1.4059749160677377),
+        )),
+        ('lower_arc_1', (
+            (18.89078806617505, -2.03423849114563),
+            (18.832921617548372, -2.5141724975186714),
+        )),
+        ('lower_arc_2', (
+            (18.99998896448857, -0.02047802023086717),
+            (18.994360330662843, 0.462899156341629),
+        )),
+        ('external_arc', (
+            (31.240724228063886, 0.7613472966145214),
+            (31.249253456906548, 0.2160055231103174),
+            (31.248263860427922, -0.32940204776871845),
+            (31.237755740068682, -0.8747092795930145),
+            (31.217732296704078, -1.4197500664972478),
+            (31.18819962966894, -1.964358383777798),
+            (31.14916673489973, -2.5083683384654827),
+            (31.100645502194315, -3.051614219858161),
+            (31.042650711590213, -3.59393054999782),
+            (30.975200028862453, -4.135152134076762),
+        )),
+    ])),
+]
+def check_backend(backend, tolerance=1e-9):
+    """
+    Regenerate the BASELINE gears with an array backend and compare them point by point.
+    Returns the largest coordinate deviation found, raises AssertionError above tolerance.
+    """
+    bk = get_array_backend(backend)
+    worst = 0.0
+    for label, kind, args, expected in BASELINE:
+        if kind == 'internal':
+            profile = generate_internal_tooth_profile(*args, backend=bk)
+        else:
+            profile = generate_external_tooth_profile(*args, backend=bk)
+        keys = [key for key in profile if key != 'parameters']
+        if sorted(keys) != sorted(expected):
+            raise AssertionError("%s: segments %s, expected %s" % (label, ', '.join(sorted(keys)), ', '.join(sorted(expected))))
+        for key, points in expected.items():
+            actual = bk.to_tuples(profile[key])
+            if len(actual) != len(points):
+                raise AssertionError("%s: %s has %d points, expected %d" % (label, key, len(actual), len(points)))
+            for (xa, ya), (xb, yb) in zip(actual, points):
+                worst = max(worst, abs(xa - xb), abs(ya - yb))
+    if worst > tolerance:
+        raise AssertionError("Backend %s deviates %g from the baseline, tolerance %g" % (bk.name, worst, tolerance))
+    return worst
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check the py-gear array backends against the pinned baseline profiles.')
+    parser.add_argument('--backend', action='append', help='array backend to check, repeatable (default: math and numpy)')
+    parser.add_argument('--tolerance', type=float, default=1e-9, help='largest allowed coordinate deviation (default: 1e-9)')
+    args = parser.parse_args(argv)
+    failed = 0
+    for name in args.backend or ('math', 'numpy'):
+        try:
+            bk = get_array_backend(name)
+        except ValueError as ex:
+            if args.backend:
+                sys.stderr.write('%s\n' % ex)
+                failed += 1
+            else:
+                sys.stdout.write('%s: skipped, backend not available\n' % name)
+            continue
+        try:
+            worst = check_backend(bk, args.tolerance)
+        except AssertionError as ex:
+            sys.stdout.write('%s: FAILED %s\n' % (name, ex))
+            failed += 1
+        else:
+            sys.stdout.write('%s: ok, max deviation %g\n' % (name, worst))
+    return 1 if failed else 0
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Headless py-gear batch generator.
+Reads a parameter table (CSV or JSONL, one gear per row) and streams every generated
+profile to CSV, DXF or SVG as soon as it is computed, so memory stays flat on large jobs.
+Example:
+    python gear_cli.py gears.csv --format dxf --output gears.dxf --full-outline
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import sys
+from gear_geometry import generate_external_tooth_profile, generate_internal_tooth_profile, generate_full_gear_outline
+from gear_envelope import generate_external_envelope_profile, generate_internal_envelope_profile
+_COLUMN_ALIASES = {
+    'module': 'm',
+    'teeth': 'z',
+    'pressure_angle': 'alpha_deg',
+    'alpha': 'alpha_deg',
+    'shift': 'profile_shift',
+    'type': 'kind',
+    'undercut': 'undercut_auto_suppress',
+}
+_TRUE_STRINGS = ('1', 'true', 'yes', 'y', 'on')
+_GENERATORS = {
+    ('external', 'analytic'): generate_external_tooth_profile,
+    ('internal', 'analytic'): generate_internal_tooth_profile,
+    ('external', 'envelope'): generate_external_envelope_profile,
+    ('internal', 'envelope'): generate_internal_envelope_profile,
+}
+def _open_text(path, mode):
+    if path == '-':
+        return sys.stdin if 'r' in mode else sys.stdout
+    if sys.version_info[0] >= 3:
+        return io.open(path, mode, newline='' if path.endswith('.csv') else None)
+    return open(path, mode + 'b' if path.endswith('.csv') else mode)
+def read_parameter_rows(path, input_format=None, errors=None):
+    """
+    Yield one dict per gear from a CSV (header row) or JSONL parameter table. errors: list that
+    collects (row number, message) of the JSONL lines that do not parse or are not a JSON object,
+    which are skipped (ValueError when errors is None).
+    """
+    if input_format is None:
+        input_format = 'jsonl' if path.lower().endswith(('.jsonl', '.json')) else 'csv'
+    stream = _open_text(path, 'r')
+    try:
+        if input_format == 'jsonl':
+            index = 0
+            for line in stream:
+                line = line.strip()
+                if not line:
+                    continue
+                index += 1
+                try:
+                    row = json.loads(line)
+                except ValueError as ex:
+                    message = 'invalid JSON: %s' % ex
+                else:
+                    if isinstance(row, dict):
+                        yield row
+                        continue
+                    message = 'expected a JSON object'
+                if errors is None:
+                    raise ValueError('Row %d: %s' % (index, message))
+                errors.append((index, message))
+        else:
+            for row in csv.DictReader(stream):
+                yield row
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+def _flag(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in _TRUE_STRINGS
+def _number(row, key, default, convert=float):
+    value = row.get(key)
+    if value is None or (not isinstance(value, (int, float)) and not str(value).strip()):
+        return default
+    return convert(value)
+def normalize_job(row, index):
+    """Turn a raw parameter row into generator keyword arguments plus a name and gear kind."""
+    if not isinstance(row, dict):
+        raise ValueError("Row %d: expected a mapping of column names to values, got %s." % (index, type(row).__name__))
+    row = dict((_COLUMN_ALIASES.get(str(k).strip().lower(), str(k).strip().lower()), v) for k, v in row.items())
+    kind = str(row.get('kind') or 'external').strip().lower()
+    if _flag(row.get('internal', False)):
+        kind = 'internal'
+    if kind not in ('external', 'internal'):
+        raise ValueError("Unknown gear kind '%s', expected 'external' or 'internal'." % kind)
+    generation = str(row.get('generation') or 'analytic').strip().lower()
+    if generation not in ('analytic', 'envelope'):
+        raise ValueError("Unknown generation '%s', expected 'analytic' or 'envelope'." % generation)
+    job = {
+        'kind': kind,
+        'z': _number(row, 'z', None, lambda v: int(float(v))),
+        'm': _number(row, 'm', None),
+        'alpha_deg': _number(row, 'alpha_deg', 20.0),
+        'profile_shift': _number(row, 'profile_shift', 0.0),
+        'undercut_auto_suppress': _flag(row.get('undercut_auto_suppress', False)),
+        'tolerance': _number(row, 'tolerance', None),
+    }
+    if job['z'] is None or job['m'] is None:
+        raise ValueError("Row %d needs at least 'z' and 'm'." % index)
+    job['generation'] = generation
+    if kind == 'internal':
+        job['thickness'] = _number(row, 'thickness', 10.0)
+    job['name'] = str(row.get('name') or 'Gear%d_%s_%dT_M%g' % (index, kind.capitalize(), job['z'], job['m']))
+    return job
+def generate_jobs(rows, full_outline=False, backend=None, read_errors=None):
+    """
+    Yield (job, result, error) for every row: result is the tooth profile (cut by the
+    generating cutter of gear_envelope when the row's generation is 'envelope'), or the
+    generate_full_gear_outline dict when full_outline is set; error is the message of a
+    row that could not be generated (result is then None). read_errors: the errors list given
+    to read_parameter_rows(); the rows it skipped come out as failed rows in their place.
+    """
+    read_errors = [] if read_errors is None else read_errors
+    reported = 0
+    for count, row in enumerate(rows, 1):
+        for line, message in read_errors[reported:]:
+            yield {'name': 'row%d' % line}, None, message
+        reported = len(read_errors)
+        # the rows that did not parse are in read_errors, so this is the row's number in the table
+        index = count + reported
+        job = None
+        try:
+            job = normalize_job(row, index)
+            kwargs = dict((k, v) for k, v in job.items() if k not in ('kind', 'name', 'generation'))
+            if job['generation'] == 'envelope':
+                del kwargs['tolerance']
+            result = _GENERATORS[job['kind'], job['generation']](backend=backend, **kwargs)
+            if full_outline:
+                result = generate_full_gear_outline(result, backend=backend)
+            yield job, result, None
+        except (ValueError, TypeError, ZeroDivisionError) as ex:
+            yield job or {'name': 'row%d' % index}, None, str(ex)
+    for line, message in read_errors[reported:]:
+        yield {'name': 'row%d' % line}, None, message
+def _polylines(result):
+    """(label, points, closed) for every drawable piece of a profile or full outline."""
+    if 'segments' in result:
+        yield 'outline', result['points'], True
+        if result['outer_radius'] is not None:
+            yield 'rim', None, result['outer_radius']
+        return
+    for key in sorted(result):
+        if key != 'parameters' and len(result[key]) > 0:
+            yield key, result[key], False
+class CsvWriter(object):
+    """One row per point: name, segment, index, x, y (an internal gear rim is written as its point (r, 0))."""
+    extension = '.csv'
+    def __init__(self, stream, precision=6):
+        self.writer = csv.writer(stream)
+        self.fmt = '%%.%df' % precision
+    def begin(self):
+        self.writer.writerow(['name', 'segment', 'index', 'x', 'y'])
+    def write(self, job, result):
+        fmt = self.fmt
+        for label, points, closed in _polylines(result):
+            if points is None:
+                self.writer.writerow([job['name'], label, 0, fmt % closed, fmt % 0.0])
+                continue
+            for i, (x, y) in enumerate(points):
+                self.writer.writerow([job['name'], label, i, fmt % x, fmt % y])
+    def end(self):
+        pass
+class DxfWriter(object):
+    """AutoCAD R12 ENTITIES-only DXF: one layer per gear, each segment a POLYLINE (rim as CIRCLE)."""
+    extension = '.dxf'
+    def __init__(self, stream, precision=6):
+        self.stream = stream
+        self.fmt = '%%.%df' % precision
+    def begin(self):
+        self.stream.write('0\nSECTION\n2\nENTITIES\n')
+    def write(self, job, result):
+        fmt = self.fmt
+        layer = job['name']
+        out = self.stream
+        for label, points, closed in _polylines(result):
+            if points is None:
+                out.write('0\nCIRCLE\n8\n%s\n10\n0.0\n20\n0.0\n40\n%s\n' % (layer, fmt % closed))
+                continue
+            out.write('0\nPOLYLINE\n8\n%s\n66\n1\n70\n%d\n' % (layer, 1 if closed else 0))
+            for x, y in points:
+                out.write('0\nVERTEX\n8\n%s\n10\n%s\n20\n%s\n' % (layer, fmt % x, fmt % y))
+            out.write('0\nSEQEND\n8\n%s\n' % layer)
+    def end(self):
+        self.stream.write('0\nENDSEC\n0\nEOF\n')
+_UNSAFE_FILENAME = re.compile(r'[^\w.-]')
+class SvgWriter(object):
+    """
+    One SVG file per gear in the output directory, y axis pointing up, units in mm. The file is
+    named after the gear with every character but letters, digits, '.', '-' and '_' replaced by '_'.
+    """
+    extension = '.svg'
+    def __init__(self, directory, precision=6):
+        self.directory = directory
+        self.fmt = '%%.%df' % precision
+    def begin(self):
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+    def write(self, job, result):
+        fmt = self.fmt
+        radius = max(result['parameters']['addendum_radius'], result['parameters']['dedendum_radius'])
+        if result.get('outer_radius') is not None:
+            radius = max(radius, result['outer_radius'])
+        elif 'external_arc' in result:
+            radius = max(radius, max((x * x + y * y) ** 0.5 for x, y in result['external_arc']))
+        size = fmt % (2.2 * radius)
+        corner = fmt % (-1.1 * radius)
+        path = os.path.join(self.directory, _UNSAFE_FILENAME.sub('_', job['name']) + self.extension)
+        with open(path, 'w') as out:
+            out.write('<svg xmlns="http://www.w3.org/2000/svg" width="%smm" height="%smm" viewBox="%s %s %s %s">\n'
+                      % (size, size, corner, corner, size, size))
+            out.write('<g transform="scale(1,-1)" fill="none" stroke="black" stroke-width="%s">\n' % (fmt % (radius / 500.0)))
+            for label, points, closed in _polylines(result):
+                if points is None:
+                    out.write('<circle id="%s" cx="0" cy="0" r="%s"/>\n' % (label, fmt % closed))
+                    continue
+                coords = ' '.join('%s,%s' % (fmt % x, fmt % y) for x, y in points)
+                out.write('<%s id="%s" points="%s"/>\n' % ('polygon' if closed else 'polyline', label, coords))
+            out.write('</g>\n</svg>\n')
+    def end(self):
+        pass
+_WRITERS = {'csv': CsvWriter, 'dxf': DxfWriter, 'svg': SvgWriter}
+def run(rows, writer, full_outline=False, backend=None, errors=None, read_errors=None):
+    """
+    Drive rows through the generator pipeline into writer; returns (written, failed). errors:
+    stream for the failure messages (default stderr); read_errors: the errors list given to
+    read_parameter_rows(), whose skipped rows count as failed. A row the writer cannot write
+    (e.g. an SVG file the OS refuses) fails on its own.
+    """
+    errors = sys.stderr if errors is None else errors
+    written = 0
+    failed = 0
+    writer.begin()
+    for job, result, error in generate_jobs(rows, full_outline, backend, read_errors):
+        if error is None:
+            try:
+                writer.write(job, result)
+                written += 1
+                continue
+            except EnvironmentError as ex:
+                error = str(ex)
+        failed += 1
+        errors.write('%s: %s\n' % (job['name'], error))
+    writer.end()
+    return written, failed
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate gear profiles from a CSV/JSONL parameter table.')
+    parser.add_argument('table', help="parameter table (.csv or .jsonl, '-' for stdin)")
+    parser.add_argument('--input-format', choices=('csv', 'jsonl'), help='table format (default: from extension)')
+    parser.add_argument('--format', choices=sorted(_WRITERS), default='csv', help='output format (default: csv)')
+    parser.add_argument('--output', '-o', default='-',
+                        help="output file for csv/dxf ('-' for stdout), output directory for svg")
+    parser.add_argument('--full-outline', action='store_true', help='write the whole gear instead of one tooth')
+    parser.add_argument('--backend', choices=('math', 'numpy'), help='array backend (default: numpy if available)')
+    parser.add_argument('--precision', type=int, default=6, help='decimal places in the output (default: 6)')
+    args = parser.parse_args(argv)
+    read_errors = []
+    rows = read_parameter_rows(args.table, args.input_format, read_errors)
+    if args.format == 'svg':
+        if args.output == '-':
+            parser.error('--format svg needs --output DIRECTORY')
+        written, failed = run(rows, SvgWriter(args.output, args.precision), args.full_outline, args.backend,
+                              read_errors=read_errors)
+    else:
+        stream = _open_text(args.output, 'w')
+        try:
+            written, failed = run(rows, _WRITERS[args.format](stream, args.precision), args.full_outline, args.backend,
+                                  read_errors=read_errors)
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+    sys.stderr.write('%d gear(s) written, %d failed\n' % (written, failed))
+    return 1 if failed else 0
+if __name__ == '__main__':
+    sys.exit(main())
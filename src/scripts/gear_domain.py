@@ -0,0 +1,438 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Precomputed validity map of the py-gear parameter domain.
+With the radii in modules, whether a gear generates, undercuts or has a pointed tip depends
+on z, the pressure angle and the shift ratio profile_shift / m only (the 0.01 mm dedendum clamp
+is the one exception, checked per module). classify() evaluates the generators' own conditions
+in closed form: no geometry is generated, and it agrees with gear_validate on the outlines.
+ValidityMap holds the result over a (kind, z, alpha, shift / m) grid as three bit planes (VALID,
+UNDERCUT, POINTED), plus per (kind, z, alpha) row the exact shift interval that generates a
+valid gear and the smallest shift that is both valid and free of undercut. The file is a fixed
+header followed by those tables, so load() memory-maps it and a lookup is an index computation
+and one read; check() answers "is this valid, and what is the minimum shift?" for a dialog or
+batch row in O(1).
+Example:
+    python gear_domain.py build domain.pgvm
+    python gear_domain.py query domain.pgvm --z 8 --m 2 --alpha 20 --shift 0
+"""
+import argparse
+import math
+import os
+import struct
+import sys
+from gear_geometry import minimum_profile_shift, UNDERCUT_TOLERANCE
+try:
+    import numpy
+except ImportError:
+    numpy = None
+try:
+    import mmap
+except ImportError:
+    mmap = None
+VALID = 1
+UNDERCUT = 2
+POINTED = 4
+BASE_OUTSIDE_PITCH = 8
+ROOT_CLOSED = 16
+DEDENDUM_CLAMPED = 32
+DEDENDUM_FLOOR = 0.01
+KINDS = ('external', 'internal')
+PLANES = (VALID, UNDERCUT, POINTED)
+SHIFT_LIMIT = 1000.0
+_MAGIC = b'PGVM'
+_VERSION = 1
+_HEADER = struct.Struct('<4sIiiddIddI')
+_ROW = struct.Struct('<3d')
+_REASONS = (
+    (BASE_OUTSIDE_PITCH, "Base radius is larger than pitch radius, resulting in invalid gear geometry."),
+    (POINTED, 'The tooth tip is pointed (no top land).'),
+    (ROOT_CLOSED, 'The tooth space closes before the root.'),
+    (DEDENDUM_CLAMPED, 'Dedendum radius is clamped to %g mm.' % DEDENDUM_FLOOR),
+)
+class _ScalarMath(object):
+    """The functions _classify uses, under their numpy names, for one float at a time."""
+    pi = math.pi
+    tan = staticmethod(math.tan)
+    cos = staticmethod(math.cos)
+    sqrt = staticmethod(math.sqrt)
+    arccos = staticmethod(math.acos)
+    arctan = staticmethod(math.atan)
+    minimum = staticmethod(min)
+    maximum = staticmethod(max)
+    @staticmethod
+    def where(condition, if_true, if_false):
+        return if_true if condition else if_false
+def _involute(xp, angle):
+    return xp.tan(angle) - angle
+def _classify(xp, internal, z, alpha, shift):
+    """Flags of module-1 gears (z, alpha in radians, shift ratio: floats, or numpy arrays with xp=numpy)."""
+    pitch_radius = z / 2.0
+    base_radius = pitch_radius * xp.cos(alpha)
+    shifted = pitch_radius + shift
+    if internal:
+        undercut = shift < base_radius + 1.0 - pitch_radius - UNDERCUT_TOLERANCE
+    else:
+        undercut = shift < (1.0 + xp.sqrt(1.0 + 4.0 * base_radius * base_radius)) / 2.0 - pitch_radius - UNDERCUT_TOLERANCE
+    outside = base_radius > shifted
+    # the rest is only meaningful where the base circle is inside the pitch circle
+    shifted = xp.maximum(shifted, base_radius)
+    pitch_involute = _involute(xp, xp.arccos(base_radius / shifted))
+    if internal:
+        addendum_radius = shifted - 1.0
+        dedendum_radius = shifted + 1.25
+        root = xp.pi / z + 2.0 * pitch_involute - 2.0 * _involute(xp, xp.arccos(base_radius / dedendum_radius))
+        tip_involute = _involute(xp, xp.arccos(xp.minimum(base_radius / xp.maximum(addendum_radius, base_radius), 1.0)))
+        tip = xp.pi / z - 2.0 * pitch_involute + 2.0 * tip_involute
+    else:
+        addendum_radius = shifted + 1.0
+        dedendum_radius = xp.maximum(shifted - 1.25, DEDENDUM_FLOOR)
+        tip = xp.pi / z + 2.0 * pitch_involute - 2.0 * _involute(xp, xp.arccos(base_radius / addendum_radius))
+        # involute down to the root circle, or the trochoid fillet of generate_external_tooth_profile
+        involute_root = xp.pi / z - 2.0 * pitch_involute + 2.0 * _involute(
+            xp, xp.arccos(xp.minimum(base_radius / dedendum_radius, 1.0)))
+        depth = xp.maximum(base_radius - dedendum_radius, 0.0)
+        b = xp.sqrt(xp.maximum(base_radius ** 4 / (base_radius - depth) ** 2 - base_radius ** 2, 0.0))
+        trochoid_angle = xp.arctan(b * (1.0 - depth / base_radius) / base_radius)
+        beta = xp.arctan(b / base_radius) - trochoid_angle - _involute(xp, trochoid_angle)
+        root = xp.where(base_radius < dedendum_radius, involute_root, xp.pi / z - 2.0 * pitch_involute - 2.0 * beta)
+    pointed = xp.where(outside, False, tip <= 0.0)
+    closed = xp.where(outside, False, root <= 0.0)
+    invalid = xp.where(outside, True, xp.where(pointed, True, closed))
+    return (xp.where(undercut, UNDERCUT, 0) + xp.where(outside, BASE_OUTSIDE_PITCH, 0) + xp.where(pointed, POINTED, 0)
+            + xp.where(closed, ROOT_CLOSED, 0) + xp.where(invalid, 0, VALID))
+def classify(kind, z, alpha_deg, shift_ratio):
+    """
+    Flags (VALID, UNDERCUT, POINTED, BASE_OUTSIDE_PITCH, ROOT_CLOSED) of the gear with z teeth,
+    pressure angle alpha_deg and profile_shift = shift_ratio * m, from the generators' conditions.
+    UNDERCUT means below minimum_profile_shift(), the shift undercut_auto_suppress raises to.
+    """
+    return int(_classify(_ScalarMath, kind == 'internal', float(z), math.radians(alpha_deg), float(shift_ratio)))
+def _bound(kind, z, alpha_deg, inside, direction, step):
+    """
+    Last valid shift ratio going from the valid inside in direction (-1 or 1): steps of step,
+    doubling, until one is invalid, then bisection to float precision; infinite past SHIFT_LIMIT.
+    """
+    while classify(kind, z, alpha_deg, inside + direction * step) & VALID:
+        inside += direction * step
+        step *= 2.0
+        if abs(inside) >= SHIFT_LIMIT:
+            return direction * float('inf')
+    outside = inside + direction * step
+    while True:
+        middle = (inside + outside) / 2.0
+        if middle == inside or middle == outside:
+            return inside
+        if classify(kind, z, alpha_deg, middle) & VALID:
+            inside = middle
+        else:
+            outside = middle
+def _bounds_numpy(internal, z, alpha_deg, inside, direction, step):
+    """_bound() of many rows at once (numpy arrays z, alpha_deg and valid inside shift ratios)."""
+    alpha = numpy.radians(alpha_deg)
+    inside = numpy.array(inside, dtype=float)
+    step = numpy.full(len(inside), float(step))
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        growing = numpy.ones(len(inside), dtype=bool)
+        while growing.any():
+            probe = inside + direction * step
+            growing &= (_classify(numpy, internal, z, alpha, probe) & VALID) != 0
+            growing &= numpy.abs(inside) < SHIFT_LIMIT
+            inside = numpy.where(growing, probe, inside)
+            step = numpy.where(growing, 2.0 * step, step)
+        unbounded = numpy.abs(inside) >= SHIFT_LIMIT
+        outside = inside + direction * step
+        for _ in range(80):
+            middle = (inside + outside) / 2.0
+            valid = (_classify(numpy, internal, z, alpha, middle) & VALID) != 0
+            inside = numpy.where(valid, middle, inside)
+            outside = numpy.where(valid, outside, middle)
+    return numpy.where(unbounded, direction * numpy.inf, inside)
+def shift_limits(kind, z, alpha_deg, start=0.0, step=1.0):
+    """
+    (lowest, highest) shift ratio that gives a valid gear (infinite beyond +-SHIFT_LIMIT), found
+    from start, any valid shift ratio; (nan, nan) when start is not valid.
+    """
+    if not classify(kind, z, alpha_deg, start) & VALID:
+        return float('nan'), float('nan')
+    return _bound(kind, z, alpha_deg, start, -1.0, step), _bound(kind, z, alpha_deg, start, 1.0, step)
+def _minimum_shift(low, high, undercut_free):
+    lowest = max(low, undercut_free)
+    return lowest if lowest <= high else float('nan')
+class DomainCheck(object):
+    """
+    Answer of check(): valid, undercut, pointed, flags, reason (None when valid), min_shift (mm,
+    smallest shift giving a valid gear free of undercut, None when there is none) and the
+    valid shift range (low_shift, high_shift in mm, infinite when unbounded).
+    """
+    __slots__ = ('flags', 'min_shift', 'low_shift', 'high_shift', 'reason')
+    def __init__(self, flags, min_shift, low_shift, high_shift, reason):
+        self.flags = flags
+        self.min_shift = min_shift
+        self.low_shift = low_shift
+        self.high_shift = high_shift
+        self.reason = reason
+    @property
+    def valid(self):
+        return bool(self.flags & VALID)
+    @property
+    def undercut(self):
+        return bool(self.flags & UNDERCUT)
+    @property
+    def pointed(self):
+        return bool(self.flags & POINTED)
+    def to_dict(self):
+        return {'valid': self.valid, 'undercut': self.undercut, 'pointed': self.pointed, 'flags': self.flags,
+                'min_shift': self.min_shift, 'low_shift': self.low_shift, 'high_shift': self.high_shift,
+                'reason': self.reason}
+def _answer(kind, z, m, profile_shift, flags, limits):
+    low, high, minimum = limits
+    if kind == 'external' and m * (z / 2.0 - 1.25) + profile_shift <= DEDENDUM_FLOOR and flags & VALID:
+        flags = flags - VALID + DEDENDUM_CLAMPED
+    reason = None
+    if not flags & VALID:
+        reason = ' '.join(message for flag, message in _REASONS if flags & flag) or 'Invalid gear geometry.'
+    return DomainCheck(flags, None if math.isnan(minimum) else minimum * m, low * m, high * m, reason)
+def check_parameters(kind, z, m, alpha_deg, profile_shift=0.0, undercut_auto_suppress=False, domain=None, limits=True):
+    """
+    DomainCheck of a dialog or batch row without generating it: from the ValidityMap domain when
+    given (and covering the row), else from classify(). undercut_auto_suppress raises the shift
+    to minimum_profile_shift() first, as the generators do. limits=False skips the shift interval
+    search classify() needs without a map (min_shift is then None, low/high_shift NaN).
+    """
+    if undercut_auto_suppress:
+        profile_shift = max(profile_shift, minimum_profile_shift(z, m, alpha_deg, kind == 'internal'))
+    if domain is not None:
+        return domain.check(kind, z, m, alpha_deg, profile_shift)
+    ratio = profile_shift / float(m)
+    nan = float('nan')
+    return _answer(kind, z, m, profile_shift, classify(kind, z, alpha_deg, ratio),
+                   _limits(kind, z, alpha_deg, ratio) if limits else (nan, nan, nan))
+def _limits(kind, z, alpha_deg, start, step=1.0):
+    """(low, high, minimum) shift ratio of (kind, z, alpha_deg), searched from start, 0 or the undercut limit."""
+    undercut_free = minimum_profile_shift(z, 1.0, alpha_deg, kind == 'internal')
+    for candidate in (start, 0.0, undercut_free):
+        if classify(kind, z, alpha_deg, candidate) & VALID:
+            low, high = shift_limits(kind, z, alpha_deg, candidate, step)
+            return low, high, _minimum_shift(low, high, undercut_free)
+    return float('nan'), float('nan'), float('nan')
+class ValidityMap(object):
+    """
+    Bit planes of VALID / UNDERCUT / POINTED over z_min..z_max, alpha_count pressure angles from
+    alpha_min by alpha_step and shift_count shift ratios from shift_min by shift_step, for both
+    kinds, and the (low, high, minimum) shift ratio rows of every (kind, z, alpha). buffer: the
+    file image (bytes, bytearray or a read-only mmap).
+    """
+    def __init__(self, buffer, source=None):
+        magic, version, z_min, z_max, alpha_min, alpha_step, alpha_count, shift_min, shift_step, shift_count = \
+            _HEADER.unpack_from(buffer, 0)
+        if magic != _MAGIC:
+            raise ValueError("%s is not a validity map." % (source or 'buffer'))
+        if version != _VERSION:
+            raise ValueError("Unsupported validity map version %d." % version)
+        self.buffer = buffer
+        self.source = source
+        self.z_min = z_min
+        self.z_max = z_max
+        self.alpha_min = alpha_min
+        self.alpha_step = alpha_step
+        self.alpha_count = alpha_count
+        self.shift_min = shift_min
+        self.shift_step = shift_step
+        self.shift_count = shift_count
+        self.rows = (z_max - z_min + 1) * alpha_count
+        self.cells = self.rows * shift_count
+        self.plane_bytes = (self.cells + 7) // 8
+        self._rows_offset = _HEADER.size
+        self._planes_offset = self._rows_offset + len(KINDS) * self.rows * _ROW.size
+        self._file = None
+    @staticmethod
+    def layout_size(z_range, alpha_count, shift_count):
+        rows = (z_range[1] - z_range[0] + 1) * alpha_count
+        return _HEADER.size + len(KINDS) * rows * _ROW.size + len(KINDS) * len(PLANES) * ((rows * shift_count + 7) // 8)
+    @classmethod
+    def build(cls, z_range=(6, 200), alpha_range=(10.0, 30.0, 0.5), shift_range=(-4.0, 4.0, 0.02), use_numpy=None):
+        """
+        Classify every grid cell and row. z_range: (first, last) tooth count; alpha_range and
+        shift_range: (first, last, step) in degrees and shift ratio.
+        """
+        use_numpy = numpy is not None if use_numpy is None else use_numpy
+        z_min, z_max = int(z_range[0]), int(z_range[1])
+        alpha_count = int(round((alpha_range[1] - alpha_range[0]) / alpha_range[2])) + 1
+        shift_count = int(round((shift_range[1] - shift_range[0]) / shift_range[2])) + 1
+        buffer = bytearray(cls.layout_size((z_min, z_max), alpha_count, shift_count))
+        _HEADER.pack_into(buffer, 0, _MAGIC, _VERSION, z_min, z_max, float(alpha_range[0]), float(alpha_range[2]),
+                          alpha_count, float(shift_range[0]), float(shift_range[2]), shift_count)
+        domain = cls(buffer)
+        for kind_index, kind in enumerate(KINDS):
+            if use_numpy:
+                domain._fill_numpy(kind_index, kind)
+            else:
+                domain._fill_math(kind_index, kind)
+        return domain
+    def _alpha(self, index):
+        return self.alpha_min + index * self.alpha_step
+    def _shift(self, index):
+        return self.shift_min + index * self.shift_step
+    def _store_row(self, kind_index, row, low, high, minimum):
+        _ROW.pack_into(self.buffer, self._rows_offset + (kind_index * self.rows + row) * _ROW.size, low, high, minimum)
+    def _fill_math(self, kind_index, kind):
+        for z in range(self.z_min, self.z_max + 1):
+            for a in range(self.alpha_count):
+                row = (z - self.z_min) * self.alpha_count + a
+                cells = [classify(kind, z, self._alpha(a), self._shift(k)) for k in range(self.shift_count)]
+                for plane_index, plane in enumerate(PLANES):
+                    base = self._plane_offset(kind_index, plane_index)
+                    start = row * self.shift_count
+                    for k, flags in enumerate(cells):
+                        if flags & plane:
+                            self.buffer[base + ((start + k) >> 3)] |= 1 << ((start + k) & 7)
+                valid = [k for k in range(self.shift_count) if cells[k] & VALID]
+                if valid:
+                    low = _bound(kind, z, self._alpha(a), self._shift(valid[0]), -1.0, self.shift_step)
+                    high = _bound(kind, z, self._alpha(a), self._shift(valid[-1]), 1.0, self.shift_step)
+                    undercut_free = minimum_profile_shift(z, 1.0, self._alpha(a), kind == 'internal')
+                    self._store_row(kind_index, row, low, high, _minimum_shift(low, high, undercut_free))
+                else:
+                    self._store_row(kind_index, row, *_limits(kind, z, self._alpha(a), 0.0))
+    def _fill_numpy(self, kind_index, kind):
+        alphas = numpy.radians(self.alpha_min + numpy.arange(self.alpha_count) * self.alpha_step)[:, None]
+        shifts = (self.shift_min + numpy.arange(self.shift_count) * self.shift_step)[None, :]
+        flags = numpy.empty((self.z_max - self.z_min + 1, self.alpha_count, self.shift_count), dtype=numpy.int64)
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            for z in range(self.z_min, self.z_max + 1):
+                flags[z - self.z_min] = _classify(numpy, kind == 'internal', float(z), alphas, shifts)
+        for plane_index, plane in enumerate(PLANES):
+            bits = numpy.packbits((flags & plane).ravel() != 0, bitorder='little')
+            base = self._plane_offset(kind_index, plane_index)
+            self.buffer[base:base + len(bits)] = bits.tobytes()
+        # row bounds: from the first and last valid cell outwards, every row at once
+        flags = flags.reshape(self.rows, self.shift_count)
+        valid = (flags & VALID) != 0
+        found = valid.any(1)
+        z = numpy.repeat(numpy.arange(self.z_min, self.z_max + 1, dtype=float), self.alpha_count)
+        alpha_deg = numpy.tile(self.alpha_min + numpy.arange(self.alpha_count) * self.alpha_step, self.z_max - self.z_min + 1)
+        first = self.shift_min + valid.argmax(1) * self.shift_step
+        last = self.shift_min + (self.shift_count - 1 - valid[:, ::-1].argmax(1)) * self.shift_step
+        low = _bounds_numpy(kind == 'internal', z, alpha_deg, first, -1.0, self.shift_step)
+        high = _bounds_numpy(kind == 'internal', z, alpha_deg, last, 1.0, self.shift_step)
+        base_radius = z / 2.0 * numpy.cos(numpy.radians(alpha_deg))
+        if kind == 'internal':
+            undercut_free = base_radius + 1.0 - z / 2.0
+        else:
+            undercut_free = (1.0 + numpy.sqrt(1.0 + 4.0 * base_radius * base_radius)) / 2.0 - z / 2.0
+        lowest = numpy.maximum(low, undercut_free)
+        minimum = numpy.where(lowest <= high, lowest, numpy.nan)
+        for row in range(self.rows):
+            if found[row]:
+                self._store_row(kind_index, row, float(low[row]), float(high[row]), float(minimum[row]))
+            else:
+                self._store_row(kind_index, row, *_limits(kind, float(z[row]), float(alpha_deg[row]), 0.0))
+    def _plane_offset(self, kind_index, plane_index):
+        return self._planes_offset + (kind_index * len(PLANES) + plane_index) * self.plane_bytes
+    def _row(self, z, alpha_deg):
+        """Row index of (z, alpha_deg), or None when it is not on the grid."""
+        a = (alpha_deg - self.alpha_min) / self.alpha_step
+        index = int(round(a))
+        if not self.z_min <= z <= self.z_max or int(z) != z or abs(a - index) > 1e-6 or not 0 <= index < self.alpha_count:
+            return None
+        return (int(z) - self.z_min) * self.alpha_count + index
+    def flags(self, kind, z, alpha_deg, shift_ratio):
+        """VALID / UNDERCUT / POINTED of the nearest grid cell, or classify() off the grid."""
+        row = self._row(z, alpha_deg)
+        k = int(round((shift_ratio - self.shift_min) / self.shift_step))
+        if row is None or not 0 <= k < self.shift_count:
+            return classify(kind, z, alpha_deg, shift_ratio) & (VALID | UNDERCUT | POINTED)
+        cell = row * self.shift_count + k
+        kind_index = KINDS.index(kind)
+        result = 0
+        for plane_index, plane in enumerate(PLANES):
+            value = self.buffer[self._plane_offset(kind_index, plane_index) + (cell >> 3)]
+            if not isinstance(value, int):
+                value = ord(value)
+            if value >> (cell & 7) & 1:
+                result |= plane
+        return result
+    def limits(self, kind, z, alpha_deg):
+        """(low, high, minimum) shift ratio of the row: the valid interval and the smallest valid shift free of undercut."""
+        row = self._row(z, alpha_deg)
+        if row is None:
+            return _limits(kind, z, alpha_deg, 0.0)
+        return _ROW.unpack_from(self.buffer, self._rows_offset + (KINDS.index(kind) * self.rows + row) * _ROW.size)
+    def check(self, kind, z, m, alpha_deg, profile_shift=0.0):
+        """DomainCheck of one gear from the stored row (exact for any shift), classify() off the grid."""
+        ratio = profile_shift / float(m)
+        low, high, minimum = limits = self.limits(kind, z, alpha_deg)
+        if math.isnan(low) or not low <= ratio <= high:
+            flags = classify(kind, z, alpha_deg, ratio)
+        else:
+            flags = VALID
+            if ratio < minimum_profile_shift(z, 1.0, alpha_deg, kind == 'internal') - UNDERCUT_TOLERANCE:
+                flags |= UNDERCUT
+        return _answer(kind, z, m, profile_shift, flags, limits)
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(bytes(self.buffer) if not isinstance(self.buffer, bytes) else self.buffer)
+    @classmethod
+    def load(cls, path, use_mmap=True):
+        """Open a saved map, memory-mapped read-only when mmap is available (read into memory otherwise)."""
+        f = open(path, 'rb')
+        try:
+            if use_mmap and mmap is not None:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                buffer = f.read()
+        except (EnvironmentError, ValueError):
+            f.seek(0)
+            buffer = f.read()
+        domain = cls(buffer, path)
+        domain._file = f
+        return domain
+    def close(self):
+        if mmap is not None and isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gear_domain.pgvm')
+_default = []
+def default_map():
+    """The ValidityMap saved at DEFAULT_PATH (loaded once), or None when there is none."""
+    if not _default:
+        _default.append(ValidityMap.load(DEFAULT_PATH) if os.path.exists(DEFAULT_PATH) else None)
+    return _default[0]
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build or query the py-gear validity map.')
+    commands = parser.add_subparsers(dest='command')
+    build = commands.add_parser('build', help='classify the grid and save the map')
+    build.add_argument('path', nargs='?', default=DEFAULT_PATH, help='map file (default: %s)' % DEFAULT_PATH)
+    build.add_argument('--z', default='6:200', help='first:last tooth count (default: 6:200)')
+    build.add_argument('--alpha', default='10:30:0.5', help='first:last:step pressure angle (default: 10:30:0.5)')
+    build.add_argument('--shift', default='-4:4:0.02', help='first:last:step shift ratio (default: -4:4:0.02)')
+    query = commands.add_parser('query', help='check one gear')
+    query.add_argument('path', nargs='?', default=DEFAULT_PATH, help='map file (default: %s)' % DEFAULT_PATH)
+    query.add_argument('--internal', action='store_true')
+    query.add_argument('--z', type=int, required=True)
+    query.add_argument('--m', type=float, default=1.0)
+    query.add_argument('--alpha', type=float, default=20.0)
+    query.add_argument('--shift', type=float, default=0.0, help='profile shift in mm')
+    args = parser.parse_args(argv)
+    if args.command == 'build':
+        z = [int(v) for v in args.z.split(':')]
+        domain = ValidityMap.build((z[0], z[1]), tuple(float(v) for v in args.alpha.split(':')),
+                                   tuple(float(v) for v in args.shift.split(':')))
+        domain.save(args.path)
+        sys.stderr.write('%d x %d x %d cells per kind, %d bytes written to %s\n'
+                         % (domain.z_max - domain.z_min + 1, domain.alpha_count, domain.shift_count,
+                            len(domain.buffer), args.path))
+        return 0
+    if args.command == 'query':
+        domain = ValidityMap.load(args.path) if os.path.exists(args.path) else None
+        result = check_parameters('internal' if args.internal else 'external', args.z, args.m, args.alpha, args.shift,
+                                  domain=domain)
+        sys.stdout.write('%s\n' % result.to_dict())
+        return 0 if result.valid else 1
+    parser.print_help()
+    return 2
+if __name__ == '__main__':
+    sys.exit(main())
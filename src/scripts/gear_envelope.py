@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""
+Generating-cutter simulation for py-gear: the tooth space is cut by sweeping a cutter through
+the roll positions of the generating mesh, and the flanks are read off the envelope instead
+of the closed-form fillet of generate_external_tooth_profile.
+External gears are cut by a rack (hob) with rounded tips, internal gears by a pinion-type
+shaper cutter. Every cutter position is transformed into the gear frame in one array pass,
+each cutter segment is intersected exactly with a grid of radii, and the tooth space at a
+radius is the widest polar angle any position reaches there: O(positions x cutter points)
+plus the crossings. Real undercut and the fillet then follow from the cutter, also for
+internal gears, which the closed-form generator gives no fillet at all.
+The cutter is sized to the py-gear shift model: the rack's rolling line carries the offset
+that gives the involute the generator's tooth thickness, and its tip line (or the shaper's
+tip circle) cuts the generator's dedendum circle, so the result has the same parameters and
+segment keys as the closed-form profile and can be used in its place. Uses numpy when
+available and pure Python otherwise.
+"""
+import bisect
+import math
+from gear_geometry import (GearProfile, get_array_backend, involute_function, inverse_involute,
+                           generate_external_tooth_profile, generate_internal_tooth_profile)
+from gear_trace import instrumentation
+try:
+    import numpy
+except ImportError:
+    numpy = None
+DEFAULT_POSITIONS = 400
+DEFAULT_SAMPLES = 64
+DEFAULT_CUTTER_POINTS = 64
+RACK_TIP_RADIUS = 0.38
+_FLANK = 1
+_OTHER = 0
+def _sweep_numpy(xs, ys, labels, radii):
+    # xs, ys: (positions, cutter points) arrays of the swept cutter polyline in the gear frame
+    x0 = xs[:, :-1].ravel()
+    y0 = ys[:, :-1].ravel()
+    dx = xs[:, 1:].ravel() - x0
+    dy = ys[:, 1:].ravel() - y0
+    segment_labels = numpy.tile(numpy.asarray(labels), xs.shape[0])
+    a = dx * dx + dy * dy
+    a[a == 0.0] = 1e-300
+    b = x0 * dx + y0 * dy
+    c = x0 * x0 + y0 * y0
+    t_near = numpy.clip(-b / a, 0.0, 1.0)
+    r_near = numpy.sqrt((x0 + t_near * dx) ** 2 + (y0 + t_near * dy) ** 2)
+    r_far = numpy.sqrt(numpy.maximum(c, (x0 + dx) ** 2 + (y0 + dy) ** 2))
+    low = numpy.searchsorted(radii, r_near, 'left')
+    high = numpy.searchsorted(radii, r_far, 'right')
+    counts = numpy.maximum(high - low, 0)
+    total = int(counts.sum())
+    theta = numpy.full(len(radii), -numpy.inf)
+    label = numpy.zeros(len(radii), dtype=int)
+    if total == 0:
+        return theta, label
+    segment = numpy.repeat(numpy.arange(len(counts)), counts)
+    k = low[segment] + numpy.arange(total) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+    sa = a[segment]
+    sb = b[segment]
+    disc = numpy.sqrt(numpy.maximum(sb * sb - sa * (c[segment] - radii[k] ** 2), 0.0))
+    for sign in (-1.0, 1.0):
+        t = (-sb + sign * disc) / sa
+        valid = (t >= -1e-12) & (t <= 1.0 + 1e-12)
+        s = segment[valid]
+        angle = numpy.arctan2(y0[s] + t[valid] * dy[s], x0[s] + t[valid] * dx[s])
+        numpy.maximum.at(theta, k[valid], angle)
+        hit = angle == theta[k[valid]]
+        label[k[valid][hit]] = segment_labels[s[hit]]
+    return theta, label
+def _sweep_math(points, labels, radii):
+    # points: per position, the swept cutter polyline as [(x, y), ...]
+    theta = [-float('inf')] * len(radii)
+    label = [0] * len(radii)
+    for polyline in points:
+        for index in range(len(polyline) - 1):
+            x0, y0 = polyline[index]
+            x1, y1 = polyline[index + 1]
+            dx = x1 - x0
+            dy = y1 - y0
+            a = dx * dx + dy * dy or 1e-300
+            b = x0 * dx + y0 * dy
+            c = x0 * x0 + y0 * y0
+            t_near = min(1.0, max(0.0, -b / a))
+            r_near = math.hypot(x0 + t_near * dx, y0 + t_near * dy)
+            r_far = math.sqrt(max(c, x1 * x1 + y1 * y1))
+            for k in range(bisect.bisect_left(radii, r_near), bisect.bisect_right(radii, r_far)):
+                disc = math.sqrt(max(b * b - a * (c - radii[k] * radii[k]), 0.0))
+                for t in ((-b - disc) / a, (-b + disc) / a):
+                    if -1e-12 <= t <= 1.0 + 1e-12:
+                        angle = math.atan2(y0 + t * dy, x0 + t * dx)
+                        if angle > theta[k]:
+                            theta[k] = angle
+                            label[k] = labels[index]
+    return theta, label
+def sweep_envelope(cutter, labels, transform, positions, radii, use_numpy=None):
+    """
+    Half-width (radians) of the space cut by cutter at each of radii, and the label of the
+    cutter segment that bounds it there. cutter: [(x, y), ...] polyline in the cutter frame,
+    labels: one per segment; transform(position) -> (cos, sin, dx, dy) places the cutter in
+    the gear frame (rotation, then translation). radii must be increasing.
+    """
+    use_numpy = numpy is not None if use_numpy is None else use_numpy
+    frames = [transform(position) for position in positions]
+    if use_numpy:
+        frames = numpy.array(frames)
+        cx = numpy.array([p[0] for p in cutter])
+        cy = numpy.array([p[1] for p in cutter])
+        cos_a = frames[:, 0:1]
+        sin_a = frames[:, 1:2]
+        xs = cx * cos_a - cy * sin_a + frames[:, 2:3]
+        ys = cx * sin_a + cy * cos_a + frames[:, 3:4]
+        theta, label = _sweep_numpy(xs, ys, labels, numpy.asarray(radii, dtype=float))
+        return theta.tolist(), label.tolist()
+    swept = [[(x * c - y * s + dx, x * s + y * c + dy) for x, y in cutter] for c, s, dx, dy in frames]
+    return _sweep_math(swept, labels, list(radii))
+def _radii(inner, outer, samples, dense_at_inner):
+    # quadratic spacing, dense where the fillet runs into the root circle
+    result = []
+    for i in range(samples):
+        s = float(i) / (samples - 1)
+        if dense_at_inner:
+            result.append(inner + (outer - inner) * s * s)
+        else:
+            result.append(outer - (outer - inner) * (1.0 - s) * (1.0 - s))
+    return result
+def _linspace(start, stop, n):
+    return [start + (stop - start) * i / (n - 1.0) for i in range(n)]
+def _polar(radius, angle):
+    return (radius * math.cos(angle), radius * math.sin(angle))
+def _arc(radius, start, stop, n):
+    return [_polar(radius, angle) for angle in _linspace(start, stop, max(2, n))]
+def _to_backend(bk, points):
+    if bk.name == 'numpy':
+        return numpy.asarray(points, dtype=float).reshape(-1, 2)
+    return points
+def rack_cutter(m, alpha_deg, rolling_offset, tip_depth, top_height, tip_radius=None, cutter_points=DEFAULT_CUTTER_POINTS):
+    """
+    One tooth of a generating rack as (polyline, segment labels), in rack coordinates: u along
+    the rolling line, v away from the gear, tooth centered on u = 0 and pointing to -v.
+    rolling_offset: distance of the rack reference line beyond the rolling line (the shift);
+    tip_depth: depth of the tip line below the rolling line; top_height: height of the rack
+    root line above it; tip_radius: tip fillet radius (default 0.38 m, limited to the land).
+    """
+    alpha = math.radians(alpha_deg)
+    tan_a = math.tan(alpha)
+    half_rolling = math.pi * m / 4.0 - rolling_offset * tan_a
+    v_tip = -tip_depth
+    half_land = half_rolling + v_tip * tan_a
+    if half_land <= 0:
+        raise ValueError("The generating rack comes to a point above its tip line (module %g, depth %g)." % (m, tip_depth))
+    rho_max = half_land * math.cos(alpha) / (1.0 - math.sin(alpha))
+    rho = min(RACK_TIP_RADIUS * m if tip_radius is None else tip_radius, rho_max)
+    v_center = v_tip + rho
+    u_center = half_rolling + (v_center * math.sin(alpha) - rho) / math.cos(alpha)
+    half = [(0.0, v_tip), (u_center, v_tip)]
+    labels = [_OTHER]
+    steps = max(2, cutter_points)
+    for i in range(1, steps + 1):
+        angle = -math.pi / 2 + (math.pi / 2 - alpha) * i / float(steps)
+        half.append((u_center + rho * math.cos(angle), v_center + rho * math.sin(angle)))
+        labels.append(_OTHER)
+    half.append((half_rolling + top_height * tan_a, top_height))
+    labels.append(_FLANK)
+    half.append((math.pi * m / 2.0, top_height))
+    labels.append(_OTHER)
+    polyline = [(-u, v) for u, v in reversed(half)] + half[1:]
+    return polyline, labels[::-1] + labels, rho
+def _envelope_flank(theta, label, radii):
+    points = [(r, t) for r, t in zip(radii, theta) if t != -float('inf')]
+    labels = [l for l, t in zip(label, theta) if t != -float('inf')]
+    if len(points) < 2:
+        raise ValueError("The cutter sweep did not reach the flank; use more positions.")
+    return points, labels
+def generate_external_envelope_profile(z, m, alpha_deg, profile_shift=0.0, undercut_auto_suppress=False,
+                                       num_points=[10, 10, 5, 5], backend=None, positions=DEFAULT_POSITIONS,
+                                       samples=DEFAULT_SAMPLES, tip_radius=None, cutter_points=DEFAULT_CUTTER_POINTS):
+    """
+    External tooth profile cut by a rack, with the segment keys and parameters of
+    generate_external_tooth_profile. positions: roll positions swept; samples: envelope
+    radii from the dedendum to the addendum circle (dense near the root); tip_radius: rack
+    tip fillet (default 0.38 m). The flank below the last point the rack's straight flank
+    generates is trochoid_1 / trochoid_2, the rest involute_1 / involute_2; parameters gain
+    'generation', 'form_radius', 'cutter_tip_radius' and 'positions'.
+    """
+    bk = get_array_backend(backend)
+    reference = generate_external_tooth_profile(z, m, alpha_deg, profile_shift, undercut_auto_suppress,
+                                                num_points, 'math')
+    p = dict(reference.parameters)
+    r = m * z / 2.0
+    alpha = math.radians(alpha_deg)
+    shifted_alpha = math.acos(p['base_radius'] / p['pitch_radius'])
+    rolling_offset = r * (involute_function(shifted_alpha) - involute_function(alpha)) / math.tan(alpha)
+    tip_depth = r - p['dedendum_radius']
+    top_height = p['addendum_radius'] - r + 0.25 * m
+    with instrumentation.span('envelope.external'):
+        cutter, labels, rho = rack_cutter(m, alpha_deg, rolling_offset, tip_depth, top_height, tip_radius, cutter_points)
+        reach = (p['addendum_radius'] - p['dedendum_radius']) / math.tan(alpha) + math.pi * m
+        def transform(phi):
+            # rack point (u, v) sits at (r + v, u + r phi) before the gear frame turns back by phi
+            c = math.cos(-phi)
+            s = math.sin(-phi)
+            return (c, s, r * c - r * phi * s, r * s + r * phi * c)
+        cutter_xy = [(v, u) for u, v in cutter]
+        radii = _radii(p['dedendum_radius'] * (1.0 + 1e-12), p['addendum_radius'], samples, True)
+        theta, label = sweep_envelope(cutter_xy, labels, transform, _linspace(-reach / r, reach / r, positions), radii)
+    flank, flank_labels = _envelope_flank(theta, label, radii)
+    split = len(flank) - 1
+    while split > 0 and flank_labels[split - 1] == _FLANK:
+        split -= 1
+    tooth_center = -math.pi / (2 * z) - involute_function(shifted_alpha)
+    space_center = tooth_center + math.pi / z
+    side_1 = [_polar(radius, space_center - angle) for radius, angle in flank]
+    side_2 = [_polar(radius, 2 * tooth_center - space_center + angle) for radius, angle in flank]
+    trochoid_1 = side_1[:split + 1][::-1] if split > 0 else []
+    trochoid_2 = side_2[:split + 1][::-1] if split > 0 else []
+    involute_1 = side_1[split:]
+    involute_2 = side_2[split:]
+    tip_1 = space_center - flank[-1][1]
+    tip_2 = 2 * tooth_center - tip_1
+    root_1 = space_center - flank[0][1]
+    root_2 = 2 * tooth_center - root_1
+    p['generation'] = 'rack'
+    p['form_radius'] = flank[split][0]
+    p['cutter_tip_radius'] = rho
+    p['positions'] = positions
+    segments = [
+        ('trochoid_1', trochoid_1),
+        ('involute_1', involute_1),
+        ('upper_arc', _arc(p['addendum_radius'], tip_1, tip_2, reference.segment_length('upper_arc'))),
+        ('involute_2', involute_2),
+        ('trochoid_2', trochoid_2),
+        ('lower_arc', _arc(p['dedendum_radius'], root_2, root_1 - 2 * math.pi / z, reference.segment_length('lower_arc'))),
+    ]
+    return GearProfile.from_segments('external', [(name, _to_backend(bk, points)) for name, points in segments], p, bk)
+def shaper_cutter(z0, m, alpha_deg, tip_radius, cutter_points=DEFAULT_CUTTER_POINTS):
+    """
+    One tooth of an unshifted pinion-type shaper cutter with z0 teeth, its tip circle at tip_radius,
+    as a polyline centered on the +x axis: radial root flank, involute flank, tip arc and back.
+    """
+    alpha = math.radians(alpha_deg)
+    r0 = m * z0 / 2.0
+    rb0 = r0 * math.cos(alpha)
+    root = max(r0 - 1.25 * m, 0.01)
+    def half_angle(radius):
+        return math.pi / (2.0 * z0) + involute_function(alpha) - involute_function(math.acos(min(1.0, rb0 / radius)))
+    if half_angle(tip_radius) <= 0:
+        raise ValueError("A %d tooth shaper cutter comes to a point below its tip circle %g." % (z0, tip_radius))
+    start = max(rb0, root)
+    flank = [(radius, half_angle(radius)) for radius in _linspace(start, tip_radius, max(2, cutter_points))]
+    if root < start:
+        flank.insert(0, (root, half_angle(start)))
+    upper = [_polar(radius, angle) for radius, angle in flank]
+    tip = _arc(tip_radius, flank[-1][1], -flank[-1][1], 5)[1:-1]
+    lower = [_polar(radius, -angle) for radius, angle in reversed(flank)]
+    polyline = upper + tip + lower
+    return polyline, [_FLANK] * (len(polyline) - 1)
+def generate_internal_envelope_profile(z, m, alpha_deg, thickness, profile_shift=0.0, undercut_auto_suppress=False,
+                                       num_points=[10, 5, 5, 10], backend=None, cutter_teeth=None,
+                                       positions=DEFAULT_POSITIONS, samples=DEFAULT_SAMPLES,
+                                       cutter_points=DEFAULT_CUTTER_POINTS):
+    """
+    Internal tooth profile cut by a pinion-type shaper with cutter_teeth teeth (default about
+    half of z, 10..30), with the segment keys and parameters of generate_internal_tooth_profile;
+    involute_1 / involute_2 carry the whole cut flank including its root fillet. The shaper
+    meshes at the center distance that gives the ring its shifted tooth thickness, and its tip
+    circle cuts the ring's dedendum circle. parameters gain 'generation', 'cutter_teeth' and
+    'positions'.
+    """
+    bk = get_array_backend(backend)
+    reference = generate_internal_tooth_profile(z, m, alpha_deg, thickness, profile_shift, undercut_auto_suppress,
+                                                num_points, 'math')
+    p = dict(reference.parameters)
+    z0 = cutter_teeth or max(10, min(30, z // 2))
+    if z - z0 < 4:
+        raise ValueError("The shaper cutter needs at least 4 teeth fewer than the ring, got %d and %d." % (z0, z))
+    alpha = math.radians(alpha_deg)
+    rb0 = m * z0 * math.cos(alpha) / 2.0
+    shifted_alpha = math.acos(p['base_radius'] / p['pitch_radius'])
+    inv_operating = (z * involute_function(shifted_alpha) - z0 * involute_function(alpha)) / (z - z0)
+    if inv_operating < 0:
+        raise ValueError("Profile shift %g leaves no mesh for a %d tooth shaper cutter." % (p['profile_shift'], z0))
+    center_distance = (p['base_radius'] - rb0) / math.cos(inverse_involute(inv_operating))
+    tip_radius = p['dedendum_radius'] - center_distance
+    with instrumentation.span('envelope.internal'):
+        cutter, labels = shaper_cutter(z0, m, alpha_deg, tip_radius, cutter_points)
+        ratio = float(z) / z0
+        inner = p['addendum_radius']
+        # roll range: while the cutter tooth is inside the ring's inner circle, plus its width
+        cos_limit = (inner * inner - center_distance ** 2 - tip_radius ** 2) / (2.0 * center_distance * tip_radius)
+        reach = (math.acos(max(-1.0, min(1.0, cos_limit))) + 2.0 * math.pi / z0) / ratio
+        def transform(phi):
+            # cutter turned by ratio * phi about (center_distance, 0), then the ring frame turned back by phi
+            turn = (ratio - 1.0) * phi
+            c = math.cos(-phi)
+            s = math.sin(-phi)
+            return (math.cos(turn), math.sin(turn), center_distance * c, center_distance * s)
+        radii = _radii(inner, p['dedendum_radius'] * (1.0 - 1e-12), samples, False)
+        theta, label = sweep_envelope(cutter, labels, transform, _linspace(-reach, reach, positions), radii)
+    flank, _ = _envelope_flank(theta, label, radii)
+    space_center = -math.pi / (2 * z) - involute_function(shifted_alpha)
+    involute_1 = [_polar(radius, space_center + angle) for radius, angle in flank]
+    involute_2 = [_polar(radius, space_center - angle) for radius, angle in flank]
+    tip_1 = space_center + flank[0][1]
+    tip_2 = space_center - flank[0][1]
+    root_1 = space_center + flank[-1][1]
+    root_2 = space_center - flank[-1][1]
+    half_lower = reference.segment_length('lower_arc_1')
+    p['generation'] = 'shaper'
+    p['cutter_teeth'] = z0
+    p['positions'] = positions
+    segments = [
+        ('involute_1', involute_1),
+        ('upper_arc', _arc(p['dedendum_radius'], root_1, root_2, reference.segment_length('upper_arc'))),
+        ('involute_2', involute_2),
+        ('lower_arc_1', _arc(inner, tip_2, space_center - math.pi / z, half_lower)),
+        ('lower_arc_2', _arc(inner, tip_1, space_center + math.pi / z, half_lower)),
+        ('external_arc', reference.segment('external_arc')),
+    ]
+    return GearProfile.from_segments('internal', [(name, _to_backend(bk, points)) for name, points in segments], p, bk)
@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+Least-squares B-spline fitting of py-gear flanks.
+A sampled involute or trochoid segment is fitted with the clamped cubic B-spline of fewest
+control points whose deviation from every sample stays within a tolerance. The first and last
+control points are pinned to the segment ends, so fitted flanks still meet their neighbours
+exactly. Samples are parameterized by index (the generators sample their curve parameter
+evenly) or by chord length (tolerance-sampled profiles), and the knots are averaged from the
+parameters. The basis matrix and the endpoint-constrained least-squares map of an index fit
+depend only on the point count and the control point count, so basis_cache keeps them and
+every fit after the first is two matrix products.
+AlibreScript's AddBspline interpolates the points it is given, so fitted_profile() replaces
+each flank by the fitted curve sampled at its Greville abscissae: one point per control point.
+Uses numpy when available and pure Python otherwise.
+"""
+import math
+from collections import OrderedDict
+from gear_geometry import GearProfile, get_array_backend
+from gear_trace import instrumentation
+try:
+    import numpy
+except ImportError:
+    numpy = None
+FIT_SEGMENT_PREFIXES = ('involute', 'trochoid')
+def approximation_knots(parameters, count, degree=3):
+    """
+    Clamped knot vector on [0, 1] for count control points, its interior knots averaged from
+    the sample parameters (Piegl and Tiller, The NURBS Book, eq. 9.69) so that every knot span
+    holds samples and the least-squares system stays well posed.
+    """
+    if count <= degree:
+        raise ValueError("A degree %d B-spline needs more than %d control points, got %d." % (degree, degree, count))
+    step = float(len(parameters)) / (count - degree)
+    interior = []
+    for j in range(1, count - degree):
+        i = int(j * step)
+        a = j * step - i
+        interior.append((1.0 - a) * parameters[i - 1] + a * parameters[i])
+    return [0.0] * (degree + 1) + interior + [1.0] * (degree + 1)
+def _span(knots, degree, count, u):
+    if u >= knots[count]:
+        return count - 1
+    low = degree
+    high = count
+    while high - low > 1:
+        middle = (low + high) // 2
+        if u < knots[middle]:
+            high = middle
+        else:
+            low = middle
+    return low
+def basis_row(knots, degree, count, u):
+    """Values of the count basis functions at u, as a dense list."""
+    span = _span(knots, degree, count, u)
+    values = [1.0] + [0.0] * degree
+    left = [0.0] * (degree + 1)
+    right = [0.0] * (degree + 1)
+    for j in range(1, degree + 1):
+        left[j] = u - knots[span + 1 - j]
+        right[j] = knots[span + j] - u
+        saved = 0.0
+        for r in range(j):
+            term = values[r] / (right[r + 1] + left[j - r])
+            values[r] = saved + right[r + 1] * term
+            saved = left[j - r] * term
+        values[j] = saved
+    row = [0.0] * count
+    row[span - degree:span + 1] = values
+    return row
+def greville_abscissae(knots, degree, count):
+    return [sum(knots[i + 1:i + degree + 1]) / degree for i in range(count)]
+def index_parameters(n):
+    return [float(i) / (n - 1) for i in range(n)]
+def chord_parameters(points):
+    lengths = [0.0]
+    for (x0, y0), (x1, y1) in zip(points[:-1], points[1:]):
+        lengths.append(lengths[-1] + math.hypot(x1 - x0, y1 - y0))
+    total = lengths[-1]
+    if total == 0.0:
+        return index_parameters(len(points))
+    return [length / total for length in lengths]
+def _cholesky_solve(a, b):
+    """Solve a x = b for symmetric positive definite a (lists); b is a list of rows (several right-hand sides)."""
+    n = len(a)
+    lower = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        for j in range(i + 1):
+            s = a[i][j] - sum(lower[i][k] * lower[j][k] for k in range(j))
+            lower[i][j] = math.sqrt(s) if i == j else s / lower[j][j]
+    width = len(b[0])
+    y = [[0.0] * width for _ in range(n)]
+    for i in range(n):
+        for c in range(width):
+            y[i][c] = (b[i][c] - sum(lower[i][k] * y[k][c] for k in range(i))) / lower[i][i]
+    x = [[0.0] * width for _ in range(n)]
+    for i in range(n - 1, -1, -1):
+        for c in range(width):
+            x[i][c] = (y[i][c] - sum(lower[k][i] * x[k][c] for k in range(i + 1, n))) / lower[i][i]
+    return x
+def fit_matrices(parameters, count, degree=3, use_numpy=None):
+    """
+    (knots, basis, fit) for samples at parameters: basis (n x count) evaluates control points at the
+    samples, fit (count x n) maps samples to the least-squares control points with both ends
+    pinned. numpy arrays when use_numpy (default: when numpy is available), else row lists.
+    """
+    use_numpy = numpy is not None if use_numpy is None else use_numpy
+    n = len(parameters)
+    if count > n:
+        raise ValueError("Cannot fit %d control points to %d samples." % (count, n))
+    knots = approximation_knots(parameters, count, degree)
+    basis = [basis_row(knots, degree, count, u) for u in parameters]
+    if use_numpy:
+        basis = numpy.array(basis)
+        inner = basis[1:-1, 1:-1]
+        solved = numpy.linalg.solve(inner.T.dot(inner), inner.T)
+        fit = numpy.zeros((count, n))
+        fit[0, 0] = fit[-1, -1] = 1.0
+        fit[1:-1, 1:-1] = solved
+        fit[1:-1, 0] = -solved.dot(basis[1:-1, 0])
+        fit[1:-1, -1] = -solved.dot(basis[1:-1, -1])
+        return knots, basis, fit
+    inner = [row[1:-1] for row in basis[1:-1]]
+    normal = [[sum(r[i] * r[j] for r in inner) for j in range(count - 2)] for i in range(count - 2)]
+    solved = _cholesky_solve(normal, [[r[i] for r in inner] for i in range(count - 2)])
+    fit = [[0.0] * n for _ in range(count)]
+    fit[0][0] = fit[-1][-1] = 1.0
+    for i in range(count - 2):
+        row = fit[i + 1]
+        row[1:-1] = solved[i]
+        row[0] = -sum(s * basis[k + 1][0] for k, s in enumerate(solved[i]))
+        row[-1] = -sum(s * basis[k + 1][-1] for k, s in enumerate(solved[i]))
+    return knots, basis, fit
+class BasisCache(object):
+    """
+    LRU cache of index-parameterized fit_matrices, keyed on (sample count, control point count,
+    degree, numpy or not); hits and misses are counted like ToothProfileCache's.
+    """
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    def matrices(self, n, count, degree=3, use_numpy=None):
+        use_numpy = numpy is not None if use_numpy is None else use_numpy
+        key = (n, count, degree, use_numpy)
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            self.misses += 1
+            entry = fit_matrices(index_parameters(n), count, degree, use_numpy)
+        else:
+            self.hits += 1
+        self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+    def clear(self):
+        self._entries.clear()
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries), 'max_entries': self.max_entries}
+basis_cache = BasisCache()
+class BSplineFit(object):
+    """
+    Clamped B-spline fitted to a segment: degree, knots, control_points [(x, y), ...],
+    max_error (largest sample deviation) and point_count (samples fitted).
+    """
+    __slots__ = ('degree', 'knots', 'control_points', 'max_error', 'point_count')
+    def __init__(self, degree, knots, control_points, max_error, point_count):
+        self.degree = degree
+        self.knots = knots
+        self.control_points = control_points
+        self.max_error = max_error
+        self.point_count = point_count
+    def evaluate(self, u):
+        row = basis_row(self.knots, self.degree, len(self.control_points), u)
+        return (sum(b * p[0] for b, p in zip(row, self.control_points)),
+                sum(b * p[1] for b, p in zip(row, self.control_points)))
+    def points(self, parameters=None):
+        """Curve points at parameters (default: the Greville abscissae, one per control point)."""
+        if parameters is None:
+            parameters = greville_abscissae(self.knots, self.degree, len(self.control_points))
+        return [self.evaluate(u) for u in parameters]
+    def to_dict(self):
+        return {'degree': self.degree, 'knots': list(self.knots), 'control_points': [list(p) for p in self.control_points],
+                'max_error': self.max_error, 'point_count': self.point_count}
+def _solve(points, parameters, count, degree, cache, use_numpy):
+    if parameters is None:
+        knots, basis, fit = cache.matrices(len(points), count, degree, use_numpy)
+    else:
+        knots, basis, fit = fit_matrices(parameters, count, degree, use_numpy)
+    if use_numpy:
+        control = fit.dot(points)
+        error = float(numpy.sqrt(((basis.dot(control) - points) ** 2).sum(axis=1)).max())
+        return knots, [tuple(p) for p in control.tolist()], error
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    control = [(sum(f * x for f, x in zip(row, xs)), sum(f * y for f, y in zip(row, ys))) for row in fit]
+    error = 0.0
+    for row, (x, y) in zip(basis, points):
+        fx = sum(b * c[0] for b, c in zip(row, control))
+        fy = sum(b * c[1] for b, c in zip(row, control))
+        error = max(error, math.hypot(fx - x, fy - y))
+    return knots, control, error
+def fit_bspline(points, tolerance, degree=3, parameterization='index', max_control_points=None, cache=basis_cache,
+                use_numpy=None):
+    """
+    Fewest-control-point clamped B-spline of degree within tolerance of every sample of points
+    ((x, y) sequence or (N, 2) array); returns a BSplineFit. parameterization: 'index' (cached
+    basis, for evenly sampled curve parameters) or 'chord'. The control point count is searched
+    by doubling, then bisection; when even max_control_points (default: the sample count, i.e.
+    interpolation) misses tolerance, that fit is returned with its larger max_error.
+    """
+    if tolerance <= 0:
+        raise ValueError("Fit tolerance must be positive, got %g." % tolerance)
+    use_numpy = numpy is not None if use_numpy is None else use_numpy
+    pairs = [(float(x), float(y)) for x, y in points]
+    n = len(pairs)
+    if n <= degree:
+        raise ValueError("A degree %d fit needs more than %d points, got %d." % (degree, degree, n))
+    if parameterization == 'index':
+        parameters = None
+    elif parameterization == 'chord':
+        parameters = chord_parameters(pairs)
+    else:
+        raise ValueError("Unknown parameterization %r." % parameterization)
+    data = numpy.array(pairs) if use_numpy else pairs
+    highest = min(n, max_control_points or n)
+    with instrumentation.span('fit.bspline'):
+        results = {}
+        def attempt(count):
+            if count not in results:
+                results[count] = _solve(data, parameters, count, degree, cache, use_numpy)
+            return results[count][2] <= tolerance
+        low = degree
+        count = degree + 1
+        while count < highest and not attempt(count):
+            low = count
+            count = min(highest, 2 * count)
+        high = count
+        if count == highest and not attempt(count):
+            low = high - 1
+        while high - low > 1:
+            middle = (low + high) // 2
+            if attempt(middle):
+                high = middle
+            else:
+                low = middle
+        knots, control, error = results[high]
+    return BSplineFit(degree, knots, control, error, n)
+def fit_profile(profile, tolerance, degree=3, parameterization=None, cache=basis_cache):
+    """
+    OrderedDict {segment name: BSplineFit} of the involute and trochoid segments of a GearProfile
+    with more than degree points. parameterization defaults to 'chord' for tolerance-sampled
+    profiles and 'index' otherwise.
+    """
+    if parameterization is None:
+        parameterization = 'chord' if 'tolerance' in profile.parameters else 'index'
+    fits = OrderedDict()
+    for name in profile.names:
+        if name.startswith(FIT_SEGMENT_PREFIXES) and profile.segment_length(name) > degree:
+            flat = profile.flat(name)
+            fits[name] = fit_bspline(list(zip(flat[0::2], flat[1::2])), tolerance, degree, parameterization, cache=cache)
+    return fits
+def fitted_profile(profile, tolerance, degree=3, parameterization=None, cache=basis_cache):
+    """
+    Copy of profile whose involute and trochoid segments are their fits sampled at the Greville
+    abscissae; 'parameters' gains 'fit_tolerance', 'fit_max_error' and 'fit_control_points'.
+    """
+    fits = fit_profile(profile, tolerance, degree, parameterization, cache)
+    bk = get_array_backend(profile.backend)
+    segments = []
+    for name in profile.names:
+        if name in fits:
+            points = fits[name].points()
+            segments.append((name, bk.asarray(points) if bk.name == 'numpy' else points))
+        else:
+            segments.append((name, profile.segment(name)))
+    parameters = dict(profile.parameters)
+    parameters['fit_tolerance'] = tolerance
+    parameters['fit_max_error'] = max([fit.max_error for fit in fits.values()] or [0.0])
+    parameters['fit_control_points'] = sum(len(fit.control_points) for fit in fits.values())
+    return GearProfile.from_segments(profile.kind, segments, parameters, bk)
@@ -0,0 +1,905 @@
+# -*- coding: utf-8 -*-
+"""
+Pure-Python gear geometry for py-gear: tooth profile generators, array backends,
+profile caches and full-outline patterning. Imports nothing from .NET/AlibreScript,
+so it runs under IronPython inside Alibre as well as under CPython for headless tools.
+"""
+import math
+import struct
+from array import array
+from collections import OrderedDict
+from gear_trace import instrumentation
+try:
+    import numpy
+except ImportError:
+    numpy = None
+try:
+    string_types = basestring
+except NameError:
+    string_types = str
+def involute_function(angle):
+    """Calculate involute function: tan(angle) - angle"""
+    return math.tan(angle) - angle
+INVERSE_INVOLUTE_STEPS = 4
+class _ScalarOps(object):
+    """The math functions the array solvers use, under their numpy names, for one float at a time."""
+    tan = staticmethod(math.tan)
+    cos = staticmethod(math.cos)
+    sqrt = staticmethod(math.sqrt)
+    arccos = staticmethod(math.acos)
+    minimum = staticmethod(min)
+    maximum = staticmethod(max)
+    @staticmethod
+    def cbrt(value):
+        return value ** (1.0 / 3.0)
+    @staticmethod
+    def where(condition, if_true, if_false):
+        return if_true if condition else if_false
+def _involute_of(xp, angle):
+    # below 0.01 rad tan(a) - a cancels; its series is exact to double precision there
+    a2 = angle * angle
+    series = angle * a2 * (1.0 / 3 + a2 * (2.0 / 15 + a2 * (17.0 / 315 + a2 * (62.0 / 2835 + a2 * 1382.0 / 155925))))
+    return xp.where(angle < 0.01, series, xp.tan(angle) - angle)
+def _inverse_involute(xp, values, steps):
+    """
+    inv^-1 of values (float, or numpy array with xp=numpy): the series inversion around 0, capped by
+    the pi/2 - 1/(v + pi/2) asymptote, then a fixed number of Newton steps (4 reach 1e-13 rad).
+    """
+    c = xp.cbrt(3.0 * values)
+    angle = xp.minimum(c - 2.0 * c ** 3 / 15.0 + 0.0248 * c ** 5, math.pi / 2 - 1.0 / (values + math.pi / 2))
+    for _ in range(steps):
+        tan_angle = xp.tan(angle)
+        angle = angle - (_involute_of(xp, angle) - values) / xp.maximum(tan_angle * tan_angle, 1e-300)
+    return angle
+def inverse_involute(value, steps=INVERSE_INVOLUTE_STEPS):
+    """Pressure angle (radians, 0 <= angle < pi/2) whose involute function is value."""
+    if value < 0:
+        raise ValueError("The involute function is not negative, got %g." % value)
+    return _inverse_involute(_ScalarOps, float(value), steps)
+def inverse_involute_array(values, backend=None, steps=INVERSE_INVOLUTE_STEPS):
+    """inverse_involute of every value in one vectorized pass (numpy array, or list with the math backend)."""
+    return get_array_backend(backend).inverse_involute(values, steps)
+def _check_segment_points(n):
+    if n < 2:
+        raise ValueError("Each curve segment needs at least 2 points, got %d." % n)
+class MathArrayBackend(object):
+    """Pure-math segment backend (IronPython fallback). Segments are lists of (x, y) tuples."""
+    name = 'math'
+    def linspace(self, start, sweep, n):
+        _check_segment_points(n)
+        return [float(i) / (n - 1) * sweep + start for i in range(n)]
+    def involute(self, base_radius, thetas):
+        return [(base_radius * (math.cos(theta) + theta * math.sin(theta)),
+                 base_radius * (math.sin(theta) - theta * math.cos(theta))) for theta in thetas]
+    def trochoid(self, base_radius, depth, thetas):
+        return [(base_radius * (math.cos(theta) + theta * math.sin(theta)) - depth * math.cos(theta),
+                 base_radius * (math.sin(theta) - theta * math.cos(theta)) - depth * math.sin(theta)) for theta in thetas]
+    def arc(self, radius, thetas):
+        return [(radius * math.cos(theta), radius * math.sin(theta)) for theta in thetas]
+    def rotate(self, points, angle):
+        cos_a = math.cos(angle)
+        sin_a = math.sin(angle)
+        return [(x * cos_a - y * sin_a, x * sin_a + y * cos_a) for x, y in points]
+    def mirror(self, points):
+        return [(x, -y) for x, y in points]
+    def reverse(self, points):
+        return points[::-1]
+    def empty(self):
+        return []
+    def scale(self, points, factor):
+        return [(x * factor, y * factor) for x, y in points]
+    def asarray(self, values):
+        return list(values)
+    def from_flat(self, flat):
+        return list(zip(flat[0::2], flat[1::2]))
+    def concat(self, segments):
+        points = []
+        for segment in segments:
+            points.extend(segment)
+        return points
+    def pattern(self, points, cos_table, sin_table):
+        return [(x * c - y * s, x * s + y * c) for c, s in zip(cos_table, sin_table) for x, y in points]
+    def take_loop(self, points, start, end):
+        n = len(points)
+        return [points[i % n] for i in range(start, end + 1)]
+    def to_tuples(self, points):
+        return list(points)
+    def pack(self, buffer, points):
+        buffer.extend([c for point in points for c in point])
+    def view(self, buffer, start, stop):
+        return [(buffer[i], buffer[i + 1]) for i in range(2 * start, 2 * stop, 2)]
+    def inverse_involute(self, values, steps):
+        result = []
+        for value in values:
+            if value < 0:
+                raise ValueError("The involute function is not negative, got %g." % value)
+            result.append(_inverse_involute(_ScalarOps, float(value), steps))
+        return result
+def _readonly_view(buffer):
+    """Read-only memoryview of an array('d'), or None where the runtime cannot make one."""
+    try:
+        return memoryview(buffer).toreadonly()
+    except (TypeError, AttributeError):
+        return None
+class NumpyArrayBackend(object):
+    """NumPy segment backend. Each segment is built in one batched pass and returned as an (N, 2) float array."""
+    name = 'numpy'
+    def linspace(self, start, sweep, n):
+        _check_segment_points(n)
+        return numpy.arange(n) / float(n - 1) * sweep + start
+    def involute(self, base_radius, thetas):
+        cos_t = numpy.cos(thetas)
+        sin_t = numpy.sin(thetas)
+        return numpy.column_stack((base_radius * (cos_t + thetas * sin_t),
+                                   base_radius * (sin_t - thetas * cos_t)))
+    def trochoid(self, base_radius, depth, thetas):
+        cos_t = numpy.cos(thetas)
+        sin_t = numpy.sin(thetas)
+        return numpy.column_stack((base_radius * (cos_t + thetas * sin_t) - depth * cos_t,
+                                   base_radius * (sin_t - thetas * cos_t) - depth * sin_t))
+    def arc(self, radius, thetas):
+        return numpy.column_stack((radius * numpy.cos(thetas), radius * numpy.sin(thetas)))
+    def rotate(self, points, angle):
+        cos_a = math.cos(angle)
+        sin_a = math.sin(angle)
+        return numpy.column_stack((points[:, 0] * cos_a - points[:, 1] * sin_a,
+                                   points[:, 0] * sin_a + points[:, 1] * cos_a))
+    def mirror(self, points):
+        return points * numpy.array([1.0, -1.0])
+    def reverse(self, points):
+        return points[::-1].copy()
+    def empty(self):
+        return numpy.empty((0, 2))
+    def scale(self, points, factor):
+        return points * factor
+    def asarray(self, values):
+        return numpy.asarray(values, dtype=float)
+    def from_flat(self, flat):
+        return numpy.array(flat, dtype=float).reshape(-1, 2)
+    def concat(self, segments):
+        return numpy.concatenate(segments)
+    def pattern(self, points, cos_table, sin_table):
+        c = numpy.asarray(cos_table)[:, None]
+        s = numpy.asarray(sin_table)[:, None]
+        x = points[:, 0][None, :]
+        y = points[:, 1][None, :]
+        return numpy.column_stack(((x * c - y * s).ravel(), (x * s + y * c).ravel()))
+    def take_loop(self, points, start, end):
+        return points.take(numpy.arange(start, end + 1), axis=0, mode='wrap')
+    def to_tuples(self, points):
+        return [(float(x), float(y)) for x, y in points]
+    def pack(self, buffer, points):
+        _extend_from_bytes(buffer, numpy.ascontiguousarray(points, dtype=float).tobytes())
+    def view(self, buffer, start, stop):
+        readonly = _readonly_view(buffer)
+        points = numpy.frombuffer(buffer if readonly is None else readonly, dtype=float)[2 * start:2 * stop].reshape(-1, 2)
+        points.flags.writeable = False
+        return points
+    def inverse_involute(self, values, steps):
+        values = numpy.asarray(values, dtype=float)
+        if values.size and values.min() < 0:
+            raise ValueError("The involute function is not negative, got %g." % values.min())
+        return _inverse_involute(numpy, values, steps)
+_array_backends = {'math': MathArrayBackend()}
+if numpy is not None:
+    _array_backends['numpy'] = NumpyArrayBackend()
+_default_array_backend = ['numpy' if numpy is not None else 'math']
+def _extend_from_bytes(buffer, data):
+    getattr(buffer, 'frombytes', getattr(buffer, 'fromstring', None))(data)
+def get_array_backend(name=None):
+    """Return the segment backend called name, or the default one (numpy if importable, else math)."""
+    if name is None:
+        name = _default_array_backend[0]
+    elif not isinstance(name, string_types):
+        return name
+    try:
+        return _array_backends[name]
+    except KeyError:
+        raise ValueError("Unknown array backend '%s', available: %s" % (name, ', '.join(sorted(_array_backends))))
+def set_array_backend(name):
+    """Select the default segment backend used by the tooth profile generators."""
+    get_array_backend(name)
+    _default_array_backend[0] = name
+def _involute_point(base_radius, theta, depth=0.0):
+    return (base_radius * (math.cos(theta) + theta * math.sin(theta)) - depth * math.cos(theta),
+            base_radius * (math.sin(theta) - theta * math.cos(theta)) - depth * math.sin(theta))
+def _chord_deviation(point, a, b):
+    dx = b[0] - a[0]
+    dy = b[1] - a[1]
+    length = math.hypot(dx, dy)
+    if length == 0.0:
+        return math.hypot(point[0] - a[0], point[1] - a[1])
+    return abs((point[0] - a[0]) * dy - (point[1] - a[1]) * dx) / length
+def adaptive_curve_parameters(curve, start, end, tolerance, max_depth=20):
+    """
+    Sample the parameter interval [start, end] of curve(t) -> (x, y) by recursive bisection
+    until the mid-point of every span lies within tolerance of its chord.
+    Returns (parameters, max_error): the fewest parameters found and the largest chord deviation left.
+    """
+    if tolerance <= 0:
+        raise ValueError("Chord tolerance must be positive, got %g." % tolerance)
+    parameters = [start]
+    def refine(t0, p0, t1, p1, depth):
+        tm = 0.5 * (t0 + t1)
+        pm = curve(tm)
+        error = _chord_deviation(pm, p0, p1)
+        if error > tolerance and depth < max_depth:
+            return max(refine(t0, p0, tm, pm, depth + 1), refine(tm, pm, t1, p1, depth + 1))
+        parameters.append(t1)
+        return error
+    max_error = refine(start, curve(start), end, curve(end), 0)
+    return parameters, max_error
+def arc_point_count(radius, sweep, tolerance):
+    """Fewest evenly spaced points whose chords stay within tolerance of an arc; returns (n, max_error)."""
+    if tolerance <= 0:
+        raise ValueError("Chord tolerance must be positive, got %g." % tolerance)
+    sweep = abs(sweep)
+    if tolerance < radius:
+        n = max(2, int(math.ceil(sweep / (2.0 * math.acos(1.0 - tolerance / radius)))) + 1)
+    else:
+        n = 2
+    return n, radius * (1.0 - math.cos(sweep / (2.0 * (n - 1))))
+def _curve_thetas(bk, curve, start, sweep, n, tolerance, errors):
+    if tolerance is None:
+        return bk.linspace(start, sweep, n)
+    thetas, error = adaptive_curve_parameters(curve, start, start + sweep, tolerance)
+    errors.append(error)
+    return bk.asarray(thetas)
+def _arc_thetas(bk, radius, start, sweep, n, tolerance, errors):
+    if tolerance is not None:
+        n, error = arc_point_count(radius, sweep, tolerance)
+        errors.append(error)
+    return bk.linspace(start, sweep, n)
+class GearProfile(object):
+    """
+    Tooth profile stored as one contiguous array('d') of interleaved x, y coordinates.
+    Segment i covers points offsets[i]..offsets[i + 1] - 1 of the buffer. The profile still
+    reads like the old result dict: profile['involute_1'] gives the segment in the form of
+    its array backend (list of (x, y) tuples for math, read-only (N, 2) view for numpy) and
+    profile['parameters'] the parameters dict. Use flat(), segment_view() or numpy_view()
+    to reach the coordinates without building per-point tuples.
+    """
+    __slots__ = ('kind', 'backend', 'names', 'offsets', 'buffer', 'parameters')
+    def __init__(self, kind, names, offsets, buffer, parameters, backend=None):
+        self.kind = kind
+        self.backend = get_array_backend(backend).name
+        self.names = tuple(names)
+        self.offsets = tuple(offsets)
+        self.buffer = buffer
+        self.parameters = parameters
+    @classmethod
+    def from_segments(cls, kind, segments, parameters, backend=None):
+        """Pack [(name, points), ...] (points in backend form) into a single buffer."""
+        bk = get_array_backend(backend)
+        buffer = array('d')
+        names = []
+        offsets = [0]
+        for name, points in segments:
+            bk.pack(buffer, points)
+            names.append(name)
+            offsets.append(len(buffer) // 2)
+        return cls(kind, names, offsets, buffer, parameters, bk)
+    def span(self, name):
+        """(start, stop) point indices of a segment in the buffer."""
+        try:
+            i = self.names.index(name)
+        except ValueError:
+            raise KeyError(name)
+        return self.offsets[i], self.offsets[i + 1]
+    def segment(self, name):
+        start, stop = self.span(name)
+        return get_array_backend(self.backend).view(self.buffer, start, stop)
+    def flat(self, name):
+        """Copy of a segment as a flat array('d') [x0, y0, x1, y1, ...]."""
+        start, stop = self.span(name)
+        return self.buffer[2 * start:2 * stop]
+    def segment_view(self, name):
+        """Zero-copy read-only memoryview of a segment's flat coordinates (a flat() copy where none can be made)."""
+        start, stop = self.span(name)
+        view = _readonly_view(self.buffer)
+        if view is None:
+            return self.buffer[2 * start:2 * stop]
+        return view[2 * start:2 * stop]
+    def numpy_view(self, name):
+        """Zero-copy read-only (N, 2) NumPy view of a segment."""
+        if numpy is None:
+            raise ImportError("numpy is not available")
+        start, stop = self.span(name)
+        return _array_backends['numpy'].view(self.buffer, start, stop)
+    def point(self, name, index):
+        """Single (x, y) of a segment, negative indices counting from its end."""
+        start, stop = self.span(name)
+        if index < 0:
+            index += stop - start
+        if not 0 <= index < stop - start:
+            raise IndexError("point index out of range")
+        i = 2 * (start + index)
+        return self.buffer[i], self.buffer[i + 1]
+    def segment_length(self, name):
+        start, stop = self.span(name)
+        return stop - start
+    @property
+    def point_count(self):
+        return self.offsets[-1]
+    def scaled(self, factor, parameters):
+        """New profile with every coordinate multiplied by factor, sharing nothing with this one."""
+        if numpy is not None:
+            buffer = array('d')
+            _extend_from_bytes(buffer, (numpy.frombuffer(self.buffer, dtype=float) * factor).tobytes())
+        else:
+            buffer = array('d', [c * factor for c in self.buffer])
+        return GearProfile(self.kind, self.names, self.offsets, buffer, parameters, self.backend)
+    def copy(self):
+        """Profile with its own copy of the buffer and of the 'parameters' dict."""
+        return GearProfile(self.kind, self.names, self.offsets, self.buffer[:], dict(self.parameters), self.backend)
+    def to_dict(self):
+        """The old generator result: a dict of segments plus 'parameters'."""
+        return dict(self.items())
+    def __getitem__(self, key):
+        if key == 'parameters':
+            return self.parameters
+        return self.segment(key)
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+    def __contains__(self, key):
+        return key == 'parameters' or key in self.names
+    def keys(self):
+        return list(self.names) + ['parameters']
+    def __iter__(self):
+        return iter(self.keys())
+    def __len__(self):
+        return len(self.names) + 1
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+    def values(self):
+        return [self[key] for key in self.keys()]
+# shift (in modules) below minimum_profile_shift() that still counts as free of undercut
+UNDERCUT_TOLERANCE = 1e-9
+def minimum_profile_shift(z, m, alpha_deg, internal=False):
+    """
+    Smallest profile shift (mm, may be negative) that keeps the flanks clear of undercut, as
+    used by undercut_auto_suppress. External: a py-gear tooth of shifted pitch radius r acts at
+    cos a' = rb / r, so a generating rack's tip line (m below r) stays above the interference
+    point (r sin^2 a' below r) when r^2 - m r - rb^2 >= 0. Internal: the tip circle (m inside r)
+    must not drop below the base circle, where the involute ends.
+    """
+    pitch_radius = m * z / 2.0
+    base_radius = pitch_radius * math.cos(math.radians(alpha_deg))
+    if internal:
+        return base_radius + m - pitch_radius
+    return (m + math.sqrt(m * m + 4.0 * base_radius * base_radius)) / 2.0 - pitch_radius
+def generate_external_tooth_profile(z, m, alpha_deg, profile_shift=0.0, undercut_auto_suppress=False, num_points=[10,10,5,5], backend=None, tolerance=None):
+    """
+    Generate the profile of one tooth consisting of 6 parts.
+    Parameters:
+    -----------
+    z : int
+        Number of teeth
+    m : float
+        Module (mm)
+    alpha_deg : float
+        Pressure angle in degrees
+    profile_shift : float
+        Profile shifting value (default: 0.0)
+    undercut_auto_suppress : bool
+        Raise profile_shift to at least minimum_profile_shift() (default: False)
+    num_points : list of int
+        Number of points per curve segment, order is following : [involute,trochoid,addendum,deddundum] (default: [20, 20, 20, 20])
+    backend : str or backend object
+        Segment array backend, 'numpy' or 'math' (default: get_array_backend())
+    tolerance : float or None
+        Maximum chord deviation (mm). When set, num_points is ignored: involute and trochoid
+        parameters are refined adaptively and arcs get the fewest points meeting the tolerance,
+        and 'parameters' reports 'tolerance' and the achieved 'max_chord_error' (default: None)
+    Returns:
+    --------
+    GearProfile holding the 6 profile parts in one buffer; indexing it by part name gives a
+    sequence of (x, y) points ((N, 2) read-only array with the numpy backend, list of tuples
+    with the math backend) and profile['parameters'] the gear parameters:
+        'trochoid_1': [(x1, y1), (x2, y2), ...] - First trochoid curve
+        'involute_1': [(x1, y1), (x2, y2), ...] - First involute curve  
+        'upper_arc': [(x1, y1), (x2, y2), ...] - Upper addendum arc
+        'involute_2': [(x1, y1), (x2, y2), ...] - Second involute curve
+        'trochoid_2': [(x1, y1), (x2, y2), ...] - Second trochoid curve
+        'lower_arc': [(x1, y1), (x2, y2), ...] - Lower dedendum arc
+    """
+    bk = get_array_backend(backend)
+    alpha = math.radians(alpha_deg)
+    pitch_radius = m * z / 2.0
+    base_radius = pitch_radius * math.cos(alpha)
+    if undercut_auto_suppress:
+        profile_shift = max(profile_shift, minimum_profile_shift(z, m, alpha_deg))
+    pitch_radius += profile_shift
+    addendum_radius = pitch_radius + m
+    dedendum_radius = max(pitch_radius - 1.25 * m, 0.01)
+    if base_radius > pitch_radius:
+        raise ValueError("Base radius is larger than pitch radius, resulting in invalid gear geometry.")
+    else:
+        offset_angle = math.acos(base_radius / pitch_radius)
+    phi = involute_function(offset_angle)
+    angular_tooth_width = math.pi / z
+    addendum_involute_angle = math.acos(base_radius / addendum_radius)
+    max_involute_angle = addendum_involute_angle + involute_function(addendum_involute_angle)
+    if base_radius < dedendum_radius:
+        deddendum_involute_angle = math.acos(base_radius / dedendum_radius)
+    else : 
+        deddendum_involute_angle = 0
+    min_involute_angle = deddendum_involute_angle + involute_function(deddendum_involute_angle)
+    tooth_angle = -angular_tooth_width - 2 * phi
+    chord_errors = []
+    involute = bk.involute(base_radius, _curve_thetas(bk, lambda theta: _involute_point(base_radius, theta),
+                                                      min_involute_angle, max_involute_angle - min_involute_angle,
+                                                      num_points[0], tolerance, chord_errors))
+    involute_1 = bk.mirror(involute)
+    involute_2 = bk.rotate(involute, tooth_angle)
+    if base_radius > dedendum_radius:
+        t_trochoid = base_radius - dedendum_radius
+        b_trochoid = math.sqrt(base_radius**4 / (base_radius - t_trochoid)**2 - base_radius**2)
+        h_trochoid = b_trochoid * (1 - t_trochoid / base_radius)
+        alpha_trochoid = math.atan(h_trochoid / base_radius)
+        offset_trochoid_angle = alpha_trochoid + involute_function(alpha_trochoid)
+        beta_trochoid = math.atan(b_trochoid / base_radius) - offset_trochoid_angle
+        trochoid = bk.trochoid(base_radius, t_trochoid, _curve_thetas(bk, lambda theta: _involute_point(base_radius, theta, t_trochoid),
+                                                                      0.0, offset_trochoid_angle,
+                                                                      num_points[1], tolerance, chord_errors))
+        trochoid = bk.rotate(trochoid, beta_trochoid)
+        trochoid_1 = bk.reverse(trochoid)
+        trochoid_2 = bk.reverse(bk.rotate(bk.mirror(trochoid), tooth_angle))
+    else:
+        trochoid_1 = bk.empty()
+        trochoid_2 = bk.empty()
+    addendum_involute_angle_val = math.acos(base_radius / addendum_radius)
+    involute_at_addendum = involute_function(addendum_involute_angle_val)
+    start_angle_upper = -involute_at_addendum
+    end_angle_upper = tooth_angle + involute_at_addendum
+    upper_arc = bk.arc(addendum_radius, _arc_thetas(bk, addendum_radius, start_angle_upper, end_angle_upper - start_angle_upper, num_points[2], tolerance, chord_errors))
+    if base_radius > dedendum_radius:
+        start_angle_lower = tooth_angle - beta_trochoid
+        end_angle_lower = -angular_tooth_width * 2 + beta_trochoid
+    else: 
+        start_angle_lower = tooth_angle + involute_function(deddendum_involute_angle)
+        end_angle_lower = -angular_tooth_width * 2 - involute_function(deddendum_involute_angle)
+    lower_arc = bk.arc(dedendum_radius, _arc_thetas(bk, dedendum_radius, start_angle_lower, end_angle_lower - start_angle_lower, num_points[3], tolerance, chord_errors))
+    parameters = {
+        'z': z,
+        'm': m,
+        'alpha_deg': alpha_deg,
+        'profile_shift': profile_shift,
+        'pitch_radius': pitch_radius,
+        'base_radius': base_radius,
+        'addendum_radius': addendum_radius,
+        'dedendum_radius': dedendum_radius
+    }
+    if tolerance is not None:
+        parameters['tolerance'] = tolerance
+        parameters['max_chord_error'] = max(chord_errors)
+    return GearProfile.from_segments('external', [
+        ('trochoid_1', trochoid_1),
+        ('involute_1', involute_1),
+        ('upper_arc', upper_arc),
+        ('involute_2', involute_2),
+        ('trochoid_2', trochoid_2),
+        ('lower_arc', lower_arc),
+    ], parameters, bk)
+def generate_internal_tooth_profile(z, m, alpha_deg, thickness, profile_shift=0.0, undercut_auto_suppress=False, num_points=[10,5,5,10], backend=None, tolerance=None):
+    """
+    Generate the profile of one tooth consisting of 6 parts.
+    Parameters:
+    -----------
+    z : int
+        Number of teeth
+    m : float
+        Module (mm)
+    alpha_deg : float
+        Pressure angle in degrees
+    thickness : float
+        External thickness (mm)
+    profile_shift : float
+        Profile shifting value (default: 0.0)
+    undercut_auto_suppress : bool
+        Raise profile_shift to at least minimum_profile_shift() (default: False)
+    num_points : list of int
+        Number of points per curve segment, order is following : [involute,addendum,deddundum,external] (default: [20, 20, 20, 20])
+    backend : str or backend object
+        Segment array backend, 'numpy' or 'math' (default: get_array_backend())
+    tolerance : float or None
+        Maximum chord deviation (mm). When set, num_points is ignored: involute and trochoid
+        parameters are refined adaptively and arcs get the fewest points meeting the tolerance,
+        and 'parameters' reports 'tolerance' and the achieved 'max_chord_error' (default: None)
+    Returns:
+    --------
+    GearProfile holding the 6 profile parts in one buffer; indexing it by part name gives a
+    sequence of (x, y) points ((N, 2) read-only array with the numpy backend, list of tuples
+    with the math backend) and profile['parameters'] the gear parameters:
+        'involute_1': [(x1, y1), (x2, y2), ...] - First involute curve  
+        'upper_arc': [(x1, y1), (x2, y2), ...] - Upper addendum arc
+        'involute_2': [(x1, y1), (x2, y2), ...] - Second involute curve
+        'lower_arc': [(x1, y1), (x2, y2), ...] - Lower dedendum arc
+        'external_arc': [(x1, y1), (x2, y2), ...] - External arc
+    """
+    bk = get_array_backend(backend)
+    alpha = math.radians(alpha_deg)
+    pitch_radius = m * z / 2.0
+    base_radius = pitch_radius * math.cos(alpha)
+    if undercut_auto_suppress:
+        profile_shift = max(profile_shift, minimum_profile_shift(z, m, alpha_deg, internal=True))
+    pitch_radius += profile_shift
+    addendum_radius = pitch_radius - m
+    dedendum_radius = max(pitch_radius + 1.25 * m, 0.01)
+    if base_radius > pitch_radius:
+        raise ValueError("Base radius is larger than pitch radius, resulting in invalid gear geometry.")
+    else:
+        offset_angle = math.acos(base_radius / pitch_radius)
+    phi = involute_function(offset_angle)
+    angular_tooth_width = math.pi / z
+    dedendum_involute_angle = math.acos(base_radius / dedendum_radius)
+    if base_radius < addendum_radius:
+        addendum_involute_angle = math.acos(base_radius / addendum_radius)
+    else : 
+        addendum_involute_angle = 0
+    max_involute_angle = dedendum_involute_angle + involute_function(dedendum_involute_angle)
+    min_involute_angle = addendum_involute_angle + involute_function(addendum_involute_angle)
+    tooth_angle = -angular_tooth_width - 2 * phi
+    chord_errors = []
+    involute = bk.involute(base_radius, _curve_thetas(bk, lambda theta: _involute_point(base_radius, theta),
+                                                      min_involute_angle, max_involute_angle - min_involute_angle,
+                                                      num_points[0], tolerance, chord_errors))
+    involute_1 = bk.mirror(involute)
+    involute_2 = bk.rotate(involute, tooth_angle)
+    involute_at_dedendum = involute_function(dedendum_involute_angle)
+    start_angle_upper = -involute_at_dedendum
+    end_angle_upper = tooth_angle + involute_at_dedendum
+    upper_arc = bk.arc(dedendum_radius, _arc_thetas(bk, dedendum_radius, start_angle_upper, end_angle_upper - start_angle_upper, num_points[1], tolerance, chord_errors))
+    start_angle_lower = tooth_angle + involute_function(addendum_involute_angle)
+    end_angle_lower = -angular_tooth_width * 2 - involute_function(addendum_involute_angle)
+    angular_width_lower = end_angle_lower - start_angle_lower
+    half_num_points_lower = num_points[2]//2
+    lower_radius = max(addendum_radius, base_radius)
+    lower_arc_1 = bk.arc(lower_radius, _arc_thetas(bk, lower_radius, start_angle_lower, angular_width_lower/2, half_num_points_lower, tolerance, chord_errors))
+    lower_arc_2 = bk.arc(lower_radius, _arc_thetas(bk, lower_radius, -involute_function(addendum_involute_angle), -angular_width_lower/2, half_num_points_lower, tolerance, chord_errors))
+    start_angle_external = -involute_function(addendum_involute_angle)  - angular_width_lower/2
+    end_angle_external = start_angle_lower + angular_width_lower/2
+    external_arc = bk.arc(dedendum_radius + thickness, _arc_thetas(bk, dedendum_radius + thickness, start_angle_external, end_angle_external - start_angle_external, num_points[3], tolerance, chord_errors))
+    parameters = {
+        'z': z,
+        'm': m,
+        'alpha_deg': alpha_deg,
+        'profile_shift': profile_shift,
+        'pitch_radius': pitch_radius,
+        'base_radius': base_radius,
+        'addendum_radius': addendum_radius,
+        'dedendum_radius': dedendum_radius
+    }
+    if tolerance is not None:
+        parameters['tolerance'] = tolerance
+        parameters['max_chord_error'] = max(chord_errors)
+    return GearProfile.from_segments('internal', [
+        ('involute_1', involute_1),
+        ('upper_arc', upper_arc),
+        ('involute_2', involute_2),
+        ('lower_arc_1', lower_arc_1),
+        ('lower_arc_2', lower_arc_2),
+        ('external_arc', external_arc),
+    ], parameters, bk)
+def _quantize(value, quantum):
+    return int(round(float(value) / quantum))
+class ToothProfileCache(object):
+    """
+    Bounded LRU cache around generate_external_tooth_profile / generate_internal_tooth_profile.
+    Entries are keyed on quantized gear parameters and evicted least recently used first,
+    once either max_entries or max_points (total stored points, None for no limit) is exceeded.
+    Each lookup returns its own GearProfile with copies of the cached buffer and 'parameters'
+    dict, so callers cannot corrupt the cache or each other.
+    """
+    def __init__(self, max_entries=64, max_points=None, quantum=1e-9):
+        self.max_entries = max_entries
+        self.max_points = max_points
+        self.quantum = quantum
+        self._entries = OrderedDict()
+        self._points = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    def make_key(self, kind, z, m, alpha_deg, profile_shift, thickness, undercut_auto_suppress, num_points, backend, tolerance=None):
+        q = self.quantum
+        if tolerance is None:
+            sampling = tuple(int(n) for n in num_points)
+        else:
+            sampling = ('tolerance', _quantize(tolerance, q))
+        return (kind, int(z), _quantize(m, q), _quantize(alpha_deg, q), _quantize(profile_shift, q),
+                None if thickness is None else _quantize(thickness, q),
+                bool(undercut_auto_suppress), sampling, get_array_backend(backend).name)
+    def external(self, z, m, alpha_deg, profile_shift=0.0, undercut_auto_suppress=False, num_points=[10,10,5,5], backend=None, tolerance=None):
+        """Cached generate_external_tooth_profile."""
+        key = self.make_key('external', z, m, alpha_deg, profile_shift, None, undercut_auto_suppress, num_points, backend, tolerance)
+        return self._lookup(key, lambda: generate_external_tooth_profile(
+            z, m, alpha_deg, profile_shift, undercut_auto_suppress, num_points, backend, tolerance))
+    def internal(self, z, m, alpha_deg, thickness, profile_shift=0.0, undercut_auto_suppress=False, num_points=[10,5,5,10], backend=None, tolerance=None):
+        """Cached generate_internal_tooth_profile."""
+        key = self.make_key('internal', z, m, alpha_deg, profile_shift, thickness, undercut_auto_suppress, num_points, backend, tolerance)
+        return self._lookup(key, lambda: generate_internal_tooth_profile(
+            z, m, alpha_deg, thickness, profile_shift, undercut_auto_suppress, num_points, backend, tolerance))
+    def _lookup(self, key, generate):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.hits += 1
+            instrumentation.count('profile.cache_hit')
+        else:
+            self.misses += 1
+            with instrumentation.span('profile.generate'):
+                entry = generate()
+            self._points += entry.point_count
+        self._entries[key] = entry
+        self._evict()
+        return entry.copy()
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or
+                                 (self.max_points is not None and self._points > self.max_points)):
+            key, entry = self._entries.popitem(last=False)
+            self._points -= entry.point_count
+            self.evictions += 1
+    def resize(self, max_entries=None, max_points=None):
+        """Change the entry and/or point caps, evicting immediately if needed."""
+        if max_entries is not None:
+            self.max_entries = max_entries
+        if max_points is not None:
+            self.max_points = max_points
+        self._evict()
+    def clear(self):
+        self._entries.clear()
+        self._points = 0
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'points': self._points,
+            'max_entries': self.max_entries,
+            'max_points': self.max_points
+        }
+profile_cache = ToothProfileCache()
+_UNIT_STORE_MAGIC = b'PGUS'
+# 2: undercut_auto_suppress entries follow minimum_profile_shift()
+_UNIT_STORE_VERSION = 2
+_UNIT_PARAMETER_KEYS = ('profile_shift', 'pitch_radius', 'base_radius', 'addendum_radius', 'dedendum_radius')
+class UnitProfileStore(object):
+    """
+    Store of unit-module (m = 1) tooth profiles keyed on (z, alpha_deg, profile_shift / m).
+    The tooth geometry scales exactly with the module once the shift (and the internal
+    thickness) are expressed relative to m, so every module variant of a stored profile is
+    produced by a single scale pass. Gears whose dedendum radius hits the 0.01 mm clamp do not
+    scale and are generated directly. The store can be saved to and loaded from a compact
+    little-endian binary table (struct packed float64) to be reused by later sessions.
+    """
+    def __init__(self, backend=None, quantum=1e-9):
+        self.backend = backend
+        self.quantum = quantum
+        self._profiles = {}
+        self.hits = 0
+        self.misses = 0
+    def __len__(self):
+        return len(self._profiles)
+    def make_key(self, kind, z, alpha_deg, shift_ratio, thickness_ratio, undercut_auto_suppress, num_points):
+        q = self.quantum
+        return (kind, int(z), _quantize(alpha_deg, q), _quantize(shift_ratio, q),
+                None if thickness_ratio is None else _quantize(thickness_ratio, q),
+                bool(undercut_auto_suppress), tuple(int(n) for n in num_points))
+    def unit_profile(self, kind, z, alpha_deg, shift_ratio=0.0, thickness_ratio=None, undercut_auto_suppress=False, num_points=None):
+        """Return the stored m = 1 profile, generating it on first use."""
+        if num_points is None:
+            num_points = [10, 10, 5, 5] if kind == 'external' else [10, 5, 5, 10]
+        key = self.make_key(kind, z, alpha_deg, shift_ratio, thickness_ratio, undercut_auto_suppress, num_points)
+        profile = self._profiles.get(key)
+        if profile is not None:
+            self.hits += 1
+            return profile
+        self.misses += 1
+        if kind == 'external':
+            profile = generate_external_tooth_profile(z, 1.0, alpha_deg, shift_ratio, undercut_auto_suppress, list(num_points), self.backend)
+        else:
+            profile = generate_internal_tooth_profile(z, 1.0, alpha_deg, thickness_ratio, shift_ratio, undercut_auto_suppress, list(num_points), self.backend)
+        self._profiles[key] = profile
+        return profile
+    def external(self, z, m, alpha_deg, profile_shift=0.0, undercut_auto_suppress=False, num_points=[10,10,5,5]):
+        """Drop-in for generate_external_tooth_profile, scaled from the unit profile."""
+        unit = self.unit_profile('external', z, alpha_deg, float(profile_shift) / m, None, undercut_auto_suppress, num_points)
+        if self._clamped(unit['parameters']['pitch_radius'] - 1.25, m):
+            return generate_external_tooth_profile(z, m, alpha_deg, profile_shift, undercut_auto_suppress, num_points, self.backend)
+        return self._scale(unit, m, z, alpha_deg)
+    def internal(self, z, m, alpha_deg, thickness, profile_shift=0.0, undercut_auto_suppress=False, num_points=[10,5,5,10]):
+        """Drop-in for generate_internal_tooth_profile, scaled from the unit profile."""
+        unit = self.unit_profile('internal', z, alpha_deg, float(profile_shift) / m, float(thickness) / m, undercut_auto_suppress, num_points)
+        if self._clamped(unit['parameters']['pitch_radius'] + 1.25, m):
+            return generate_internal_tooth_profile(z, m, alpha_deg, thickness, profile_shift, undercut_auto_suppress, num_points, self.backend)
+        return self._scale(unit, m, z, alpha_deg)
+    def _clamped(self, unit_dedendum, m):
+        return unit_dedendum <= 0.01 or unit_dedendum * m <= 0.01
+    def _scale(self, unit, m, z, alpha_deg):
+        parameters = {'z': z, 'm': m, 'alpha_deg': alpha_deg}
+        for name in _UNIT_PARAMETER_KEYS:
+            parameters[name] = unit.parameters[name] * m
+        return unit.scaled(m, parameters)
+    def clear(self):
+        self._profiles.clear()
+    def save(self, path):
+        """Write every stored unit profile to path as a binary table."""
+        with open(path, 'wb') as f:
+            f.write(_UNIT_STORE_MAGIC)
+            f.write(struct.pack('<II', _UNIT_STORE_VERSION, len(self._profiles)))
+            for key, profile in self._profiles.items():
+                kind, z = key[0], key[1]
+                parameters = profile['parameters']
+                num_points = key[6]
+                f.write(struct.pack('<BIddBB', 0 if kind == 'external' else 1, z,
+                                    key[2] * self.quantum, key[3] * self.quantum,
+                                    key[5], len(num_points)))
+                f.write(struct.pack('<%dI' % len(num_points), *num_points))
+                f.write(struct.pack('<d', float('nan') if key[4] is None else key[4] * self.quantum))
+                f.write(struct.pack('<5d', *[parameters[name] for name in _UNIT_PARAMETER_KEYS]))
+                names = sorted(profile.names)
+                f.write(struct.pack('<B', len(names)))
+                for name in names:
+                    encoded = name.encode('ascii')
+                    flat = profile.flat(name)
+                    f.write(struct.pack('<B', len(encoded)) + encoded)
+                    f.write(struct.pack('<I', len(flat) // 2))
+                    f.write(struct.pack('<%dd' % len(flat), *flat))
+    def load(self, path):
+        """Merge the unit profiles saved in path into the store; returns the number loaded."""
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data[:4] != _UNIT_STORE_MAGIC:
+            raise ValueError("%s is not a unit profile store file." % path)
+        version, count = struct.unpack_from('<II', data, 4)
+        if version != _UNIT_STORE_VERSION:
+            raise ValueError("Unsupported unit profile store version %d." % version)
+        offset = 12
+        for _ in range(count):
+            kind_code, z, alpha_deg, shift_ratio, undercut, n_counts = struct.unpack_from('<BIddBB', data, offset)
+            offset += struct.calcsize('<BIddBB')
+            num_points = struct.unpack_from('<%dI' % n_counts, data, offset)
+            offset += 4 * n_counts
+            thickness_ratio, = struct.unpack_from('<d', data, offset)
+            offset += 8
+            values = struct.unpack_from('<5d', data, offset)
+            offset += 40
+            kind = 'external' if kind_code == 0 else 'internal'
+            parameters = dict(zip(_UNIT_PARAMETER_KEYS, values))
+            parameters.update({'z': z, 'm': 1.0, 'alpha_deg': alpha_deg})
+            buffer = array('d')
+            names = []
+            offsets = [0]
+            n_segments, = struct.unpack_from('<B', data, offset)
+            offset += 1
+            for _ in range(n_segments):
+                name_length, = struct.unpack_from('<B', data, offset)
+                name = data[offset + 1:offset + 1 + name_length].decode('ascii')
+                offset += 1 + name_length
+                n, = struct.unpack_from('<I', data, offset)
+                offset += 4
+                buffer.extend(struct.unpack_from('<%dd' % (2 * n), data, offset))
+                offset += 16 * n
+                names.append(name)
+                offsets.append(len(buffer) // 2)
+            if thickness_ratio != thickness_ratio:
+                thickness_ratio = None
+            key = self.make_key(kind, z, alpha_deg, shift_ratio, thickness_ratio, undercut, num_points)
+            self._profiles[key] = GearProfile(kind, names, offsets, buffer, parameters, self.backend)
+        return count
+unit_profile_store = UnitProfileStore()
+def _tooth_chain(profile, bk):
+    """One tooth sector as (kind, points) segments, clockwise, each starting where the previous one ends."""
+    if 'external_arc' in profile:
+        chain = [('arc', bk.reverse(profile['lower_arc_2'])),
+                 ('spline', profile['involute_1']),
+                 ('arc', profile['upper_arc']),
+                 ('spline', bk.reverse(profile['involute_2'])),
+                 ('arc', profile['lower_arc_1'])]
+    else:
+        chain = [('spline', bk.reverse(profile['trochoid_1'])),
+                 ('spline', profile['involute_1']),
+                 ('arc', profile['upper_arc']),
+                 ('spline', bk.reverse(profile['involute_2'])),
+                 ('spline', profile['trochoid_2']),
+                 ('arc', profile['lower_arc'])]
+    return [(kind, points) for kind, points in chain if len(points) > 0]
+def _same_arc(a, b):
+    return a[0] == 'arc' and b[0] == 'arc' and abs(a[1] - b[1]) <= 1e-9 * max(a[1], b[1])
+def generate_full_gear_outline(profile, backend=None):
+    """
+    Pattern a one-tooth profile into the closed outline of the whole gear.
+    Parameters:
+    -----------
+    profile : GearProfile
+        Result of generate_external_tooth_profile / generate_internal_tooth_profile
+    backend : str or backend object
+        Array backend to pattern with (default: the backend the profile was generated with)
+    Returns:
+    --------
+    dict with:
+        'points': closed loop of the z teeth, clockwise, without repeating the first point
+        'segments': [(kind, radius, start, end), ...] - 'spline' or 'arc' (radius None for splines),
+                    covering points[start..end] (indices modulo len(points)); adjacent segments
+                    share their endpoint and arcs of the same radius are merged across teeth
+        'outer_radius': rim circle radius for internal gears, None for external gears
+        'parameters': copy of the profile parameters
+    """
+    if backend is None:
+        backend = getattr(profile, 'backend', None)
+    bk = get_array_backend(backend)
+    z = int(profile['parameters']['z'])
+    chain = _tooth_chain(profile, bk)
+    tooth = bk.concat([points[:-1] for kind, points in chain])
+    n = len(tooth)
+    local = []
+    offset = 0
+    for kind, points in chain:
+        radius = math.hypot(points[0][0], points[0][1]) if kind == 'arc' else None
+        local.append((kind, radius, offset, offset + len(points) - 1))
+        offset += len(points) - 1
+    step = -2.0 * math.pi / z
+    cos_table = [math.cos(k * step) for k in range(z)]
+    sin_table = [math.sin(k * step) for k in range(z)]
+    segments = []
+    for k in range(z):
+        for kind, radius, start, end in local:
+            segment = [kind, radius, start + k * n, end + k * n]
+            if segments and _same_arc(segments[-1], segment):
+                segments[-1][3] = segment[3]
+            else:
+                segments.append(segment)
+    if len(segments) > 1 and _same_arc(segments[-1], segments[0]):
+        segments[0][2] = segments.pop()[2] - z * n
+    outer_radius = None
+    if 'external_arc' in profile:
+        rim = profile['external_arc'][0]
+        outer_radius = math.hypot(rim[0], rim[1])
+    return {
+        'points': bk.pattern(tooth, cos_table, sin_table),
+        'segments': [tuple(segment) for segment in segments],
+        'outer_radius': outer_radius,
+        'parameters': dict(profile['parameters'])
+    }
+def outline_segment_points(outline, index, backend=None):
+    """Points of outline['segments'][index], endpoints included."""
+    kind, radius, start, end = outline['segments'][index]
+    return get_array_backend(backend).take_loop(outline['points'], start, end)
+def is_undercut(parameters, internal=False):
+    """
+    True when the gear of a 'parameters' dict is shifted less than minimum_profile_shift(), the
+    shift undercut_auto_suppress raises it to (with UNDERCUT_TOLERANCE * m of slack for rounding).
+    """
+    p = parameters
+    return p['profile_shift'] < minimum_profile_shift(p['z'], p['m'], p['alpha_deg'], internal) - UNDERCUT_TOLERANCE * p['m']
+def contact_ratio(parameters_1, parameters_2, center_distance=None, internal=False):
+    """
+    Transverse contact ratio of two meshing gears, from their 'parameters' dicts: two external
+    gears, or with internal set an external pinion (1) inside an internal ring (2).
+    center_distance defaults to the sum (ring: difference) of the (shifted) pitch radii; raises
+    ValueError when the base circles cannot reach each other at that distance.
+    """
+    m = parameters_1['m']
+    alpha = math.radians(parameters_1['alpha_deg'])
+    rb1, rb2 = parameters_1['base_radius'], parameters_2['base_radius']
+    ra1, ra2 = parameters_1['addendum_radius'], parameters_2['addendum_radius']
+    if internal:
+        if center_distance is None:
+            center_distance = parameters_2['pitch_radius'] - parameters_1['pitch_radius']
+        cos_operating = (rb2 - rb1) / center_distance
+    else:
+        if center_distance is None:
+            center_distance = parameters_1['pitch_radius'] + parameters_2['pitch_radius']
+        cos_operating = (rb1 + rb2) / center_distance
+    if cos_operating > 1.0:
+        raise ValueError("Center distance %g is smaller than the %s of the base radii."
+                         % (center_distance, 'difference' if internal else 'sum'))
+    sin_operating = math.sqrt(1.0 - cos_operating * cos_operating)
+    if internal:
+        path = (math.sqrt(ra1 * ra1 - rb1 * rb1) - math.sqrt(max(ra2 * ra2 - rb2 * rb2, 0.0))
+                + center_distance * sin_operating)
+    else:
+        path = math.sqrt(ra1 * ra1 - rb1 * rb1) + math.sqrt(ra2 * ra2 - rb2 * rb2) - center_distance * sin_operating
+    return path / (math.pi * m * math.cos(alpha))
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Lazy access to the Alibre host for py-gear.
+The add-on scope already carries AlibreRoot, CurrentSession and (from alibre_setup.py)
+CurrentPart, so the Part is taken from there; the AlibreX COM connection and the WinForms
+assemblies are only loaded when something actually needs them, once per script engine.
+Importing this module loads nothing from .NET. startup_trace records where launch time goes.
+"""
+import time
+from contextlib import contextmanager
+_timer = getattr(time, 'perf_counter', time.time)
+class StartupTrace(object):
+    """Timed spans of one launch, as (label, start offset, seconds, depth) from the launch start."""
+    def __init__(self):
+        self.started = _timer()
+        self.spans = []
+        self._depth = 0
+    def start(self, started=None):
+        """Begin a new launch trace; started is an earlier _timer() reading, e.g. from the launcher."""
+        self.started = _timer() if started is None else started
+        self.spans = []
+        self._depth = 0
+    @contextmanager
+    def span(self, label):
+        begin = _timer()
+        record = [label, begin - self.started, None, self._depth]
+        self.spans.append(record)
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            record[2] = _timer() - begin
+    def elapsed(self):
+        return _timer() - self.started
+    def report(self):
+        lines = ['py-gear startup trace (%.1f ms):' % (1000 * self.elapsed())]
+        for label, offset, seconds, depth in self.spans:
+            lines.append('%s%-*s %8.1f ms  (at %.1f ms)' % ('  ' * (depth + 1), 32 - 2 * depth, label,
+                                                          1000 * (seconds or 0.0), 1000 * offset))
+        return '\n'.join(lines)
+startup_trace = StartupTrace()
+class Lazy(object):
+    """Memoized zero-argument factory: built (and traced) on the first get(), kept until reset()."""
+    def __init__(self, label, factory):
+        self.label = label
+        self.factory = factory
+        self.loaded = False
+        self.value = None
+    def get(self):
+        if not self.loaded:
+            with startup_trace.span(self.label):
+                self.value = self.factory()
+            self.loaded = True
+        return self.value
+    def reset(self):
+        self.loaded = False
+        self.value = None
+def _load_winforms():
+    import clr
+    clr.AddReference('System.Windows.Forms')
+    clr.AddReference('System.Drawing')
+    import System.Windows.Forms
+    return System.Windows.Forms
+winforms = Lazy('load WinForms assemblies', _load_winforms)
+def _connect_automation_root():
+    from System.Runtime.InteropServices import Marshal
+    return Marshal.GetActiveObject("AlibreX.AutomationHook").Root
+automation_root = Lazy('connect AlibreX automation', _connect_automation_root)
+class AlibreHost(object):
+    """
+    Alibre objects of the current launch. configure() takes them from the script scope set up by
+    the add-on; anything missing (running outside the add-on) is resolved over COM on first use.
+    """
+    def __init__(self):
+        self.scope_root = None
+        self.scope_session = None
+        self.scope_part = None
+        self._part = Lazy('open Part session', self._open_part)
+    def configure(self, scope):
+        """Adopt AlibreRoot / CurrentSession / CurrentPart from a script scope (globals() of the launcher)."""
+        self.scope_root = scope.get('AlibreRoot')
+        self.scope_session = scope.get('CurrentSession')
+        self.scope_part = scope.get('CurrentPart')
+        self._part.reset()
+        return self
+    @property
+    def root(self):
+        if self.scope_root is not None:
+            return self.scope_root
+        return automation_root.get()
+    @property
+    def session(self):
+        if self.scope_session is not None:
+            return self.scope_session
+        return self.root.TopmostSession
+    @property
+    def part(self):
+        """AlibreScript Part of the session, memoized until the next configure()."""
+        return self._part.get()
+    def _open_part(self):
+        if self.scope_part is not None:
+            return self.scope_part
+        from AlibreScript.API import Part
+        return Part(self.session)
+host = AlibreHost()
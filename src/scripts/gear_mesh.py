@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+"""
+Mesh-quality analysis of two generated gears: contact ratio, backlash and interference.
+Gear 1 (external) sits at the origin and is turned through one angular pitch while gear 2
+(external, or the ring around it) follows at the kinematic ratio. At every step the outline
+points of each gear near the mesh zone are measured against the other gear's outline:
+a point inside the other gear's material is interference (its depth is the distance to that
+outline), a point in the clear gives the angle gear 1 could turn towards it before touching.
+The backlash of a step is the free play of gear 1 both ways, as arc length on its operating
+pitch circle. Distance queries go through a SegmentGrid, a uniform grid of the outline
+segments in the mesh window, built once per gear in its own frame: a query only tests the
+segments of the 3 x 3 cells around the point instead of all pairs, and only the points are
+moved from step to step. Queries are batched through numpy when it is available.
+Headless.
+"""
+import math
+from gear_geometry import generate_full_gear_outline, contact_ratio
+from gear_pair import mesh_phase
+try:
+    import numpy
+except ImportError:
+    numpy = None
+DEFAULT_STEPS = 48
+SEARCH_RADIUS = 0.25
+_RADIAL = 0.2
+_OFFSET = 1 << 20
+_STRIDE = 1 << 21
+class SegmentGrid(object):
+    """
+    Uniform grid, with cells as large as the search reach, over the segments of a closed polyline
+    (segment i joins points i - 1 and i; segments limits the grid to those). Distances are signed,
+    negative inside the material: the enclosed side when solid_inside, the outside otherwise.
+    """
+    def __init__(self, points, reach, solid_inside=True, segments=None, use_numpy=None):
+        self.points = [(float(x), float(y)) for x, y in points]
+        self.reach = size = float(reach)
+        n = len(self.points)
+        area = 0.0
+        for i in range(n):
+            x0, y0 = self.points[i - 1]
+            x1, y1 = self.points[i]
+            area += x0 * y1 - x1 * y0
+        self.orientation = (1.0 if area > 0 else -1.0) * (1.0 if solid_inside else -1.0)
+        self.cells = {}
+        for i in (range(n) if segments is None else segments):
+            x0, y0 = self.points[i - 1]
+            x1, y1 = self.points[i]
+            for cx in range(int(math.floor(min(x0, x1) / size)), int(math.floor(max(x0, x1) / size)) + 1):
+                for cy in range(int(math.floor(min(y0, y1) / size)), int(math.floor(max(y0, y1) / size)) + 1):
+                    self.cells.setdefault((cx, cy), []).append(i)
+        self.use_numpy = numpy is not None if use_numpy is None else use_numpy
+        if self.use_numpy:
+            # the cell lists as one sorted key array with offsets into the concatenated segment indices
+            keys = sorted(self.cells)
+            self._keys = numpy.array([(cx + _OFFSET) * _STRIDE + cy + _OFFSET for cx, cy in keys], dtype=numpy.int64)
+            self._counts = numpy.array([len(self.cells[key]) for key in keys], dtype=numpy.int64)
+            self._starts = numpy.cumsum(self._counts) - self._counts
+            self._segments = numpy.array([i for key in keys for i in self.cells[key]], dtype=numpy.int64)
+            self._xy = numpy.array(self.points)
+    def _cross(self, i, x, y):
+        ax, ay = self.points[i - 1]
+        bx, by = self.points[i]
+        dx = bx - ax
+        dy = by - ay
+        return (dx * (y - ay) - dy * (x - ax)) / (math.hypot(dx, dy) or 1.0)
+    def nearest(self, x, y):
+        """(signed distance, qx, qy) of the closest outline point within reach, or None."""
+        size = self.reach
+        cx = int(math.floor(x / size))
+        cy = int(math.floor(y / size))
+        points = self.points
+        best = None
+        for i in (cx - 1, cx, cx + 1):
+            for j in (cy - 1, cy, cy + 1):
+                for index in self.cells.get((i, j), ()):
+                    ax, ay = points[index - 1]
+                    bx, by = points[index]
+                    dx = bx - ax
+                    dy = by - ay
+                    length_sq = dx * dx + dy * dy
+                    t = ((x - ax) * dx + (y - ay) * dy) / length_sq if length_sq > 0 else 0.0
+                    t = 0.0 if t < 0.0 else 1.0 if t > 1.0 else t
+                    distance = math.hypot(x - ax - t * dx, y - ay - t * dy)
+                    if best is None or distance < best[0]:
+                        best = (distance, index, t, ax + t * dx, ay + t * dy)
+        if best is None or best[0] > size:
+            return None
+        distance, index, t, qx, qy = best
+        cross = self._cross(index, x, y)
+        if t <= 0.0 or t >= 1.0:
+            # closest to a vertex: the segment on either side that sees the point more squarely decides
+            other = self._cross((index - 1 if t <= 0.0 else index + 1) % len(points), x, y)
+            if abs(other) > abs(cross):
+                cross = other
+        return (distance if cross * self.orientation < 0 else -distance), qx, qy
+    def query(self, xs, ys):
+        """
+        nearest() for whole arrays of points at once: (signed distance, qx, qy) arrays, distance
+        NaN where nothing is within reach. Needs numpy.
+        """
+        size = self.reach
+        xs = numpy.asarray(xs, dtype=float)
+        ys = numpy.asarray(ys, dtype=float)
+        count = len(xs)
+        signed = numpy.full(count, numpy.nan)
+        qx = numpy.zeros(count)
+        qy = numpy.zeros(count)
+        if count == 0 or len(self._keys) == 0:
+            return signed, qx, qy
+        cx = numpy.floor(xs / size).astype(numpy.int64) + _OFFSET
+        cy = numpy.floor(ys / size).astype(numpy.int64) + _OFFSET
+        keys = ((cx[:, None] + numpy.array([-1, -1, -1, 0, 0, 0, 1, 1, 1])) * _STRIDE
+                + cy[:, None] + numpy.array([-1, 0, 1, -1, 0, 1, -1, 0, 1])).ravel()
+        slot = numpy.minimum(numpy.searchsorted(self._keys, keys), len(self._keys) - 1)
+        counts = numpy.where(self._keys[slot] == keys, self._counts[slot], 0)
+        total = int(counts.sum())
+        if total == 0:
+            return signed, qx, qy
+        owner = numpy.repeat(numpy.arange(len(keys)) // 9, counts)
+        local = numpy.arange(total) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+        segment = self._segments[numpy.repeat(self._starts[slot], counts) + local]
+        a = self._xy[segment - 1]
+        d = self._xy[segment] - a
+        px = xs[owner]
+        py = ys[owner]
+        length_sq = (d * d).sum(1)
+        t = numpy.clip(((px - a[:, 0]) * d[:, 0] + (py - a[:, 1]) * d[:, 1]) / numpy.where(length_sq > 0, length_sq, 1.0),
+                       0.0, 1.0)
+        nx = a[:, 0] + t * d[:, 0]
+        ny = a[:, 1] + t * d[:, 1]
+        distance = numpy.hypot(px - nx, py - ny)
+        # candidates come grouped by point: the first one at its group's minimum distance is the closest
+        starts = numpy.flatnonzero(numpy.concatenate(([True], owner[1:] != owner[:-1])))
+        closest = numpy.minimum.reduceat(distance, starts)
+        minimal = numpy.flatnonzero(distance == numpy.repeat(closest, numpy.diff(numpy.append(starts, total))))
+        first = minimal[numpy.searchsorted(minimal, starts)]
+        first = first[distance[first] <= size]
+        hit = owner[first]
+        cross = self._crosses(segment[first], px[first], py[first])
+        at_vertex = (t[first] <= 0.0) | (t[first] >= 1.0)
+        neighbor = numpy.where(t[first] <= 0.0, segment[first] - 1, segment[first] + 1) % len(self.points)
+        other = self._crosses(neighbor, px[first], py[first])
+        cross = numpy.where(at_vertex & (numpy.abs(other) > numpy.abs(cross)), other, cross)
+        signed[hit] = numpy.where(cross * self.orientation < 0, distance[first], -distance[first])
+        qx[hit] = nx[first]
+        qy[hit] = ny[first]
+        return signed, qx, qy
+    def _crosses(self, segment, px, py):
+        a = self._xy[segment - 1]
+        d = self._xy[segment] - a
+        length = numpy.hypot(d[:, 0], d[:, 1])
+        return (d[:, 0] * (py - a[:, 1]) - d[:, 1] * (px - a[:, 0])) / numpy.where(length > 0, length, 1.0)
+class MeshAnalysis(object):
+    """
+    Result of analyze_mesh: contact_ratio, backlash (minimum over the sweep, mm of arc on gear 1's
+    operating pitch circle, None when no flank came within reach), max_backlash, normal_backlash,
+    interference (deepest penetration, mm, 0.0 when clear) and interference_angles (gear 1
+    rotations, radians, of the steps that interfere).
+    """
+    __slots__ = ('center_distance', 'internal', 'operating_alpha', 'contact_ratio', 'backlash', 'max_backlash',
+                 'interference', 'interference_angles', 'steps')
+    def __init__(self, center_distance, internal, operating_alpha, ratio, backlash, max_backlash, interference,
+                 interference_angles, steps):
+        self.center_distance = center_distance
+        self.internal = internal
+        self.operating_alpha = operating_alpha
+        self.contact_ratio = ratio
+        self.backlash = backlash
+        self.max_backlash = max_backlash
+        self.interference = interference
+        self.interference_angles = interference_angles
+        self.steps = steps
+    @property
+    def normal_backlash(self):
+        return None if self.backlash is None else self.backlash * math.cos(self.operating_alpha)
+    @property
+    def interferes(self):
+        return self.interference > 0.0
+    def to_dict(self):
+        result = dict((name, getattr(self, name)) for name in self.__slots__)
+        result['normal_backlash'] = self.normal_backlash
+        return result
+def _window(points, center, low, high):
+    """Indices of the points within [low, high] of center."""
+    cx, cy = center
+    result = []
+    for i, (x, y) in enumerate(points):
+        if low <= math.hypot(x - cx, y - cy) <= high:
+            result.append(i)
+    return result
+def _longest(points):
+    return max(math.hypot(points[i][0] - points[i - 1][0], points[i][1] - points[i - 1][1]) for i in range(len(points)))
+def _segments(points, indices):
+    """Indices of the segments that start or end at the indexed points."""
+    n = len(points)
+    result = set()
+    for i in indices:
+        result.add(i)
+        result.add((i + 1) % n)
+    return sorted(result)
+def _to_local(x, y, rotation, offset):
+    # gear frame of a gear turned by rotation about offset
+    c = math.cos(-rotation)
+    s = math.sin(-rotation)
+    x -= offset[0]
+    y -= offset[1]
+    return x * c - y * s, x * s + y * c
+class _Probe(object):
+    """Outline points of one gear near the mesh, moved into the other gear's frame and measured against its grid."""
+    def __init__(self, points, indices, grid, band):
+        self.grid = grid
+        self.low_sq = max(band[0], 0.0) ** 2
+        self.high_sq = band[1] ** 2
+        if grid.use_numpy:
+            self.xy = numpy.array([points[i] for i in indices], dtype=float).reshape(-1, 2)
+        else:
+            self.xy = [points[i] for i in indices]
+    def measure(self, cos_a, sin_a, dx, dy):
+        """
+        (depth, ahead, behind) of the points turned by (cos_a, sin_a) and shifted by (dx, dy): the
+        deepest penetration and the smallest angles the grid's gear can turn either way (negative
+        when a point already penetrates on that side).
+        """
+        if self.grid.use_numpy:
+            return self._measure_numpy(cos_a, sin_a, dx, dy)
+        depth = 0.0
+        ahead = behind = float('inf')
+        for x, y in self.xy:
+            x, y = x * cos_a - y * sin_a + dx, x * sin_a + y * cos_a + dy
+            if not self.low_sq <= x * x + y * y <= self.high_sq:
+                continue
+            hit = self.grid.nearest(x, y)
+            if hit is None:
+                continue
+            distance, qx, qy = hit
+            if distance < 0.0:
+                depth = max(depth, -distance)
+            radius = math.hypot(qx, qy)
+            if distance == 0.0 or radius == 0.0:
+                continue
+            # share of the gap along the surface motion of the grid's gear when it turns; a
+            # penetrating point lies behind the surface, so its side flips with the sign
+            tangential = ((x - qx) * -qy + (y - qy) * qx) / (distance * radius)
+            if abs(tangential) < _RADIAL:
+                continue
+            play = distance / (abs(tangential) * radius)
+            if tangential > 0:
+                ahead = min(ahead, play)
+            else:
+                behind = min(behind, play)
+        return depth, ahead, behind
+    def _measure_numpy(self, cos_a, sin_a, dx, dy):
+        x = self.xy[:, 0] * cos_a - self.xy[:, 1] * sin_a + dx
+        y = self.xy[:, 0] * sin_a + self.xy[:, 1] * cos_a + dy
+        r_sq = x * x + y * y
+        band = (r_sq >= self.low_sq) & (r_sq <= self.high_sq)
+        x = x[band]
+        y = y[band]
+        distance, qx, qy = self.grid.query(x, y)
+        inside = distance < 0.0
+        depth = float(-distance[inside].min()) if inside.any() else 0.0
+        radius = numpy.hypot(qx, qy)
+        found = (distance != 0.0) & numpy.isfinite(distance) & (radius > 0.0)
+        x, y, qx, qy, distance, radius = x[found], y[found], qx[found], qy[found], distance[found], radius[found]
+        tangential = ((x - qx) * -qy + (y - qy) * qx) / (distance * radius)
+        play = distance / (numpy.abs(tangential) * radius)
+        usable = numpy.abs(tangential) >= _RADIAL
+        forward = play[usable & (tangential > 0)]
+        backward = play[usable & (tangential < 0)]
+        return (depth, float(forward.min()) if len(forward) else float('inf'),
+                float(backward.min()) if len(backward) else float('inf'))
+def analyze_mesh(profile_1, profile_2, center_distance=None, internal=None, steps=DEFAULT_STEPS, direction=0.0,
+                 phase=None, search_radius=None, tolerance=None, use_numpy=None):
+    """
+    Analyze gear 1 (external profile) meshing with gear 2 (external, or an internal ring when
+    internal, which defaults to profile_2's kind) at center_distance (default: the sum, ring: the
+    difference, of the shifted pitch radii). Gear 2 sits in direction (radians) from gear 1,
+    turned by phase (default: mesh_phase, teeth centered in the spaces); steps: rotations of
+    gear 1 over one angular pitch. Clearances beyond search_radius (default a quarter module)
+    are not resolved. Penetrations up to tolerance (default: the outlines' summed
+    max_chord_error) are polygon error and count as contact. Returns a MeshAnalysis.
+    """
+    p1 = profile_1['parameters']
+    p2 = profile_2['parameters']
+    if internal is None:
+        internal = getattr(profile_2, 'kind', 'external') == 'internal'
+    if center_distance is None:
+        center_distance = p2['pitch_radius'] - p1['pitch_radius'] if internal else p1['pitch_radius'] + p2['pitch_radius']
+    base_sum = p2['base_radius'] - p1['base_radius'] if internal else p1['base_radius'] + p2['base_radius']
+    operating_alpha = math.acos(min(1.0, base_sum / center_distance))
+    ratio = contact_ratio(p1, p2, center_distance, internal)
+    if phase is None:
+        phase = mesh_phase(p1, p2, internal, direction)
+    reach = float(search_radius or SEARCH_RADIUS * p1['m'])
+    if tolerance is None:
+        tolerance = p1.get('max_chord_error', 0.0) + p2.get('max_chord_error', 0.0)
+    z1 = int(p1['z'])
+    z2 = int(p2['z'])
+    points_1 = generate_full_gear_outline(profile_1)['points']
+    points_2 = generate_full_gear_outline(profile_2)['points']
+    center = (center_distance * math.cos(direction), center_distance * math.sin(direction))
+    # the points (and segments) of each gear that can come within reach of the other's teeth during the sweep
+    pitch_1 = 2.0 * math.pi / z1
+    outer_2 = max(p2['addendum_radius'], p2['dedendum_radius'])
+    inner_2 = min(p2['addendum_radius'], p2['dedendum_radius'])
+    margin_1 = reach + pitch_1 * p1['addendum_radius'] + _longest(points_1)
+    margin_2 = reach + pitch_1 * outer_2 * z1 / float(z2) + _longest(points_2)
+    near_1 = _window(points_1, center, inner_2 - margin_1, outer_2 + margin_1)
+    near_2 = _window(points_2, _to_local(0.0, 0.0, phase, center), 0.0, p1['addendum_radius'] + margin_2)
+    grid_1 = SegmentGrid(points_1, reach, True, _segments(points_1, near_1), use_numpy)
+    grid_2 = SegmentGrid(points_2, reach, not internal, _segments(points_2, near_2), use_numpy)
+    probe_2 = _Probe(points_2, near_2, grid_1, (p1['dedendum_radius'] - reach, p1['addendum_radius'] + reach))
+    probe_1 = _Probe(points_1, near_1, grid_2, (inner_2 - reach, outer_2 + reach))
+    sign = 1.0 if internal else -1.0
+    operating_radius = p1['base_radius'] / math.cos(operating_alpha)
+    backlashes = []
+    depth = 0.0
+    angles = []
+    for k in range(steps):
+        rotation_1 = pitch_1 * k / float(steps)
+        rotation_2 = phase + sign * rotation_1 * z1 / float(z2)
+        # gear 2 in gear 1's frame, and gear 1 in gear 2's frame for interference only
+        ox, oy = _to_local(center[0], center[1], rotation_1, (0.0, 0.0))
+        step_depth, ahead, behind = probe_2.measure(math.cos(rotation_2 - rotation_1), math.sin(rotation_2 - rotation_1),
+                                                    ox, oy)
+        lx, ly = _to_local(0.0, 0.0, rotation_2, center)
+        step_depth = max(step_depth, probe_1.measure(math.cos(rotation_1 - rotation_2), math.sin(rotation_1 - rotation_2),
+                                                     lx, ly)[0])
+        if step_depth > tolerance:
+            depth = max(depth, float(step_depth))
+            angles.append(rotation_1)
+        elif ahead != float('inf') and behind != float('inf'):
+            backlashes.append(float((ahead + behind) * operating_radius))
+    return MeshAnalysis(center_distance, internal, operating_alpha, ratio, min(backlashes) if backlashes else None,
+                        max(backlashes) if backlashes else None, depth, angles, steps)
+def analyze_pair(pair, steps=DEFAULT_STEPS, search_radius=None, tolerance=None):
+    """analyze_mesh of a gear_pair.GearPair as placed (its solved center distance, direction and phase)."""
+    return analyze_mesh(pair.profile_1, pair.profile_2, pair.solution.center_distance, pair.internal, steps,
+                        pair.direction, pair.phase, search_radius, tolerance)
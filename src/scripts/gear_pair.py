@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+"""
+Meshing gear pairs and planetary sets for py-gear.
+A py-gear profile shift is a radial offset (mm) of the pitch circle, and the tooth is half the
+circular pitch thick on the shifted circle, so gear i has its own pressure angle a_i at that
+circle (cos a_i = base radius / shifted pitch radius). Two such gears mesh without backlash at
+center distance A when
+    external: z1 inv(a1) + z2 inv(a2) = (z2 + z1) inv(aw)      cos(aw) = (rb1 + rb2) / A
+    internal: z2 inv(a2) - z1 inv(a1) = (z2 - z1) inv(aw)      cos(aw) = (rb2 - rb1) / A
+with aw the operating pressure angle. The default split gives both gears a_i = aw, i.e.
+shifted pitch radii in the tooth ratio, which also keeps the 0.25 m tip clearance on both
+sides; a given shift_1 is matched by solving the equation for gear 2's shift, and
+shift_1='balanced' picks the split that equalizes the specific sliding at both roots.
+Gear 1 sits at the origin as generated; gear 2 sits at center_distance in the given direction,
+turned by the returned phase so that its teeth fall into gear 1's spaces. Headless.
+"""
+import math
+from gear_geometry import (involute_function, inverse_involute, profile_cache, contact_ratio, get_array_backend,
+                           INVERSE_INVOLUTE_STEPS, _ScalarOps, _involute_of, _inverse_involute)
+BALANCE_ITERATIONS = 60
+class MeshSolution(object):
+    """Operating geometry of a gear pair: center distance, operating pressure angle and the two shifts (mm)."""
+    __slots__ = ('z1', 'z2', 'm', 'alpha_deg', 'internal', 'center_distance', 'operating_alpha',
+                 'shift_1', 'shift_2', 'tip_clearance_1', 'tip_clearance_2')
+    def __init__(self, z1, z2, m, alpha_deg, internal, center_distance, operating_alpha, shift_1, shift_2):
+        self.z1 = z1
+        self.z2 = z2
+        self.m = m
+        self.alpha_deg = alpha_deg
+        self.internal = internal
+        self.center_distance = center_distance
+        self.operating_alpha = operating_alpha
+        self.shift_1 = shift_1
+        self.shift_2 = shift_2
+        r1 = m * z1 / 2.0 + shift_1
+        r2 = m * z2 / 2.0 + shift_2
+        if internal:
+            self.tip_clearance_1 = (r2 + 1.25 * m) - (center_distance + r1 + m)
+            self.tip_clearance_2 = (r2 - m) - (center_distance + r1 - 1.25 * m)
+        else:
+            self.tip_clearance_1 = center_distance - (r1 + m) - (r2 - 1.25 * m)
+            self.tip_clearance_2 = center_distance - (r2 + m) - (r1 - 1.25 * m)
+    @property
+    def operating_alpha_deg(self):
+        return math.degrees(self.operating_alpha)
+    def to_dict(self):
+        result = dict((name, getattr(self, name)) for name in self.__slots__)
+        result['operating_alpha_deg'] = self.operating_alpha_deg
+        return result
+def _check_pair(z1, z2, m, internal):
+    if int(z1) != z1 or int(z2) != z2 or z1 < 1 or z2 < 1:
+        raise ValueError("Tooth counts must be positive integers, got %r and %r." % (z1, z2))
+    if m <= 0:
+        raise ValueError("Module must be positive, got %g." % m)
+    if internal and z2 <= z1:
+        raise ValueError("The ring gear needs more teeth than the pinion, got %d and %d." % (z1, z2))
+def _shifted_alpha(base_radius, pitch_radius, label):
+    if pitch_radius < base_radius:
+        raise ValueError("Shifted pitch radius %g of %s is smaller than its base radius %g." % (pitch_radius, label, base_radius))
+    return math.acos(base_radius / pitch_radius)
+def solve_mesh(z1, z2, m, alpha_deg, center_distance=None, internal=False, shift_1=None):
+    """
+    MeshSolution of gear 1 (external) with gear 2 (external, or an internal ring around gear 1).
+    center_distance: target distance (default: the unshifted one, m (z2 +/- z1) / 2);
+    shift_1: gear 1's shift in mm (default: the split that puts both gears at the operating
+    pressure angle; 'balanced': balanced_shift_split()). Raises ValueError when the gears cannot mesh at that distance.
+    """
+    _check_pair(z1, z2, m, internal)
+    if shift_1 == 'balanced':
+        shift_1, _, _ = balanced_shift_split(z1, z2, m, alpha_deg, center_distance, internal, 'math')
+        shift_1 = shift_1[0]
+        if shift_1 != shift_1:
+            raise ValueError("No balanced shift split for %d and %d teeth at center distance %g." % (z1, z2, center_distance))
+    alpha = math.radians(alpha_deg)
+    sign = -1 if internal else 1
+    rb1 = m * z1 * math.cos(alpha) / 2.0
+    rb2 = m * z2 * math.cos(alpha) / 2.0
+    if center_distance is None:
+        center_distance = m * (z2 + sign * z1) / 2.0
+    cos_operating = (rb2 + sign * rb1) / center_distance if center_distance > 0 else 2.0
+    if cos_operating > 1.0:
+        raise ValueError("Center distance %g is smaller than the %s of the base radii (%g)."
+                         % (center_distance, 'difference' if internal else 'sum', rb2 + sign * rb1))
+    operating_alpha = math.acos(cos_operating)
+    if shift_1 is None:
+        shift_1 = rb1 / cos_operating - m * z1 / 2.0
+        shift_2 = rb2 / cos_operating - m * z2 / 2.0
+    else:
+        alpha_1 = _shifted_alpha(rb1, m * z1 / 2.0 + shift_1, 'gear 1')
+        inv_2 = ((z2 + sign * z1) * involute_function(operating_alpha) - sign * z1 * involute_function(alpha_1)) / z2
+        if inv_2 < 0:
+            raise ValueError("Gear 1 shift %g leaves no valid shift for gear 2 at center distance %g." % (shift_1, center_distance))
+        shift_2 = rb2 / math.cos(inverse_involute(inv_2)) - m * z2 / 2.0
+    return MeshSolution(z1, z2, m, alpha_deg, internal, center_distance, operating_alpha, shift_1, shift_2)
+def _balanced_split(xp, z1, z2, m, alpha, center_distance, internal, iterations):
+    sign = -1.0 if internal else 1.0
+    r1 = m * z1 / 2.0
+    r2 = m * z2 / 2.0
+    rb1 = r1 * xp.cos(alpha)
+    rb2 = r2 * xp.cos(alpha)
+    rb_w = rb2 + sign * rb1
+    line = xp.sqrt(xp.maximum(center_distance * center_distance - rb_w * rb_w, 0.0))
+    inv_w = (z2 + sign * z1) * _involute_of(xp, xp.arccos(xp.minimum(rb_w / center_distance, 1.0)))
+    tiny = 1e-12 * m
+    def evaluate(shift_1):
+        p1 = r1 + shift_1
+        inv_1 = _involute_of(xp, xp.arccos(xp.minimum(rb1 / p1, 1.0)))
+        inv_2 = xp.maximum((inv_w - sign * z1 * inv_1) / z2, 0.0)
+        p2 = rb2 / xp.cos(_inverse_involute(xp, inv_2, INVERSE_INVOLUTE_STEPS))
+        # roll lengths along the line of action of each tip contact and of the root point it meets
+        tip_1 = xp.sqrt(xp.maximum((p1 + m) ** 2 - rb1 * rb1, 0.0))
+        tip_2 = xp.sqrt(xp.maximum((p2 + sign * m) ** 2 - rb2 * rb2, 0.0))
+        root_1 = tip_2 - line if internal else line - tip_2
+        root_2 = tip_1 + line if internal else line - tip_1
+        sliding_1 = 1.0 - z1 * tip_2 / (z2 * xp.maximum(root_1, tiny))
+        sliding_2 = 1.0 - z2 * tip_1 / (z1 * xp.maximum(root_2, tiny))
+        return p2 - r2, sliding_1, sliding_2
+    low = rb1 - r1 + tiny
+    if internal:
+        high = low + center_distance + 4.0 * m
+    else:
+        # beyond this shift gear 2 would need a pressure angle below zero
+        high = rb1 / xp.cos(_inverse_involute(xp, inv_w / z1, INVERSE_INVOLUTE_STEPS)) - r1 - tiny
+    _, sliding_1, sliding_2 = evaluate(low)
+    low_sign = sliding_1 < sliding_2
+    _, sliding_1, sliding_2 = evaluate(high)
+    bracketed = low_sign & (sliding_1 >= sliding_2)
+    for _ in range(iterations):
+        middle = 0.5 * (low + high)
+        _, sliding_1, sliding_2 = evaluate(middle)
+        below = sliding_1 < sliding_2
+        low = xp.where(below, middle, low)
+        high = xp.where(below, high, middle)
+    shift_1 = 0.5 * (low + high)
+    shift_2, sliding_1, sliding_2 = evaluate(shift_1)
+    nan = float('nan')
+    return xp.where(bracketed, shift_1, nan), xp.where(bracketed, shift_2, nan), xp.where(bracketed, sliding_1, nan)
+def balanced_shift_split(z1, z2, m, alpha_deg, center_distance=None, internal=False, backend=None,
+                         iterations=BALANCE_ITERATIONS):
+    """
+    Shift split (shift_1, shift_2, mm) that makes the specific sliding at the root of gear 1
+    equal to that at the root of gear 2, for whole arrays of pairs at once; returns
+    (shift_1, shift_2, specific_sliding) as numpy arrays (lists with the math backend), NaN
+    where no split keeps both roots clear of the mating tips. Arguments broadcast against
+    each other; center_distance defaults to m (z2 +/- z1) / 2. Tip clearances and pointed
+    tips are not constrained: check them with solve_mesh(..., shift_1=...).
+    """
+    bk = get_array_backend(backend)
+    if bk.name == 'numpy':
+        import numpy
+        z1, z2, m, alpha_deg = numpy.broadcast_arrays(*[numpy.asarray(v, dtype=float) for v in (z1, z2, m, alpha_deg)])
+        if center_distance is None:
+            center_distance = m * (z2 - z1 if internal else z2 + z1) / 2.0
+        return _balanced_split(numpy, z1, z2, m, numpy.radians(alpha_deg), numpy.asarray(center_distance, dtype=float),
+                               internal, iterations)
+    columns = []
+    for value in (z1, z2, m, alpha_deg, center_distance):
+        columns.append(list(value) if isinstance(value, (list, tuple)) else value)
+    count = max([len(v) for v in columns if isinstance(v, list)] or [1])
+    columns = [v if isinstance(v, list) else [v] * count for v in columns]
+    results = ([], [], [])
+    for a, b, module, angle, distance in zip(*columns):
+        if distance is None:
+            distance = module * (b - a if internal else b + a) / 2.0
+        for result, value in zip(results, _balanced_split(_ScalarOps, float(a), float(b), float(module), math.radians(angle),
+                                                          float(distance), internal, iterations)):
+            result.append(value)
+    return results
+def tooth_center_angle(parameters):
+    """Polar angle of the center line of the generated tooth (external) or tooth space (internal) of a profile."""
+    alpha_shifted = math.acos(parameters['base_radius'] / parameters['pitch_radius'])
+    return -math.pi / (2.0 * parameters['z']) - involute_function(alpha_shifted)
+def mesh_phase(parameters_1, parameters_2, internal=False, direction=0.0, rotation_1=0.0):
+    """
+    Rotation (radians, in [0, 2 pi / z2)) that meshes gear 2, centered at direction (radians) from
+    gear 1, with gear 1 turned by rotation_1. Both profiles come from the MeshSolution's shifts.
+    """
+    z1 = parameters_1['z']
+    z2 = parameters_2['z']
+    c1 = tooth_center_angle(parameters_1)
+    c2 = tooth_center_angle(parameters_2)
+    if internal:
+        # a pinion tooth and a ring space both centered on the far side of the pinion
+        aligned_1 = direction + math.pi - c1
+        aligned_2 = direction + math.pi - c2
+        rotation = aligned_2 + (rotation_1 - aligned_1) * z1 / float(z2)
+    else:
+        # a tooth of gear 1 pointing at gear 2, a space of gear 2 pointing back
+        aligned_1 = direction - c1
+        aligned_2 = direction + math.pi - c2 - math.pi / z2
+        rotation = aligned_2 - (rotation_1 - aligned_1) * z1 / float(z2)
+    return rotation % (2.0 * math.pi / z2)
+def _profiles(cache, specs, backend, tolerance, num_points):
+    """Generate (kind, z, shift, thickness) specs once each; equal specs share one profile."""
+    generated = {}
+    profiles = []
+    for kind, z, m, alpha_deg, shift, thickness in specs:
+        key = (kind, z, round(shift, 12), thickness)
+        if key not in generated:
+            kwargs = {'backend': backend, 'tolerance': tolerance}
+            if num_points is not None:
+                kwargs['num_points'] = num_points[kind]
+            if kind == 'internal':
+                generated[key] = cache.internal(z, m, alpha_deg, thickness, shift, **kwargs)
+            else:
+                generated[key] = cache.external(z, m, alpha_deg, shift, **kwargs)
+        profiles.append(generated[key])
+    return profiles
+class GearPair(object):
+    """
+    Two meshing gears: solution (MeshSolution), profile_1 / profile_2 (GearProfiles with the
+    solved shifts), and the placement of gear 2 relative to gear 1 at the origin.
+    """
+    def __init__(self, solution, profile_1, profile_2, direction, phase):
+        self.solution = solution
+        self.profile_1 = profile_1
+        self.profile_2 = profile_2
+        self.direction = direction
+        self.phase = phase
+    @property
+    def internal(self):
+        return self.solution.internal
+    def contact_ratio(self):
+        return contact_ratio(self.profile_1['parameters'], self.profile_2['parameters'],
+                             self.solution.center_distance, self.internal)
+    def placements(self, origin=(0.0, 0.0)):
+        """[(offset, rotation), ...] of gear 1 and gear 2 with gear 1 centered at origin."""
+        a = self.solution.center_distance
+        ox, oy = origin
+        return [((ox, oy), 0.0),
+                ((ox + a * math.cos(self.direction), oy + a * math.sin(self.direction)), self.phase)]
+    def add_to(self, transaction, names, plane, origin=(0.0, 0.0), full_outline=False):
+        """Queue both gears, placed and phased, on a gear_batch.GearTransaction; returns the two GearJobs."""
+        return _add_gears(transaction, names, plane, zip((self.profile_1, self.profile_2), self.placements(origin)),
+                          full_outline)
+def _add_gears(transaction, names, plane, placed_profiles, full_outline):
+    jobs = []
+    for name, (profile, (offset, rotation)) in zip(names, placed_profiles):
+        p = profile['parameters']
+        internal = profile.kind == 'internal'
+        thickness = math.hypot(*profile.point('external_arc', 0)) - p['dedendum_radius'] if internal else 10.0
+        jobs.append(transaction.add(name, plane, p['z'], p['m'], p['alpha_deg'], p['profile_shift'], thickness, internal,
+                                    False, full_outline, offset, profile, None, rotation))
+    return jobs
+def generate_gear_pair(z1, z2, m, alpha_deg, center_distance=None, internal=False, shift_1=None, rim_thickness=10.0,
+                       direction=0.0, backend=None, tolerance=None, num_points=None, cache=profile_cache):
+    """
+    Solve the mesh of z1 with z2 (an internal ring when internal is set) at center_distance and
+    generate both profiles with the solved shifts; returns a GearPair. rim_thickness: ring rim
+    beyond its dedendum circle; num_points: {'external': [...], 'internal': [...]} overrides.
+    """
+    solution = solve_mesh(z1, z2, m, alpha_deg, center_distance, internal, shift_1)
+    bk = get_array_backend(backend)
+    profile_1, profile_2 = _profiles(cache, [
+        ('external', z1, m, alpha_deg, solution.shift_1, None),
+        ('internal' if internal else 'external', z2, m, alpha_deg, solution.shift_2, rim_thickness if internal else None),
+    ], bk, tolerance, num_points)
+    phase = mesh_phase(profile_1['parameters'], profile_2['parameters'], internal, direction)
+    return GearPair(solution, profile_1, profile_2, direction, phase)
+class PlanetarySet(object):
+    """
+    Sun, equally spaced planets and ring around the origin. sun_mesh / ring_mesh are the
+    sun-planet and planet-ring MeshSolutions; every planet shares one profile.
+    """
+    def __init__(self, sun_mesh, ring_mesh, sun, planet, ring, planets, planet_rotations, ring_rotation):
+        self.sun_mesh = sun_mesh
+        self.ring_mesh = ring_mesh
+        self.sun = sun
+        self.planet = planet
+        self.ring = ring
+        self.planets = planets
+        self.planet_rotations = planet_rotations
+        self.ring_rotation = ring_rotation
+    @property
+    def center_distance(self):
+        return self.sun_mesh.center_distance
+    def placements(self, origin=(0.0, 0.0)):
+        """[(offset, rotation), ...] of the sun, every planet and the ring."""
+        a = self.center_distance
+        ox, oy = origin
+        result = [((ox, oy), 0.0)]
+        for k, rotation in enumerate(self.planet_rotations):
+            angle = 2.0 * math.pi * k / self.planets
+            result.append(((ox + a * math.cos(angle), oy + a * math.sin(angle)), rotation))
+        result.append(((ox, oy), self.ring_rotation))
+        return result
+    def add_to(self, transaction, names, plane, origin=(0.0, 0.0), full_outline=False):
+        """Queue sun, planets and ring on a GearTransaction; names: one per gear in placements() order."""
+        profiles = [self.sun] + [self.planet] * self.planets + [self.ring]
+        return _add_gears(transaction, names, plane, zip(profiles, self.placements(origin)), full_outline)
+def generate_planetary(z_sun, z_planet, z_ring, m, alpha_deg, planets=3, center_distance=None, rim_thickness=10.0,
+                       backend=None, tolerance=None, num_points=None, cache=profile_cache):
+    """
+    Solve and generate a planetary set. The sun-planet mesh uses the default split at
+    center_distance (default m (z_sun + z_planet) / 2) and the ring shift is solved for the
+    resulting planet, so z_ring need not be z_sun + 2 z_planet. Planets are equally spaced,
+    which needs (z_sun + z_ring) divisible by planets; returns a PlanetarySet.
+    """
+    if planets < 1 or (z_sun + z_ring) % planets:
+        raise ValueError("%d planets cannot be equally spaced: z_sun + z_ring = %d is not a multiple of it."
+                         % (planets, z_sun + z_ring))
+    sun_mesh = solve_mesh(z_sun, z_planet, m, alpha_deg, center_distance)
+    ring_mesh = solve_mesh(z_planet, z_ring, m, alpha_deg, sun_mesh.center_distance, True, sun_mesh.shift_2)
+    planet_tip_radius = m * z_planet / 2.0 + sun_mesh.shift_2 + m
+    if planets > 1 and sun_mesh.center_distance * math.sin(math.pi / planets) <= planet_tip_radius:
+        raise ValueError("%d planets of %d teeth collide at center distance %g." % (planets, z_planet, sun_mesh.center_distance))
+    bk = get_array_backend(backend)
+    sun, planet, ring = _profiles(cache, [
+        ('external', z_sun, m, alpha_deg, sun_mesh.shift_1, None),
+        ('external', z_planet, m, alpha_deg, sun_mesh.shift_2, None),
+        ('internal', z_ring, m, alpha_deg, ring_mesh.shift_2, rim_thickness),
+    ], bk, tolerance, num_points)
+    planet_rotations = []
+    for k in range(planets):
+        angle = 2.0 * math.pi * k / planets
+        planet_rotations.append(mesh_phase(sun['parameters'], planet['parameters'], False, angle))
+    # the ring center (the origin) lies opposite the sun-facing side of planet 0
+    ring_rotation = mesh_phase(planet['parameters'], ring['parameters'], True, math.pi, planet_rotations[0])
+    return PlanetarySet(sun_mesh, ring_mesh, sun, planet, ring, planets, planet_rotations, ring_rotation)
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+Debounced live preview of the gear dialog's current parameters.
+request() is called on every control change. poll() runs the newest request only once the
+edits have paused for debounce seconds, and a computation that a newer request overtakes is
+dropped. The full outline is patterned once per (kind, z, alpha, shift/m) at module 1 and
+kept in an LRU cache. A change of module only rescales that outline, and the internal rim
+thickness is never part of it. The result is a flat polyline ready for a preview panel,
+with the gear_validate verdict on the outline cached alongside it.
+Headless: no .NET imports.
+"""
+import time
+from array import array
+from collections import OrderedDict
+from gear_geometry import (generate_external_tooth_profile, generate_internal_tooth_profile,
+                           generate_full_gear_outline, get_array_backend)
+from gear_validate import validate_profile
+try:
+    import numpy
+except ImportError:
+    numpy = None
+_timer = getattr(time, 'perf_counter', time.time)
+_DEFAULT_REQUEST = {
+    'kind': 'external',
+    'z': 20,
+    'm': 2.0,
+    'alpha_deg': 20.0,
+    'profile_shift': 0.0,
+    'thickness': 10.0,
+    'undercut_auto_suppress': False,
+}
+class Preview(object):
+    """
+    Closed outline polyline (flat x, y array('d'), first point not repeated) and its circles;
+    warning: what gear_validate found wrong with the outline, None when it is valid.
+    """
+    __slots__ = ('points', 'rim_radius', 'pitch_radius', 'radius', 'parameters', 'generation', 'seconds', 'warning')
+    def __init__(self, points, rim_radius, pitch_radius, radius, parameters, generation, seconds, warning=None):
+        self.points = points
+        self.rim_radius = rim_radius
+        self.pitch_radius = pitch_radius
+        self.radius = radius
+        self.parameters = parameters
+        self.generation = generation
+        self.seconds = seconds
+        self.warning = warning
+    def __len__(self):
+        return len(self.points) // 2
+    def screen_transform(self, width, height, margin=4):
+        """(center_x, center_y, pixels per mm) fitting the preview into a width x height panel."""
+        scale = max(1.0, min(width, height) / 2.0 - margin) / self.radius
+        return width / 2.0, height / 2.0, scale
+    def screen_points(self, width, height, margin=4):
+        """Outline in panel pixels (y down) as [(x, y), ...], consecutive duplicate pixels dropped."""
+        cx, cy, scale = self.screen_transform(width, height, margin)
+        flat = self.points
+        pixels = []
+        last = None
+        for i in range(0, len(flat), 2):
+            pixel = (int(round(cx + flat[i] * scale)), int(round(cy - flat[i + 1] * scale)))
+            if pixel != last:
+                pixels.append(pixel)
+                last = pixel
+        if len(pixels) > 1 and pixels[-1] == pixels[0]:
+            pixels.pop()
+        return pixels
+def _scaled(flat, factor):
+    if factor == 1.0:
+        return flat
+    if numpy is not None:
+        scaled = array('d')
+        data = (numpy.frombuffer(flat, dtype=float) * factor).tobytes()
+        getattr(scaled, 'frombytes', getattr(scaled, 'fromstring', None))(data)
+        return scaled
+    return array('d', [c * factor for c in flat])
+class PreviewEngine(object):
+    """
+    Headless preview computation for the gear dialog.
+    debounce: quiet time (s) before a request is computed; budget: target seconds per update,
+    updates slower than it are counted in stats()['over_budget']; clock: time source, so the
+    debounce can be driven by a fake clock.
+    """
+    def __init__(self, debounce=0.15, budget=0.005, max_entries=32, backend=None, clock=None):
+        self.debounce = debounce
+        self.budget = budget
+        self.max_entries = max_entries
+        self.backend = backend
+        self.clock = clock or _timer
+        self.generation = 0
+        self.last = None
+        self.error = None
+        self.requested = dict(_DEFAULT_REQUEST)
+        self._pending = None
+        self._requested_at = None
+        self._outlines = OrderedDict()
+        self.updates = 0
+        self.stale = 0
+        self.over_budget = 0
+        self.hits = 0
+        self.misses = 0
+        self.total_seconds = 0.0
+        self.last_seconds = 0.0
+    def request(self, **parameters):
+        """Queue new dialog values (missing keys keep their previous values); supersedes any pending request."""
+        merged = dict(self.requested)
+        merged.update(parameters)
+        self.requested = merged
+        self.generation += 1
+        self._pending = merged
+        self._requested_at = self.clock()
+        return self.generation
+    @property
+    def pending(self):
+        return self._pending is not None
+    def cancel(self):
+        """Drop the pending request and invalidate any computation in flight."""
+        self.generation += 1
+        self._pending = None
+    def poll(self, now=None):
+        """
+        Compute the pending request once it is debounce seconds old; returns the new Preview or None.
+        Invalid gear parameters give None and leave their message in error (cleared by the next success).
+        """
+        if self._pending is None:
+            return None
+        now = self.clock() if now is None else now
+        if now - self._requested_at < self.debounce:
+            return None
+        parameters = self._pending
+        self._pending = None
+        if self.last is not None and parameters == self.last.parameters and self.error is None:
+            return None
+        try:
+            preview = self.compute(parameters, self.generation)
+        except (ValueError, ZeroDivisionError) as ex:
+            self.error = str(ex)
+            return None
+        if preview is not None:
+            self.error = None
+        return preview
+    def compute(self, parameters, generation=None):
+        """
+        Build the Preview of parameters now. Returns None (and counts it as stale) when a newer
+        request arrived while computing, e.g. with compute() driven from a worker thread.
+        """
+        started = _timer()
+        generation = self.generation if generation is None else generation
+        p = dict(_DEFAULT_REQUEST)
+        p.update(parameters)
+        kind = p['kind']
+        z = int(p['z'])
+        m = float(p['m'])
+        bk = get_array_backend(self.backend)
+        unit_flat, unit_parameters, warning = self._unit_outline(kind, z, float(p['alpha_deg']), float(p['profile_shift']) / m,
+                                                        bool(p['undercut_auto_suppress']), bk)
+        if generation != self.generation:
+            self.stale += 1
+            return None
+        if self._scales_exactly(kind, unit_parameters, m):
+            flat = _scaled(unit_flat, m)
+            dedendum_radius = unit_parameters['dedendum_radius'] * m
+            addendum_radius = unit_parameters['addendum_radius'] * m
+            pitch_radius = unit_parameters['pitch_radius'] * m
+        else:
+            flat, direct, warning = self._outline(kind, z, m, float(p['alpha_deg']), float(p['profile_shift']),
+                                         bool(p['undercut_auto_suppress']), bk)
+            dedendum_radius = direct['dedendum_radius']
+            addendum_radius = direct['addendum_radius']
+            pitch_radius = direct['pitch_radius']
+        if generation != self.generation:
+            self.stale += 1
+            return None
+        rim_radius = dedendum_radius + float(p['thickness']) if kind == 'internal' else None
+        radius = rim_radius if rim_radius is not None else max(addendum_radius, dedendum_radius)
+        seconds = _timer() - started
+        self.last = Preview(flat, rim_radius, pitch_radius, radius, p, generation, seconds, warning)
+        self.updates += 1
+        self.last_seconds = seconds
+        self.total_seconds += seconds
+        if seconds > self.budget:
+            self.over_budget += 1
+        return self.last
+    def _scales_exactly(self, kind, unit_parameters, m):
+        # same dedendum clamp test as UnitProfileStore: the 0.01 mm floor does not scale with m
+        unit_dedendum = unit_parameters['pitch_radius'] + (1.25 if kind == 'internal' else -1.25)
+        return unit_dedendum > 0.01 and unit_dedendum * m > 0.01
+    def _outline(self, kind, z, m, alpha_deg, profile_shift, undercut_auto_suppress, bk):
+        if kind == 'internal':
+            profile = generate_internal_tooth_profile(z, m, alpha_deg, m, profile_shift, undercut_auto_suppress, backend=bk)
+        else:
+            profile = generate_external_tooth_profile(z, m, alpha_deg, profile_shift, undercut_auto_suppress, backend=bk)
+        flat = array('d')
+        bk.pack(flat, generate_full_gear_outline(profile, bk)['points'])
+        report = validate_profile(profile, bk)
+        return flat, profile.parameters, None if report.valid else report.message()
+    def _unit_outline(self, kind, z, alpha_deg, shift_ratio, undercut_auto_suppress, bk):
+        key = (kind, z, round(alpha_deg, 9), round(shift_ratio, 9), undercut_auto_suppress, bk.name)
+        entry = self._outlines.pop(key, None)
+        if entry is None:
+            self.misses += 1
+            entry = self._outline(kind, z, 1.0, alpha_deg, shift_ratio, undercut_auto_suppress, bk)
+        else:
+            self.hits += 1
+        self._outlines[key] = entry
+        while len(self._outlines) > self.max_entries:
+            self._outlines.popitem(last=False)
+        return entry
+    def stats(self):
+        return {
+            'updates': self.updates,
+            'stale': self.stale,
+            'over_budget': self.over_budget,
+            'budget_seconds': self.budget,
+            'last_seconds': self.last_seconds,
+            'mean_seconds': self.total_seconds / self.updates if self.updates else 0.0,
+            'outline_hits': self.hits,
+            'outline_misses': self.misses,
+        }
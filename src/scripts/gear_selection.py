@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+Selection tracking for the gear dialog's plane picker.
+SelectionTracker replaces the walk over SelectedObjects that used to run on every 100 ms
+timer tick. A tick first reads a cheap fingerprint of the selection (the keys of every item
+of a small selection) and only walks the items when that fingerprint changes. While the
+selection stays the same the poll interval backs off. All session access goes through a
+source object that counts its COM calls, so FakeSession can drive the tracker without Alibre.
+"""
+class SessionSelectionSource(object):
+    """
+    Selection of an AlibreX session: session.SelectedObjects with Count / Item(i), whose items
+    expose DisplayName and Target (GetType().Name or Type, and Name). calls counts every
+    property read or method call made on the COM objects.
+    """
+    def __init__(self, session):
+        self.session = session
+        self.calls = 0
+    def selection(self):
+        self.calls += 1
+        return getattr(self.session, 'SelectedObjects', None)
+    def count(self, selection):
+        self.calls += 1
+        return int(selection.Count)
+    def item(self, selection, index):
+        self.calls += 1
+        return selection.Item(index)
+    def key(self, item):
+        """Stable identity of a selected item for change detection."""
+        self.calls += 1
+        try:
+            return str(item.DisplayName)
+        except Exception:
+            return id(item)
+    def target_type(self, item):
+        """(target, upper-case type name) of a selected item."""
+        self.calls += 1
+        target = getattr(item, 'Target', None)
+        if target is None:
+            return None, ''
+        self.calls += 1
+        try:
+            return target, str(target.GetType().Name).upper()
+        except Exception:
+            self.calls += 1
+            try:
+                return target, str(target.Type).upper()
+            except Exception:
+                return target, ''
+    def name(self, target, item):
+        self.calls += 1
+        try:
+            return str(target.Name)
+        except Exception:
+            self.calls += 1
+            return str(getattr(item, 'DisplayName', 'Plane'))
+class SelectionTracker(object):
+    """
+    Finds the first selected object whose type name contains type_filter ('PLANE').
+    poll() returns (name, item) when the selection changed and holds a match, otherwise None.
+    interval_ms is the delay to wait before the next poll: base_interval after a change,
+    growing by backoff (up to max_interval) once idle_ticks polls in a row saw no change.
+    The fingerprint holds the DisplayName keys of all items while there are at most full_keys of
+    them; a larger selection is fingerprinted by its count and first, middle and last keys, so
+    swapping another of its items for one with the same count goes unnoticed.
+    """
+    def __init__(self, source, type_filter='PLANE', base_interval=100, max_interval=1000, backoff=1.5, idle_ticks=5,
+                 full_keys=16):
+        self.source = source
+        self.type_filter = type_filter
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.idle_ticks = idle_ticks
+        self.full_keys = full_keys
+        self.interval_ms = base_interval
+        self.ticks = 0
+        self.walks = 0
+        self.total_calls = 0
+        self.last_tick_calls = 0
+        self._fingerprint = None
+        self._unchanged = 0
+    def reset(self):
+        """Forget the last selection, so the next poll walks it again, and restart at base_interval."""
+        self._fingerprint = None
+        self.wake()
+    def wake(self):
+        """Poll at base_interval again, e.g. when the list gets the focus."""
+        self._unchanged = 0
+        self.interval_ms = self.base_interval
+    def fingerprint(self, selection):
+        source = self.source
+        count = source.count(selection)
+        if count <= self.full_keys:
+            indices = range(count)
+        else:
+            indices = (0, count // 2, count - 1)
+        return (count,) + tuple(source.key(source.item(selection, index)) for index in indices)
+    def poll(self):
+        source = self.source
+        calls = source.calls
+        try:
+            return self._poll()
+        finally:
+            self.ticks += 1
+            self.last_tick_calls = source.calls - calls
+            self.total_calls += self.last_tick_calls
+    def _poll(self):
+        source = self.source
+        selection = source.selection()
+        if selection is None:
+            self._idle()
+            return None
+        fingerprint = self.fingerprint(selection)
+        if fingerprint == self._fingerprint:
+            self._idle()
+            return None
+        self._fingerprint = fingerprint
+        self.wake()
+        self.walks += 1
+        for index in range(fingerprint[0]):
+            item = source.item(selection, index)
+            target, type_name = source.target_type(item)
+            if target is not None and self.type_filter in type_name:
+                return source.name(target, item), item
+        return None
+    def _idle(self):
+        self._unchanged += 1
+        if self._unchanged >= self.idle_ticks:
+            self.interval_ms = min(self.max_interval, int(self.interval_ms * self.backoff))
+    def stats(self):
+        return {
+            'ticks': self.ticks,
+            'walks': self.walks,
+            'total_calls': self.total_calls,
+            'last_tick_calls': self.last_tick_calls,
+            'calls_per_tick': float(self.total_calls) / self.ticks if self.ticks else 0.0,
+            'interval_ms': self.interval_ms,
+        }
+class _FakeType(object):
+    def __init__(self, name):
+        self.Name = name
+class FakeTarget(object):
+    """Selectable design object with a .NET-like GetType().Name."""
+    def __init__(self, name, type_name='ADPlane'):
+        self.Name = name
+        self._type = _FakeType(type_name)
+    def GetType(self):
+        return self._type
+class FakeSelectedObject(object):
+    def __init__(self, name, type_name='ADPlane'):
+        self.DisplayName = name
+        self.Target = FakeTarget(name, type_name)
+class FakeSelection(object):
+    def __init__(self, items):
+        self.items = list(items)
+    @property
+    def Count(self):
+        return len(self.items)
+    def Item(self, index):
+        return self.items[index]
+class FakeSession(object):
+    """
+    Stand-in for an Alibre session: select() replaces SelectedObjects with FakeSelectedObjects
+    made from names or (name, type_name) pairs.
+    """
+    def __init__(self):
+        self.SelectedObjects = FakeSelection([])
+    def select(self, *objects):
+        items = []
+        for obj in objects:
+            if isinstance(obj, tuple):
+                items.append(FakeSelectedObject(*obj))
+            else:
+                items.append(FakeSelectedObject(obj))
+        self.SelectedObjects = FakeSelection(items)
@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+"""
+Sketch emission for py-gear: the SketchEmitter queue, the RecordingSketch backend and the
+functions that draw tooth profiles and full outlines into an AlibreScript sketch. Only the
+AddBspline / AddArcCenterStartEnd / AddLine / AddCircle sketch calls are used, so the module
+imports nothing from .NET and runs against a RecordingSketch outside Alibre.
+"""
+import math
+import time
+from array import array
+from gear_geometry import profile_cache, generate_full_gear_outline, outline_segment_points
+from gear_trace import instrumentation, log, debug_enabled
+_timer = getattr(time, 'perf_counter', time.time)
+_POINT_COORDINATES = {'AddArcCenterStartEnd': 6, 'AddLine': 4, 'AddCircle': 2}
+def transform_entity(method, args, dx, dy, angle=0.0):
+    """Arguments of a queued entity call rotated by angle (radians) about the origin, then moved by (dx, dy)."""
+    if method == 'AddBspline':
+        coordinates = list(args[0])
+    else:
+        coordinates = list(args[:_POINT_COORDINATES[method]])
+    xs = coordinates[0::2]
+    ys = coordinates[1::2]
+    if angle:
+        c = math.cos(angle)
+        s = math.sin(angle)
+        xs, ys = [x * c - y * s for x, y in zip(xs, ys)], [x * s + y * c for x, y in zip(xs, ys)]
+    coordinates[0::2] = [x + dx for x in xs]
+    coordinates[1::2] = [y + dy for y in ys]
+    if method == 'AddBspline':
+        return (coordinates,) + tuple(args[1:])
+    return tuple(coordinates) + tuple(args[len(coordinates):])
+class SketchEmitter(object):
+    """
+    Queues the entity calls for a gear and sends them to the wrapped sketch in one flush.
+    It exposes the AddBspline / AddArcCenterStartEnd / AddLine / AddCircle subset of the
+    AlibreScript Sketch API, so the geometry code can write to it as if it were the sketch;
+    each call returns the index of the queued entity. Nothing reaches the sketch before
+    flush(), so a gear whose generation fails leaves no geometry behind. The queue is kept
+    until every entity has been emitted; if a sketch call fails part way through flush(), the
+    entities already created stay in the sketch and the caller must remove the sketch.
+    offset / rotation: (dx, dy) and angle (radians) applied to every entity at flush, rotation
+    first, to place a gear off the sketch origin or turn it into mesh.
+    """
+    def __init__(self, sketch, offset=None, rotation=None):
+        self.sketch = sketch
+        self.offset = offset
+        self.rotation = rotation
+        self._queue = []
+        self.entities_emitted = 0
+        self.flushes = 0
+        self.flush_seconds = 0.0
+        self.last_flush_seconds = 0.0
+    @property
+    def Name(self):
+        return self.sketch.Name
+    def __len__(self):
+        return len(self._queue)
+    def _enqueue(self, method, args):
+        self._queue.append((method, args))
+        return len(self._queue) - 1
+    def AddBspline(self, points, is_reference):
+        return self._enqueue('AddBspline', (list(points), is_reference))
+    def AddArcCenterStartEnd(self, center_x, center_y, start_x, start_y, end_x, end_y, is_reference):
+        return self._enqueue('AddArcCenterStartEnd', (center_x, center_y, start_x, start_y, end_x, end_y, is_reference))
+    def AddLine(self, start_x, start_y, end_x, end_y, is_reference):
+        return self._enqueue('AddLine', (start_x, start_y, end_x, end_y, is_reference))
+    def AddCircle(self, center_x, center_y, diameter, is_reference):
+        return self._enqueue('AddCircle', (center_x, center_y, diameter, is_reference))
+    def rollback(self, mark=0):
+        """Drop the entities queued after mark (a previous len(emitter))."""
+        del self._queue[mark:]
+    def flush(self):
+        """Emit every queued entity into the sketch, in order; returns the created sketch objects."""
+        queue = self._queue
+        started = _timer()
+        dx, dy = self.offset if self.offset is not None else (0.0, 0.0)
+        angle = self.rotation or 0.0
+        if dx or dy or angle:
+            queue = [(method, transform_entity(method, args, dx, dy, angle)) for method, args in queue]
+        if instrumentation.enabled:
+            created = []
+            for method, args in queue:
+                call_started = _timer()
+                created.append(getattr(self.sketch, method)(*args))
+                instrumentation.record('sketch.' + method, _timer() - call_started)
+        else:
+            created = [getattr(self.sketch, method)(*args) for method, args in queue]
+        self._queue = []
+        self.last_flush_seconds = _timer() - started
+        self.flush_seconds += self.last_flush_seconds
+        self.flushes += 1
+        self.entities_emitted += len(created)
+        return created
+    def stats(self):
+        return {
+            'queued': len(self._queue),
+            'entities_emitted': self.entities_emitted,
+            'flushes': self.flushes,
+            'flush_seconds': self.flush_seconds,
+            'last_flush_seconds': self.last_flush_seconds
+        }
+class RecordingSketch(object):
+    """
+    In-memory sketch backend that records entity calls instead of talking to Alibre,
+    so sketch emission can be counted, timed and regression-tested without a CAD session.
+    """
+    def __init__(self, name='RecordingSketch'):
+        self.Name = name
+        self.entities = []
+        self.calls = {}
+    def _record(self, method, args):
+        self.entities.append((method, args))
+        self.calls[method] = self.calls.get(method, 0) + 1
+        return len(self.entities) - 1
+    def AddBspline(self, points, is_reference):
+        return self._record('AddBspline', (list(points), is_reference))
+    def AddArcCenterStartEnd(self, center_x, center_y, start_x, start_y, end_x, end_y, is_reference):
+        return self._record('AddArcCenterStartEnd', (center_x, center_y, start_x, start_y, end_x, end_y, is_reference))
+    def AddLine(self, start_x, start_y, end_x, end_y, is_reference):
+        return self._record('AddLine', (start_x, start_y, end_x, end_y, is_reference))
+    def AddCircle(self, center_x, center_y, diameter, is_reference):
+        return self._record('AddCircle', (center_x, center_y, diameter, is_reference))
+    def call_count(self):
+        return len(self.entities)
+    def clear(self):
+        del self.entities[:]
+        self.calls.clear()
+def alibre_arc(sketch, arc, reverse = False):
+    if reverse:
+        start_pt = arc[0]
+        end_pt = arc[-1]
+    else:
+        start_pt = arc[-1]
+        end_pt = arc[0]
+    center_x, center_y = 0.0, 0.0
+    lower_arc = sketch.AddArcCenterStartEnd(center_x, center_y, start_pt[0], start_pt[1], end_pt[0], end_pt[1], False)
+    if debug_enabled():
+        log.debug("  Created arc from (%.3f, %.3f) to (%.3f, %.3f)", start_pt[0], start_pt[1], end_pt[0], end_pt[1])
+    return lower_arc
+def alibre_spline(sketch, points):
+    """points: (x, y) sequence or (N, 2) numpy array, or a flat GearProfile.flat() array used as is."""
+    if len(points) > 0:
+        if isinstance(points, array):
+            spline_points = points.tolist()
+        elif hasattr(points, 'ravel'):
+            spline_points = points.ravel().tolist()
+        else:
+            spline_points = []
+            for x, y in points:
+                spline_points.append(x)
+                spline_points.append(y)
+        spline = sketch.AddBspline(spline_points, False)
+    else: 
+        spline = None
+    return spline
+def alibre_full_outline(sketch, outline, backend=None):
+    """Emit a generate_full_gear_outline loop, and the rim circle of internal gears, into sketch."""
+    entities = []
+    for index, segment in enumerate(outline['segments']):
+        points = outline_segment_points(outline, index, backend)
+        if segment[0] == 'arc':
+            entities.append(alibre_arc(sketch, points))
+        else:
+            entities.append(alibre_spline(sketch, points))
+    if outline['outer_radius'] is not None:
+        entities.append(sketch.AddCircle(0.0, 0.0, 2.0 * outline['outer_radius'], False))
+    return entities
+def emit_external_gear(sketch, tooth_profile, full_outline=False, outline=None):
+    """
+    Draw an external tooth profile (one tooth sector, or its full outline) into sketch or a SketchEmitter;
+    outline: generate_full_gear_outline of tooth_profile when already computed.
+    """
+    if full_outline:
+        if outline is None:
+            outline = generate_full_gear_outline(tooth_profile)
+        return alibre_full_outline(sketch, outline)
+    if tooth_profile.segment_length('trochoid_1') == 0:
+        trochoid_start = tooth_profile.point('involute_1', 0)
+    else:
+        trochoid_start = tooth_profile.point('trochoid_1', -1)
+    center_to_trochoid = sketch.AddLine(0, 0, trochoid_start[0], trochoid_start[1], False)
+    trochoid_1_spline = alibre_spline(sketch, tooth_profile.flat('trochoid_1'))
+    involute_1_spline = alibre_spline(sketch, tooth_profile.flat('involute_1'))
+    upper_arc = alibre_arc(sketch, tooth_profile['upper_arc'])
+    involute_2_spline = alibre_spline(sketch, tooth_profile.flat('involute_2'))
+    trochoid_2_spline = alibre_spline(sketch, tooth_profile.flat('trochoid_2'))
+    lower_arc = alibre_arc(sketch, tooth_profile['lower_arc'])
+    arc_end = tooth_profile.point('lower_arc', -1)
+    arc_to_center = sketch.AddLine(arc_end[0], arc_end[1], 0, 0, False)
+    if debug_enabled():
+        log.debug("  Created return line from dedendum arc to center: (%.3f, %.3f) -> (0,0)", arc_end[0], arc_end[1])
+    return [center_to_trochoid, trochoid_1_spline, involute_1_spline, upper_arc,
+            involute_2_spline, trochoid_2_spline, lower_arc, arc_to_center]
+def emit_internal_gear(sketch, tooth_profile, full_outline=False, outline=None):
+    """
+    Draw an internal tooth profile (one tooth sector, or its full outline and rim) into sketch or a SketchEmitter;
+    outline: generate_full_gear_outline of tooth_profile when already computed.
+    """
+    if full_outline:
+        if outline is None:
+            outline = generate_full_gear_outline(tooth_profile)
+        return alibre_full_outline(sketch, outline)
+    external_start = tooth_profile.point('external_arc', -1)
+    lower_arc_1_start = tooth_profile.point('lower_arc_1', -1)
+    involute_to_external = sketch.AddLine(lower_arc_1_start[0], lower_arc_1_start[1], external_start[0], external_start[1], False)
+    external_arc = alibre_arc(sketch, tooth_profile['external_arc'])
+    external_end = tooth_profile.point('external_arc', 0)
+    lower_arc_2_end = tooth_profile.point('lower_arc_2', -1)
+    external_to_lower = sketch.AddLine(external_end[0], external_end[1], lower_arc_2_end[0], lower_arc_2_end[1], False)
+    lower_arc_1 = alibre_arc(sketch, tooth_profile['lower_arc_1'])
+    lower_arc_2 = alibre_arc(sketch, tooth_profile['lower_arc_2'],reverse=True)
+    involute_2_spline = alibre_spline(sketch, tooth_profile.flat('involute_2'))
+    upper_arc = alibre_arc(sketch, tooth_profile['upper_arc'])
+    involute_1_spline = alibre_spline(sketch, tooth_profile.flat('involute_1'))
+    return [involute_to_external, external_arc, external_to_lower, lower_arc_1,
+            lower_arc_2, involute_2_spline, upper_arc, involute_1_spline]
+def create_external_gear_in_alibre(z, m, alpha_deg, profile_shift=0.0,
+                         undercut_auto_suppress=False,sketch=None,
+                         full_outline=False):
+    """
+    Create a complete spur gear in Alibre CAD
+    Parameters:
+    -----------
+    z : int - Number of teeth
+    m : float - Module (mm)
+    alpha_deg : float - Pressure angle (degrees)
+    profile_shift : float - Profile shift coefficient
+    undercut_auto_suppress : bool - Auto suppress undercut
+    num_points : int - Points per curve (higher = smoother)
+    sketch : Alibre sketch, or a SketchEmitter shared by several gears (flushed by the caller)
+    full_outline : bool - Draw all z teeth as one closed loop instead of one tooth sector
+    Returns:
+    --------
+    Success status and created objects
+    """
+    emitter = sketch if isinstance(sketch, SketchEmitter) else SketchEmitter(sketch)
+    mark = len(emitter)
+    try:
+        log.debug("Generating gear profile: z=%s, m=%s, alpha=%s deg", z, m, alpha_deg)
+        tooth_profile = profile_cache.external(
+                z=z, m=m, alpha_deg=alpha_deg, 
+                profile_shift=profile_shift,
+                undercut_auto_suppress=undercut_auto_suppress
+        )
+        params = tooth_profile['parameters']
+        log.debug("Generated profile with pitch radius: %.2fmm", params['pitch_radius'])
+        emit_external_gear(emitter, tooth_profile, full_outline)
+        if emitter is not sketch:
+            emitter.flush()
+        log.debug("Sketch completed successfully")
+        return tooth_profile['parameters']
+    except NameError:
+        emitter.rollback(mark)
+        log.error("Error: Alibre API functions not available. This script must be run within Alibre CAD.\n"
+                  "Make sure you have an active part open before running this script.")
+        return False, None
+    except Exception as e:
+        emitter.rollback(mark)
+        log.error("Error creating gear: %s", e)
+        return False, None
+def create_internal_gear_in_alibre(z, m, alpha_deg, profile_shift=0.0,
+                            thickness=10.0,
+                            undercut_auto_suppress=False,sketch=None,
+                            full_outline=False):
+    """
+    Create a complete internal spur gear in Alibre CAD
+    Parameters:
+    - z : int - Number of teeth
+    - m : float - Module (mm)
+    - alpha_deg : float - Pressure angle (degrees)
+    - profile_shift : float - Profile shift coefficient
+    - thickness : float - External thickness (mm)
+    - undercut_auto_suppress : bool - Auto suppress undercut
+    - num_points : int - Points per curve (higher = smoother)
+    - sketch : Alibre sketch, or a SketchEmitter shared by several gears (flushed by the caller)
+    - full_outline : bool - Draw all z teeth and the rim circle instead of one tooth sector
+    """
+    emitter = sketch if isinstance(sketch, SketchEmitter) else SketchEmitter(sketch)
+    mark = len(emitter)
+    try:
+        log.debug("Generating gear profile: z=%s, m=%s, alpha=%s deg", z, m, alpha_deg)
+        tooth_profile = profile_cache.internal(
+                z=z, m=m, alpha_deg=alpha_deg, 
+                thickness=thickness,
+                profile_shift=profile_shift,
+                undercut_auto_suppress=undercut_auto_suppress
+        )
+        params = tooth_profile['parameters']
+        log.debug("Generated profile with pitch radius: %.2fmm", params['pitch_radius'])
+        emit_internal_gear(emitter, tooth_profile, full_outline)
+        if emitter is not sketch:
+            emitter.flush()
+        log.debug("Sketch completed successfully")
+        return tooth_profile['parameters']
+    except NameError:
+        emitter.rollback(mark)
+        log.error("Error: Alibre API functions not available. This script must be run within Alibre CAD.\n"
+                  "Make sure you have an active part open before running this script.")
+        return False, None
+    except Exception as e:
+        emitter.rollback(mark)
+        log.error("Error creating gear: %s", e)
+        return False, None
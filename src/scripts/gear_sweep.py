@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Parameter sweeps over z x m x alpha x profile_shift for external gears.
+The grid is split into shards evaluated by a process pool (serially where multiprocessing
+is unavailable, e.g. IronPython). Results come back in grid order as compact array-backed
+SweepChunk columns, never as per-point dicts, and can be written to disk chunk by chunk.
+Example:
+    python gear_sweep.py --z 6:60 --m 1,2,3 --alpha 20,25 --shift=-1:1:0.25 --output-dir sweep
+"""
+import argparse
+import json
+import math
+import os
+import struct
+import sys
+import time
+from array import array
+from gear_geometry import generate_external_tooth_profile, is_undercut, contact_ratio
+from gear_validate import validate_profile
+try:
+    import multiprocessing
+except ImportError:
+    multiprocessing = None
+_timer = getattr(time, 'perf_counter', time.time)
+SWEEP_COLUMNS = (
+    ('z', 'i'),
+    ('m', 'd'),
+    ('alpha_deg', 'd'),
+    ('profile_shift', 'd'),
+    ('pitch_radius', 'd'),
+    ('base_radius', 'd'),
+    ('addendum_radius', 'd'),
+    ('dedendum_radius', 'd'),
+    ('contact_ratio', 'd'),
+    ('valid', 'b'),
+    ('undercut', 'b'),
+)
+_CHUNK_MAGIC = b'PGSC'
+_mate_parameters = {}
+class SweepChunk(object):
+    """A contiguous run of grid points stored as one typed array per column."""
+    __slots__ = ('start', 'columns')
+    def __init__(self, start=0, columns=None):
+        self.start = start
+        if columns is None:
+            columns = dict((name, array(code)) for name, code in SWEEP_COLUMNS)
+        self.columns = columns
+    def __len__(self):
+        return len(self.columns['z'])
+    def __getitem__(self, name):
+        return self.columns[name]
+    def row(self, index):
+        """One grid point as a dict, for reporting only."""
+        return dict((name, self.columns[name][index]) for name, code in SWEEP_COLUMNS)
+    def extend(self, other):
+        for name, code in SWEEP_COLUMNS:
+            self.columns[name].extend(other.columns[name])
+    def save(self, path):
+        """Write the chunk as a binary column table: magic, JSON header, raw little-endian columns."""
+        header = json.dumps({'start': self.start, 'length': len(self),
+                             'columns': [[name, code] for name, code in SWEEP_COLUMNS]}).encode('ascii')
+        with open(path, 'wb') as f:
+            f.write(_CHUNK_MAGIC + struct.pack('<I', len(header)) + header)
+            for name, code in SWEEP_COLUMNS:
+                column = self.columns[name]
+                if sys.byteorder != 'little':
+                    column = array(code, column)
+                    column.byteswap()
+                f.write(getattr(column, 'tobytes', getattr(column, 'tostring', None))())
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data[:4] != _CHUNK_MAGIC:
+            raise ValueError("%s is not a sweep chunk file." % path)
+        header_length, = struct.unpack_from('<I', data, 4)
+        header = json.loads(data[8:8 + header_length].decode('ascii'))
+        offset = 8 + header_length
+        columns = {}
+        for name, code in header['columns']:
+            column = array(str(code))
+            size = column.itemsize * header['length']
+            getattr(column, 'frombytes', getattr(column, 'fromstring', None))(data[offset:offset + size])
+            if sys.byteorder != 'little':
+                column.byteswap()
+            columns[name] = column
+            offset += size
+        return cls(header['start'], columns)
+class SweepGrid(object):
+    """Cartesian grid z x m x alpha_deg x profile_shift, indexed in that (row-major) order."""
+    def __init__(self, z_values, m_values, alpha_values, shift_values, shift_is_relative=False):
+        self.z_values = [int(z) for z in z_values]
+        self.m_values = [float(m) for m in m_values]
+        self.alpha_values = [float(a) for a in alpha_values]
+        self.shift_values = [float(s) for s in shift_values]
+        self.shift_is_relative = shift_is_relative
+    def __len__(self):
+        return len(self.z_values) * len(self.m_values) * len(self.alpha_values) * len(self.shift_values)
+    def point(self, index):
+        """(z, m, alpha_deg, profile_shift) of a flat grid index; relative shifts are scaled by m."""
+        index, i_shift = divmod(index, len(self.shift_values))
+        index, i_alpha = divmod(index, len(self.alpha_values))
+        i_z, i_m = divmod(index, len(self.m_values))
+        m = self.m_values[i_m]
+        shift = self.shift_values[i_shift]
+        if self.shift_is_relative:
+            shift *= m
+        return self.z_values[i_z], m, self.alpha_values[i_alpha], shift
+    def shards(self, shard_size):
+        for start in range(0, len(self), shard_size):
+            yield start, min(start + shard_size, len(self))
+def evaluate_point(z, m, alpha_deg, profile_shift, mate_z=None, num_points=(10, 10, 5, 5), validate=True):
+    """
+    Generate one gear and return its sweep row as a tuple in SWEEP_COLUMNS order.
+    The contact ratio is against mate_z teeth of the same m/alpha without shift, or against
+    an identical gear when mate_z is None; invalid geometry gives valid=0 and NaN radii.
+    validate: also give valid=0 (radii kept) when gear_validate finds the outline broken.
+    """
+    nan = float('nan')
+    try:
+        profile = generate_external_tooth_profile(z, m, alpha_deg, profile_shift, num_points=list(num_points))
+    except (ValueError, ZeroDivisionError):
+        return (z, m, alpha_deg, profile_shift, nan, nan, nan, nan, nan, 0, 0)
+    parameters = profile['parameters']
+    if mate_z is None:
+        mate = parameters
+    else:
+        key = (mate_z, m, alpha_deg)
+        mate = _mate_parameters.get(key)
+        if mate is None:
+            mate = _mate_parameters[key] = generate_external_tooth_profile(mate_z, m, alpha_deg, num_points=list(num_points))['parameters']
+    try:
+        ratio = contact_ratio(parameters, mate)
+    except ValueError:
+        ratio = nan
+    return (z, m, alpha_deg, profile_shift, parameters['pitch_radius'], parameters['base_radius'],
+            parameters['addendum_radius'], parameters['dedendum_radius'], ratio,
+            int(not validate or validate_profile(profile).valid), int(is_undercut(parameters)))
+def _evaluate_shard(task):
+    grid, start, stop, mate_z, num_points, validate = task
+    chunk = SweepChunk(start)
+    columns = [chunk.columns[name] for name, code in SWEEP_COLUMNS]
+    for index in range(start, stop):
+        z, m, alpha_deg, profile_shift = grid.point(index)
+        for column, value in zip(columns, evaluate_point(z, m, alpha_deg, profile_shift, mate_z, num_points, validate)):
+            column.append(value)
+    return chunk
+class SweepProgress(object):
+    """Running count and throughput (gears per second) of a sweep."""
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.started = _timer()
+        self.elapsed = 0.0
+    def update(self, count):
+        self.done += count
+        self.elapsed = _timer() - self.started
+    @property
+    def gears_per_second(self):
+        return self.done / self.elapsed if self.elapsed > 0 else 0.0
+    def __str__(self):
+        return '%d/%d gears (%.1f%%), %.0f gears/s' % (self.done, self.total, 100.0 * self.done / max(self.total, 1),
+                                                      self.gears_per_second)
+def sweep(grid, processes=None, shard_size=512, mate_z=None, num_points=(10, 10, 5, 5), progress=None, validate=True):
+    """
+    Evaluate every grid point and yield SweepChunks in grid order.
+    processes: pool size (None for all cores, 1 or no multiprocessing for in-process);
+    progress: optional callable receiving the SweepProgress after every chunk;
+    validate: check every outline for self-intersections and degenerate segments.
+    """
+    state = SweepProgress(len(grid))
+    tasks = ((grid, start, stop, mate_z, tuple(num_points), validate) for start, stop in grid.shards(shard_size))
+    pool = None
+    if multiprocessing is not None and processes != 1:
+        pool = multiprocessing.Pool(processes)
+        chunks = pool.imap(_evaluate_shard, tasks)
+    else:
+        chunks = (_evaluate_shard(task) for task in tasks)
+    try:
+        for chunk in chunks:
+            state.update(len(chunk))
+            if progress is not None:
+                progress(state)
+            yield chunk
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+def collect(chunks):
+    """Concatenate a chunk stream into a single SweepChunk."""
+    result = SweepChunk(0)
+    for chunk in chunks:
+        result.extend(chunk)
+    return result
+def write_chunks(chunks, directory):
+    """Save every chunk of the stream to directory/chunk_<start>.pgsc as it arrives; returns the paths."""
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    paths = []
+    for chunk in chunks:
+        path = os.path.join(directory, 'chunk_%09d.pgsc' % chunk.start)
+        chunk.save(path)
+        paths.append(path)
+    return paths
+def parse_values(text, convert=float):
+    """'a,b,c' or 'start:stop[:step]' (stop inclusive) into a list of values."""
+    if ':' not in text:
+        return [convert(v) for v in text.split(',') if v.strip()]
+    parts = [float(p) for p in text.split(':')]
+    start, stop = parts[0], parts[1]
+    step = parts[2] if len(parts) > 2 else 1.0
+    if step <= 0:
+        raise ValueError("Step must be positive in '%s'." % text)
+    count = int(math.floor((stop - start) / step + 1e-9)) + 1
+    return [convert(start + i * step) for i in range(count)]
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Sweep external gear designs over z x m x alpha x profile shift.')
+    parser.add_argument('--z', default='6:200', help="tooth counts, 'a,b,c' or 'start:stop[:step]' (default: 6:200)")
+    parser.add_argument('--m', default='1', help='modules in mm (default: 1)')
+    parser.add_argument('--alpha', default='20', help='pressure angles in degrees (default: 20)')
+    parser.add_argument('--shift', default='0', help="profile shifts in mm, '--shift=-1:1:0.25' when the first is negative (default: 0)")
+    parser.add_argument('--relative-shift', action='store_true', help='treat --shift values as multiples of m')
+    parser.add_argument('--mate-z', type=int, help='contact ratio against this tooth count (default: identical gear)')
+    parser.add_argument('--processes', type=int, help='worker processes (default: all cores)')
+    parser.add_argument('--shard-size', type=int, default=512, help='grid points per shard (default: 512)')
+    parser.add_argument('--output-dir', help='write each result chunk to this directory')
+    parser.add_argument('--no-validate', action='store_true', help='skip the outline validity check of every gear')
+    args = parser.parse_args(argv)
+    grid = SweepGrid(parse_values(args.z, lambda v: int(round(v))), parse_values(args.m),
+                     parse_values(args.alpha), parse_values(args.shift), args.relative_shift)
+    def report(state):
+        sys.stderr.write('\r%s' % state)
+    chunks = sweep(grid, args.processes, args.shard_size, args.mate_z, progress=report, validate=not args.no_validate)
+    if args.output_dir:
+        count = len(write_chunks(chunks, args.output_dir))
+        sys.stderr.write('\n%d chunk(s) written to %s\n' % (count, args.output_dir))
+        return 0
+    result = collect(chunks)
+    valid = sum(result['valid'])
+    undercut = sum(result['undercut'])
+    sys.stderr.write('\n%d valid, %d undercut of %d gears\n' % (valid, undercut, len(result)))
+    return 0
+if __name__ == '__main__':
+    sys.exit(main())
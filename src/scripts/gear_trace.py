@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Hot-path instrumentation and logging for py-gear.
+instrumentation aggregates named timing spans (count, total, min, max seconds) and counters
+for profile generation, sketch calls, AddParameter and Regenerate. It is off by default:
+span() then hands back one shared do-nothing context and count() returns at once, so the
+instrumented paths cost an attribute test. stats() / export_json() give the aggregate of a
+single run or a whole batch (reset() in between).
+log is the 'py_gear' logger. Nothing is written until configure_logging() gives it a level
+and a handler; per-entity messages are at DEBUG and guarded by debug_enabled().
+Imports nothing from .NET.
+"""
+import json
+import logging
+import sys
+import time
+from collections import OrderedDict
+_timer = getattr(time, 'perf_counter', time.time)
+log = logging.getLogger('py_gear')
+log.addHandler(logging.NullHandler())
+class ConsoleHandler(logging.Handler):
+    """Writes records to the current sys.stdout (the Alibre script console), looked up per record."""
+    def emit(self, record):
+        try:
+            sys.stdout.write(self.format(record) + '\n')
+        except Exception:
+            self.handleError(record)
+_console_handler = None
+def configure_logging(level=logging.INFO, handler=None):
+    """
+    Set the py_gear log level (a logging level or its name) and route records to handler
+    (default: a ConsoleHandler, installed once per engine); returns the logger.
+    """
+    global _console_handler
+    if not isinstance(level, int):
+        level = logging.getLevelName(str(level).upper())
+    if handler is None:
+        if _console_handler is None:
+            _console_handler = ConsoleHandler()
+            _console_handler.setFormatter(logging.Formatter('%(message)s'))
+        handler = _console_handler
+    if handler not in log.handlers:
+        log.addHandler(handler)
+    log.setLevel(level)
+    log.propagate = False
+    return log
+def debug_enabled():
+    return log.isEnabledFor(logging.DEBUG)
+class _NullSpan(object):
+    def __enter__(self):
+        return self
+    def __exit__(self, exc_type, exc, tb):
+        return False
+_NULL_SPAN = _NullSpan()
+class _Span(object):
+    __slots__ = ('owner', 'name', 'started')
+    def __init__(self, owner, name):
+        self.owner = owner
+        self.name = name
+    def __enter__(self):
+        self.started = _timer()
+        return self
+    def __exit__(self, exc_type, exc, tb):
+        self.owner.record(self.name, _timer() - self.started)
+        return False
+class Instrumentation(object):
+    """Named timing spans and counters, aggregated in place; disabled (and free) until enable()."""
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.spans = OrderedDict()
+        self.counters = OrderedDict()
+        self.started = _timer()
+    def enable(self, enabled=True):
+        self.enabled = enabled
+    def reset(self):
+        self.spans.clear()
+        self.counters.clear()
+        self.started = _timer()
+    def span(self, name):
+        """Context manager timing its block under name (a no-op when disabled)."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+    def record(self, name, seconds):
+        """Add one timed occurrence of name; callers timing a hot loop themselves use this directly."""
+        entry = self.spans.get(name)
+        if entry is None:
+            self.spans[name] = [1, seconds, seconds, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+            if seconds < entry[2]:
+                entry[2] = seconds
+            if seconds > entry[3]:
+                entry[3] = seconds
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+    def stats(self):
+        """{'wall_seconds', 'spans': {name: {count, total/min/max/mean_seconds}}, 'counters': {name: n}}."""
+        spans = OrderedDict()
+        for name, (count, total, low, high) in self.spans.items():
+            spans[name] = OrderedDict((('count', count), ('total_seconds', total), ('min_seconds', low),
+                                       ('max_seconds', high), ('mean_seconds', total / count)))
+        return OrderedDict((('wall_seconds', _timer() - self.started), ('spans', spans),
+                            ('counters', OrderedDict(self.counters))))
+    def export_json(self, path_or_stream, **extra):
+        """Write stats() (plus any extra top-level keys, e.g. a run label) as JSON to a path or stream."""
+        data = self.stats()
+        data.update(extra)
+        if hasattr(path_or_stream, 'write'):
+            json.dump(data, path_or_stream, indent=2)
+        else:
+            with open(path_or_stream, 'w') as f:
+                json.dump(data, f, indent=2)
+        return data
+    def format(self):
+        lines = ['%-28s %8s %12s %12s' % ('span', 'count', 'total ms', 'mean ms')]
+        for name, (count, total, low, high) in self.spans.items():
+            lines.append('%-28s %8d %12.2f %12.4f' % (name, count, 1000 * total, 1000 * total / count))
+        for name, value in self.counters.items():
+            lines.append('%-28s %8d' % (name, value))
+        return '\n'.join(lines)
+instrumentation = Instrumentation()
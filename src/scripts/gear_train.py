@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Gear-train batch command: create every gear of a spec file in one pass.
+A spec is a CSV or JSONL table in the gear_cli format (z, m, alpha, shift, internal/kind,
+thickness, undercut, generation, name) with extra columns for the target plane name ('plane', default
+XY-Plane), the placement offset of the gear center ('offset_x', 'offset_y', or 'offset' as
+"x,y"), its 'rotation' in degrees, 'full_outline' and 'fit_tolerance' (mm, fit the flanks with
+gear_fit). All tooth profiles are generated up front, in a process pool where
+multiprocessing is available, and then emitted into the Part by one GearTransaction: one
+AddSketch per gear and a single Regenerate(). Nothing here polls the selection or opens a
+message box; progress goes to a callback and failures to the returned report.
+Outside Alibre the command runs against a RecordingPart, which checks a spec file and times it
+(--stats writes the gear_trace spans and counters of the run as JSON):
+    python gear_train.py train.csv --processes 4 --stats train-stats.json
+"""
+import argparse
+import math
+import sys
+import time
+from gear_cli import read_parameter_rows, normalize_job, _flag, _number
+from gear_geometry import profile_cache, generate_full_gear_outline
+from gear_fit import fitted_profile
+from gear_envelope import generate_external_envelope_profile, generate_internal_envelope_profile
+from gear_batch import GearTransaction, RecordingPart, RecordingParameterTypes
+from gear_trace import instrumentation, configure_logging
+try:
+    import multiprocessing
+except ImportError:
+    multiprocessing = None
+_timer = getattr(time, 'perf_counter', time.time)
+DEFAULT_PLANE = 'XY-Plane'
+def normalize_spec(row, index):
+    """
+    A spec-file row as normalize_job() keywords plus 'plane', 'offset' (dx, dy), 'rotation' (radians),
+    'full_outline' and 'fit_tolerance' (None for unfitted flanks).
+    """
+    spec = normalize_job(row, index)
+    row = dict((str(k).strip().lower(), v) for k, v in row.items())
+    spec['plane'] = str(row.get('plane') or row.get('plane_name') or DEFAULT_PLANE).strip()
+    offset = row.get('offset')
+    if offset not in (None, ''):
+        if not isinstance(offset, (list, tuple)):
+            offset = str(offset).replace(';', ',').split(',')
+        if len(offset) != 2:
+            raise ValueError("Row %d: offset must be 'x,y', got %r." % (index, row.get('offset')))
+        spec['offset'] = (float(offset[0]), float(offset[1]))
+    else:
+        spec['offset'] = (_number(row, 'offset_x', 0.0), _number(row, 'offset_y', 0.0))
+    spec['rotation'] = math.radians(_number(row, 'rotation', 0.0))
+    spec['full_outline'] = _flag(row.get('full_outline', False))
+    spec['fit_tolerance'] = _number(row, 'fit_tolerance', None)
+    return spec
+def load_train_spec(path, input_format=None):
+    """Parse a spec file into (specs, errors); errors lists (row number, message) of the rows skipped."""
+    specs = []
+    errors = []
+    for row in read_parameter_rows(path, input_format, errors):
+        # rows that did not parse are already in errors, so this is the row's number in the file
+        index = len(specs) + len(errors) + 1
+        try:
+            specs.append(normalize_spec(row, index))
+        except (ValueError, TypeError) as ex:
+            errors.append((index, str(ex)))
+    return specs, errors
+def generate_profile(spec):
+    """
+    Tooth profile of one spec, through the profile cache of the calling process (cut by the
+    generating cutter of gear_envelope for generation 'envelope'), fitted when it asks for it.
+    """
+    if spec.get('generation') == 'envelope':
+        if spec['kind'] == 'internal':
+            profile = generate_internal_envelope_profile(spec['z'], spec['m'], spec['alpha_deg'], spec['thickness'],
+                                                         spec['profile_shift'], spec['undercut_auto_suppress'])
+        else:
+            profile = generate_external_envelope_profile(spec['z'], spec['m'], spec['alpha_deg'], spec['profile_shift'],
+                                                         spec['undercut_auto_suppress'])
+    elif spec['kind'] == 'internal':
+        profile = profile_cache.internal(spec['z'], spec['m'], spec['alpha_deg'], spec['thickness'], spec['profile_shift'],
+                                         spec['undercut_auto_suppress'], tolerance=spec['tolerance'])
+    else:
+        profile = profile_cache.external(spec['z'], spec['m'], spec['alpha_deg'], spec['profile_shift'],
+                                         spec['undercut_auto_suppress'], tolerance=spec['tolerance'])
+    if spec.get('fit_tolerance'):
+        profile = fitted_profile(profile, spec['fit_tolerance'])
+    return profile
+def _generate_task(spec):
+    try:
+        profile = generate_profile(spec)
+        return profile, generate_full_gear_outline(profile) if spec['full_outline'] else None, None
+    except (ValueError, TypeError, ZeroDivisionError) as ex:
+        return None, None, str(ex)
+def _use_pool(count, processes, parallel_threshold):
+    return multiprocessing is not None and processes != 1 and count >= parallel_threshold
+def generate_profiles(specs, processes=None, parallel_threshold=16, progress=None):
+    """
+    [(profile, full outline or None, error), ...] in spec order. processes: pool size (None for all cores, 1 or no
+    multiprocessing for in-process); fewer than parallel_threshold specs are generated in-process,
+    where starting a pool would cost more than it saves. progress: callable(phase, done, total).
+    """
+    pool = None
+    if _use_pool(len(specs), processes, parallel_threshold):
+        pool = multiprocessing.Pool(processes)
+        results = pool.imap(_generate_task, specs, max(1, len(specs) // (4 * (processes or multiprocessing.cpu_count()))))
+    else:
+        results = (_generate_task(spec) for spec in specs)
+    profiles = []
+    try:
+        for result in results:
+            profiles.append(result)
+            if progress is not None:
+                progress('geometry', len(profiles), len(specs))
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+    return profiles
+class TrainReport(object):
+    """Outcome of a gear-train run: the BatchReport of the emission pass plus the skipped spec rows."""
+    def __init__(self, batch, spec_errors, generate_seconds, parallel):
+        self.batch = batch
+        self.spec_errors = spec_errors
+        self.generate_seconds = generate_seconds
+        self.parallel = parallel
+    @property
+    def ok(self):
+        return self.batch.ok and not self.spec_errors
+    def format(self):
+        lines = [self.batch.format()]
+        lines.append('  profiles generated %s in %.1f ms' % ('in parallel' if self.parallel else 'in-process',
+                                                           1000 * self.generate_seconds))
+        for index, message in self.spec_errors:
+            lines.append('  row %d skipped: %s' % (index, message))
+        return '\n'.join(lines)
+def run_gear_train(specs, part, parameter_types=None, processes=None, parallel_threshold=16, progress=None,
+                   spec_errors=()):
+    """
+    Create the gears of specs (normalize_spec dicts) in part: generate every profile first, then
+    emit them all with one GearTransaction. Returns a TrainReport.
+    """
+    started = _timer()
+    with instrumentation.span('train.generate_profiles'):
+        profiles = generate_profiles(specs, processes, parallel_threshold, progress)
+    generate_seconds = _timer() - started
+    transaction = GearTransaction(part, parameter_types)
+    for spec, (profile, outline, error) in zip(specs, profiles):
+        job = transaction.add(spec['name'], spec['plane'], spec['z'], spec['m'], spec['alpha_deg'], spec['profile_shift'],
+                              spec.get('thickness', 10.0), spec['kind'] == 'internal', spec['undercut_auto_suppress'],
+                              spec['full_outline'], spec['offset'], profile, outline, spec['rotation'],
+                              spec.get('fit_tolerance'))
+        if error is not None:
+            job.fail('geometry', error)
+    batch = transaction.commit(None if progress is None else _emission_progress(progress))
+    batch.timings['geometry'] += generate_seconds
+    batch.timings['total'] += generate_seconds
+    return TrainReport(batch, list(spec_errors), generate_seconds, _use_pool(len(specs), processes, parallel_threshold))
+def _emission_progress(progress):
+    """progress for the commit phases after geometry, which generate_profiles() already reported."""
+    def report(phase, done, total):
+        if phase != 'geometry':
+            progress(phase, done, total)
+    return report
+def create_gear_train(path, part, parameter_types=None, processes=None, progress=None, input_format=None):
+    """Load the spec file at path and create its gears in part; returns the TrainReport."""
+    specs, errors = load_train_spec(path, input_format)
+    return run_gear_train(specs, part, parameter_types, processes, progress=progress, spec_errors=errors)
+class ConsoleProgress(object):
+    """Progress callback writing one line per phase step ('geometry 12/40') to a stream, every step_percent."""
+    def __init__(self, stream=None, step_percent=10):
+        self.stream = stream or sys.stderr
+        self.step_percent = step_percent
+        self._last = None
+    def __call__(self, phase, done, total):
+        percent = 100 * done // max(total, 1)
+        key = (phase, percent // self.step_percent)
+        if key != self._last or done == total:
+            self._last = key
+            self.stream.write('%-10s %d/%d\n' % (phase, done, total))
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check and time a py-gear gear-train spec file against a recording Part.')
+    parser.add_argument('spec', help="gear-train spec (.csv or .jsonl, '-' for stdin)")
+    parser.add_argument('--input-format', choices=('csv', 'jsonl'), help='spec format (default: from extension)')
+    parser.add_argument('--processes', type=int, help='profile generation processes (default: all cores)')
+    parser.add_argument('--planes', default='XY-Plane,YZ-Plane,ZX-Plane',
+                        help='comma separated plane names the recording Part knows (default: the three base planes)')
+    parser.add_argument('--quiet', action='store_true', help='no progress output')
+    parser.add_argument('--stats', metavar='PATH', help="write the instrumentation spans and counters as JSON ('-' for stdout)")
+    parser.add_argument('--log-level', default='WARNING', help='py_gear log level (default: WARNING)')
+    args = parser.parse_args(argv)
+    configure_logging(args.log_level)
+    part = RecordingPart(planes=[name.strip() for name in args.planes.split(',')])
+    if args.stats:
+        instrumentation.reset()
+        instrumentation.enable()
+    try:
+        report = create_gear_train(args.spec, part, RecordingParameterTypes, args.processes,
+                                   None if args.quiet else ConsoleProgress(), args.input_format)
+    finally:
+        instrumentation.enable(False)
+    print(report.format())
+    if args.stats:
+        instrumentation.export_json(sys.stdout if args.stats == '-' else args.stats, spec=args.spec,
+                                    gears=len(report.batch.jobs))
+    return 0 if report.ok else 1
+if __name__ == '__main__':
+    sys.exit(main())
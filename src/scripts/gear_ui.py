@@ -0,0 +1,736 @@
+﻿# -*- coding: utf-8 -*-
+"""
+py-gear user interface: the WinForms gear dialog and the plane selection list. Template.py
+imports this module and calls launch(), so within one script engine the WinForms imports and
+this module's code run once, on the first launch. Alibre objects come from gear_host.host.
+"""
+import System
+from AlibreScript.API import *
+import time
+from gear_host import host, startup_trace, winforms
+from gear_selection import SelectionTracker, SessionSelectionSource
+from gear_preview import PreviewEngine
+from gear_batch import GearTransaction
+from gear_domain import check_parameters, default_map
+from gear_catalog import standard_catalog
+from gear_trace import configure_logging, log
+_timer = getattr(time, 'perf_counter', time.time)
+configure_logging()
+def printTraceBack():
+    import traceback
+    return
+def show_error(msg, title='Error', include_trace=False):
+    try:
+        from System.Windows.Forms import MessageBox
+        MessageBox.Show(str(msg), str(title), System.Windows.Forms.MessageBoxButtons.OK, System.Windows.Forms.MessageBoxIcon.Error)
+    except:
+        pass
+    if include_trace:
+        printTraceBack()
+def show_info(msg, title='Info'):
+    try:
+        from System.Windows.Forms import MessageBox
+        MessageBox.Show(str(msg), str(title), System.Windows.Forms.MessageBoxButtons.OK, System.Windows.Forms.MessageBoxIcon.Information)
+    except:
+        pass
+def safe_try(fn):
+    """Decorator-like wrapper for event handlers to avoid crashing the UI."""
+    def _inner(*args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as ex:
+            show_error('Unexpected error: %s' % ex, 'Unexpected Error', include_trace=True)
+            return None
+    return _inner
+root = None
+MyPart = None
+def connect():
+    """Resolve the Part of the session the command was invoked in (see gear_host); returns the Part or None."""
+    global root, MyPart
+    root = None
+    MyPart = None
+    try:
+        root = host.root
+    except Exception as ex:
+        show_error('Could not connect to Alibre Automation. Details: %s' % ex, 'Alibre Connection Error', include_trace=True)
+    try:
+        if root is not None:
+            MyPart = host.part
+        else:
+            MyPart = None
+    except Exception as ex:
+        show_error('Could not get current Part session. Open a part and try again.\nDetails: %s' % ex, 'Part Error', include_trace=True)
+        MyPart = None
+    return MyPart
+try:
+    winforms.get()
+except Exception as ex:
+    show_error('Failed to load Windows Forms assemblies. Details: %s' % ex, 'Reference Load Error', include_trace=True)
+from System.Windows.Forms import (
+    ListBox, SelectionMode, Padding, AutoScaleMode,
+    Timer, Button, ToolTip,
+    DockStyle, Cursors, FlatStyle,
+    Form, Label, CheckBox, NumericUpDown,
+    MessageBox, Panel, TableLayoutPanel,
+    FlowLayoutPanel, FlowDirection, RadioButton,
+    OpenFileDialog, DialogResult
+)
+from System.Drawing import Color, Size, SizeF, Font, FontStyle, SystemFonts, Point, Pen, Brushes
+from System.Drawing.Drawing2D import SmoothingMode
+from System import Array
+def create_gear_with_plane(z, m, alpha_deg, plane, profile_shift=0.0, thickness=10.0, internal=False, full_outline=False,
+                           name="gear1", undercut_auto_suppress=False):
+    """Create one gear sketch on plane with its parameters, through a single-gear GearTransaction"""
+    transaction = GearTransaction(MyPart, ParameterTypes)
+    job = transaction.add(name, plane, z, m, alpha_deg, profile_shift, thickness, internal,
+                          undercut_auto_suppress, full_outline)
+    report = transaction.commit()
+    log.info(report.format())
+    if not job.ok:
+        return False, None
+    return job.parameters
+def create_gears(gears):
+    """
+    Create many gears with one regeneration. gears: dicts of create_gear_with_plane keyword
+    arguments (name and plane required); returns the gear_batch.BatchReport.
+    """
+    transaction = GearTransaction(MyPart, ParameterTypes)
+    for gear in gears:
+        transaction.add(**gear)
+    report = transaction.commit()
+    log.info(report.format())
+    return report
+def get_professional_colors():
+    return {
+        'background': Color.FromArgb(250, 250, 250),
+        'accent': Color.FromArgb(0, 122, 204),
+        'accent_light': Color.FromArgb(230, 244, 255),
+        'border': Color.FromArgb(204, 204, 204),
+        'text': Color.FromArgb(64, 64, 64),
+        'button_bg': Color.FromArgb(240, 240, 240)
+    }
+def scale_size(base_size, scale_factor=1.0):
+    return int(base_size)
+def create_professional_button(text, is_primary=False):
+    colors = get_professional_colors()
+    btn = Button()
+    btn.Text = text
+    btn.FlatStyle = FlatStyle.Flat
+    btn.Font = Font(SystemFonts.DefaultFont.FontFamily, 9, FontStyle.Regular)
+    btn.UseVisualStyleBackColor = False
+    if is_primary:
+        btn.BackColor = colors['accent']
+        btn.ForeColor = Color.White
+        btn.FlatAppearance.BorderColor = colors['accent']
+    else:
+        btn.BackColor = colors['button_bg']
+        btn.ForeColor = colors['text']
+        btn.FlatAppearance.BorderColor = colors['border']
+    btn.FlatAppearance.BorderSize = 1
+    btn.Cursor = Cursors.Hand
+    return btn
+def create_professional_label(text, is_header=False):
+    colors = get_professional_colors()
+    lbl = Label()
+    lbl.Text = text
+    lbl.ForeColor = colors['text']
+    lbl.AutoSize = True
+    lbl.TextAlign = System.Drawing.ContentAlignment.TopLeft
+    lbl.Font = Font(SystemFonts.DefaultFont.FontFamily, 10 if is_header else 9,
+                    FontStyle.Bold if is_header else FontStyle.Regular)
+    return lbl
+def create_professional_checkbox(text):
+    colors = get_professional_colors()
+    chk = CheckBox()
+    chk.Text = text
+    chk.ForeColor = colors['text']
+    chk.Font = Font(SystemFonts.DefaultFont.FontFamily, 9)
+    chk.UseVisualStyleBackColor = True
+    chk.AutoSize = True
+    chk.TextAlign = System.Drawing.ContentAlignment.MiddleLeft
+    return chk
+def create_professional_numericupdown():
+    colors = get_professional_colors()
+    num = NumericUpDown()
+    num.BackColor = Color.White
+    num.ForeColor = colors['text']
+    num.Font = Font(SystemFonts.DefaultFont.FontFamily, scale_size(9))
+    num.BorderStyle = System.Windows.Forms.BorderStyle.FixedSingle
+    num.Margin = Padding(2)
+    return num
+def create_professional_radiobutton(text):
+    colors = get_professional_colors()
+    rb = RadioButton()
+    rb.Text = text
+    rb.AutoSize = True
+    rb.Font = Font(SystemFonts.DefaultFont.FontFamily, 9)
+    rb.ForeColor = colors['text']
+    rb.Margin = Padding(0, 0, 16, 0)
+    return rb
+class SelectionListBox(ListBox):
+    def __new__(cls):
+        instance = ListBox.__new__(cls)
+        try:
+            instance.AutoScaleDimensions = SizeF(96, 96)
+            instance.AutoScaleMode = AutoScaleMode.Dpi
+            instance.IntegralHeight = 1
+            instance.SelectionMode = SelectionMode.MultiExtended
+            instance.BackColor = Color.White
+            instance.BorderStyle = System.Windows.Forms.BorderStyle.FixedSingle
+            instance.Font = Font(SystemFonts.DefaultFont.FontFamily, 9)
+            instance.Root = host.root
+            instance.top_sess = host.session
+            instance.tracker = None if instance.top_sess is None else SelectionTracker(SessionSelectionSource(instance.top_sess))
+            instance.myTimer = Timer()
+            instance.myTimer.Tick += instance.TimerEventProcessor
+            instance.myTimer.Interval = 100
+            instance.Enter += instance.onEnter_Selection
+            instance.Leave += instance.onLeave_Selection
+            instance.HandleDestroyed += instance.onHandleDestroyed
+            instance.PreviousSelection = instance.Root.NewObjectCollector()
+        except Exception as ex:
+            show_error('Selection list init failed: %s' % ex, include_trace=True)
+        return instance
+    @safe_try
+    def onEnter_Selection(self, sender, e):
+        colors = get_professional_colors()
+        sender.BackColor = colors['accent_light']
+        if sender.tracker is not None:
+            sender.tracker.wake()
+            sender.myTimer.Interval = sender.tracker.interval_ms
+        sender.myTimer.Start()
+    @safe_try
+    def onLeave_Selection(self, sender, e):
+        try:
+            sender.myTimer.Stop()
+        finally:
+            sender.BackColor = Color.White
+    @safe_try
+    def onHandleDestroyed(self, sender, e):
+        try:
+            sender.myTimer.Stop()
+        finally:
+            pass
+    @safe_try
+    def TimerEventProcessor(self, sender, e):
+        try:
+            self.myTimer.Stop()
+            if self.tracker is None:
+                return
+            try:
+                if self.PreviousSelection is None:
+                    self.PreviousSelection = self.Root.NewObjectCollector()
+            except:
+                return
+            try:
+                match = self.tracker.poll()
+            except:
+                return
+            if match is not None:
+                obj_name, item = match
+                if self.Items.Count == 0 or obj_name != self.Items[0]:
+                    self.Items.Clear()
+                    try:
+                        self.PreviousSelection.Clear()
+                    except:
+                        try:
+                            self.PreviousSelection = self.Root.NewObjectCollector()
+                        except:
+                            pass
+                    self.Items.Add(obj_name)
+                    try:
+                        self.PreviousSelection.Add(item)
+                    except:
+                        pass
+        finally:
+            try:
+                if self.tracker is not None:
+                    self.myTimer.Interval = self.tracker.interval_ms
+                self.myTimer.Start()
+            except:
+                pass
+def show_gear_form():
+    if MyPart is None:
+        show_error('No active Part session was found. Open a part and run the script again.', 'No Part Session')
+        return None
+    colors = get_professional_colors()
+    form = Form()
+    form.Text = 'Alibre Gear Generator Enhanced'
+    form.AutoSize = False
+    form.StartPosition = System.Windows.Forms.FormStartPosition.CenterScreen
+    form.FormBorderStyle = System.Windows.Forms.FormBorderStyle.FixedDialog
+    form.MaximizeBox = False
+    form.MinimizeBox = False
+    form.ShowInTaskbar = False
+    form.ShowIcon = False
+    form.TopMost = True
+    form.BackColor = colors['background']
+    form.Font = Font(SystemFonts.DefaultFont.FontFamily, 9)
+    form.Padding = Padding(12)
+    main_panel = Panel()
+    main_panel.Dock = DockStyle.Fill
+    main_panel.BackColor = colors['background']
+    main_panel.Padding = Padding(8)
+    main_panel.AutoSize = True
+    main_panel.AutoSizeMode = System.Windows.Forms.AutoSizeMode.GrowAndShrink
+    form.Controls.Add(main_panel)
+    table = TableLayoutPanel()
+    table.ColumnCount = 1
+    table.RowCount = 0
+    table.Dock = DockStyle.Fill
+    table.AutoSize = True
+    table.AutoSizeMode = System.Windows.Forms.AutoSizeMode.GrowAndShrink
+    table.Padding = Padding(0)
+    table.Margin = Padding(0)
+    table.ColumnStyles.Add(System.Windows.Forms.ColumnStyle(System.Windows.Forms.SizeType.Percent, 100.0))
+    main_panel.Controls.Add(table)
+    control_spacing = 8
+    section_spacing = 16
+    def add_control_row(ctrl, extra_margin_bottom=None, fixed_height=None):
+        table.RowCount += 1
+        if fixed_height is not None:
+            table.RowStyles.Add(System.Windows.Forms.RowStyle(System.Windows.Forms.SizeType.Absolute, fixed_height))
+            ctrl.Height = fixed_height
+        else:
+            table.RowStyles.Add(System.Windows.Forms.RowStyle(System.Windows.Forms.SizeType.AutoSize))
+        mb = control_spacing if extra_margin_bottom is None else extra_margin_bottom
+        ctrl.Margin = Padding(0, 0, 0, mb)
+        ctrl.Dock = DockStyle.Fill
+        table.Controls.Add(ctrl, 0, table.RowCount - 1)
+    add_control_row(create_professional_label("py-gear", True), extra_margin_bottom=section_spacing)
+    add_control_row(create_professional_label("Gear Parameters", True), extra_margin_bottom=6)
+    add_control_row(create_professional_label("Number of Teeth:"))
+    num_teeth = create_professional_numericupdown()
+    num_teeth.Value = 20
+    num_teeth.Minimum = 6
+    num_teeth.Maximum = 200
+    num_teeth.DecimalPlaces = 0
+    num_teeth.Height = 28
+    add_control_row(num_teeth)
+    add_control_row(create_professional_label("Module (mm):"))
+    num_module = create_professional_numericupdown()
+    num_module.Value = 2.0
+    num_module.Minimum = 0.1
+    num_module.Maximum = 100.0
+    num_module.DecimalPlaces = 2
+    num_module.Height = 28
+    add_control_row(num_module)
+    add_control_row(create_professional_label("Pressure Angle (degrees):"))
+    num_pressure = create_professional_numericupdown()
+    num_pressure.Value = 20.0
+    num_pressure.Minimum = 10.0
+    num_pressure.Maximum = 30.0
+    num_pressure.DecimalPlaces = 1
+    num_pressure.Height = 28
+    add_control_row(num_pressure)
+    add_control_row(create_professional_label("Profile Shift (mm):"))
+    num_profile_shift = create_professional_numericupdown()
+    num_profile_shift.Value = 0.0
+    num_profile_shift.Minimum = -10.0
+    num_profile_shift.Maximum = 10.0
+    num_profile_shift.DecimalPlaces = 2
+    num_profile_shift.Height = 28
+    add_control_row(num_profile_shift)
+    lbl_domain = create_professional_label("")
+    add_control_row(lbl_domain)
+    add_control_row(create_professional_label("Thickness (mm) - for internal gears:"))
+    num_thickness = create_professional_numericupdown()
+    num_thickness.Value = 10.0
+    num_thickness.Minimum = 1.0
+    num_thickness.Maximum = 100.0
+    num_thickness.DecimalPlaces = 2
+    num_thickness.Height = 28
+    add_control_row(num_thickness, extra_margin_bottom=section_spacing)
+    add_control_row(create_professional_label("Gear Type", True), extra_margin_bottom=6)
+    gear_type_flow = FlowLayoutPanel()
+    gear_type_flow.FlowDirection = FlowDirection.LeftToRight
+    gear_type_flow.WrapContents = True
+    gear_type_flow.AutoSize = True
+    rb_external = create_professional_radiobutton("External Gear")
+    rb_internal = create_professional_radiobutton("Internal Gear")
+    rb_external.Checked = True
+    gear_type_flow.Controls.Add(rb_external)
+    gear_type_flow.Controls.Add(rb_internal)
+    add_control_row(gear_type_flow, extra_margin_bottom=section_spacing)
+    add_control_row(create_professional_label("Pair Search", True), extra_margin_bottom=6)
+    search_flow = FlowLayoutPanel()
+    search_flow.FlowDirection = FlowDirection.LeftToRight
+    search_flow.WrapContents = True
+    search_flow.AutoSize = True
+    def add_search_field(text, value, maximum, decimals):
+        search_flow.Controls.Add(create_professional_label(text))
+        num = create_professional_numericupdown()
+        num.DecimalPlaces = decimals
+        num.Maximum = maximum
+        num.Value = value
+        num.Width = 70
+        search_flow.Controls.Add(num)
+        return num
+    num_ratio = add_search_field("Ratio:", 2.0, 50.0, 3)
+    num_ratio.Minimum = 1.0
+    num_ratio_tolerance = add_search_field("+/-", 0.05, 5.0, 3)
+    num_center = add_search_field("Center (mm):", 0.0, 10000.0, 2)
+    num_center_tolerance = add_search_field("+/-", 0.5, 100.0, 2)
+    chk_pair_internal = create_professional_checkbox("Ring gear mate")
+    search_flow.Controls.Add(chk_pair_internal)
+    add_control_row(search_flow)
+    lst_pairs = ListBox()
+    lst_pairs.IntegralHeight = False
+    lst_pairs.BackColor = Color.White
+    lst_pairs.BorderStyle = System.Windows.Forms.BorderStyle.FixedSingle
+    lst_pairs.Font = Font(SystemFonts.DefaultFont.FontFamily, 9)
+    add_control_row(lst_pairs, fixed_height=90)
+    pair_flow = FlowLayoutPanel()
+    pair_flow.FlowDirection = FlowDirection.LeftToRight
+    pair_flow.AutoSize = True
+    btn_find_pairs = create_professional_button("Find Pairs", False)
+    btn_use_gear_1 = create_professional_button("Use Gear 1", False)
+    btn_use_gear_2 = create_professional_button("Use Gear 2", False)
+    for btn in (btn_find_pairs, btn_use_gear_1, btn_use_gear_2):
+        btn.Width = 100
+        btn.Height = 30
+        pair_flow.Controls.Add(btn)
+    add_control_row(pair_flow, extra_margin_bottom=section_spacing)
+    add_control_row(create_professional_label("Preview", True), extra_margin_bottom=6)
+    preview_panel = Panel()
+    preview_panel.BackColor = Color.White
+    preview_panel.BorderStyle = System.Windows.Forms.BorderStyle.FixedSingle
+    add_control_row(preview_panel, fixed_height=200, extra_margin_bottom=section_spacing)
+    add_control_row(create_professional_label("Plane Selection", True), extra_margin_bottom=6)
+    add_control_row(create_professional_label("Select a plane where the gear will be created:"))
+    sel_target = SelectionListBox()
+    sel_target.IntegralHeight = False
+    sel_target.Height = 90
+    add_control_row(sel_target, fixed_height=90, extra_margin_bottom=section_spacing)
+    chk_optimal = create_professional_checkbox("Optimal profile shift")
+    add_control_row(chk_optimal)
+    chk_full_outline = create_professional_checkbox("Full gear outline (all teeth)")
+    add_control_row(chk_full_outline)
+    chk_stay_open = create_professional_checkbox("Stay open after creating")
+    add_control_row(chk_stay_open, extra_margin_bottom=8)
+    preview_engine = PreviewEngine()
+    preview_pen = Pen(colors['accent'], 1.0)
+    preview_timer = Timer()
+    preview_timer.Interval = 50
+    def update_domain(kind, z, m, alpha_deg, profile_shift, undercut_auto_suppress):
+        try:
+            check = check_parameters(kind, z, m, alpha_deg, profile_shift, undercut_auto_suppress, default_map())
+        except Exception as domain_ex:
+            log.warning('Domain check warning: %s', domain_ex)
+            return
+        if not check.valid:
+            lbl_domain.Text = check.reason
+            lbl_domain.ForeColor = Color.Firebrick
+            return
+        if check.high_shift == float('inf'):
+            text = "Valid shift: %.2f mm and above" % check.low_shift
+        else:
+            text = "Valid shift: %.2f to %.2f mm" % (check.low_shift, check.high_shift)
+        if check.min_shift is None:
+            text += "; undercut at every valid shift"
+        elif check.undercut:
+            text += "; undercut below %.2f mm" % check.min_shift
+        lbl_domain.Text = text
+        lbl_domain.ForeColor = colors['text']
+    def request_preview(sender=None, e=None):
+        update_domain('internal' if rb_internal.Checked else 'external', int(num_teeth.Value),
+                      float(num_module.Value), float(num_pressure.Value), float(num_profile_shift.Value),
+                      chk_optimal.Checked)
+        preview_engine.request(
+            kind='internal' if rb_internal.Checked else 'external',
+            z=int(num_teeth.Value),
+            m=float(num_module.Value),
+            alpha_deg=float(num_pressure.Value),
+            profile_shift=float(num_profile_shift.Value),
+            thickness=float(num_thickness.Value),
+            undercut_auto_suppress=chk_optimal.Checked
+        )
+    @safe_try
+    def preview_tick(sender, e):
+        if not preview_engine.pending:
+            return
+        preview_engine.poll()
+        if not preview_engine.pending:
+            preview_panel.Invalidate()
+    def paint_preview(sender, e):
+        try:
+            g = e.Graphics
+            if preview_engine.error is not None:
+                g.DrawString(preview_engine.error, sender.Font, Brushes.Firebrick, 4.0, 4.0)
+                return
+            preview = preview_engine.last
+            if preview is None:
+                return
+            size = sender.ClientSize
+            g.SmoothingMode = SmoothingMode.AntiAlias
+            pixels = preview.screen_points(size.Width, size.Height)
+            if len(pixels) > 2:
+                g.DrawPolygon(preview_pen, Array[Point]([Point(x, y) for x, y in pixels]))
+            if preview.rim_radius is not None:
+                cx, cy, scale = preview.screen_transform(size.Width, size.Height)
+                r = preview.rim_radius * scale
+                g.DrawEllipse(preview_pen, float(cx - r), float(cy - r), float(2 * r), float(2 * r))
+            if preview.warning is not None:
+                g.DrawString(preview.warning, sender.Font, Brushes.Firebrick, 4.0, 4.0)
+        except Exception as paint_ex:
+            log.warning('Preview paint warning: %s', paint_ex)
+    for control in (num_teeth, num_module, num_pressure, num_profile_shift, num_thickness):
+        control.ValueChanged += request_preview
+    rb_internal.CheckedChanged += request_preview
+    chk_optimal.CheckedChanged += request_preview
+    preview_panel.Paint += paint_preview
+    preview_panel.Resize += lambda sender, e: preview_panel.Invalidate()
+    preview_timer.Tick += preview_tick
+    def stop_preview(sender, e):
+        try:
+            preview_timer.Stop()
+        except:
+            pass
+    preview_panel.HandleDestroyed += stop_preview
+    request_preview()
+    preview_timer.Start()
+    gear_counter = [1]
+    def close_form_safely():
+        try:
+            if hasattr(sel_target, 'myTimer') and sel_target.myTimer is not None:
+                sel_target.myTimer.Stop()
+                sel_target.myTimer.Dispose()
+        except:
+            pass
+        try:
+            preview_timer.Stop()
+            preview_timer.Dispose()
+        except:
+            pass
+        try:
+            form.Close()
+            form.Dispose()
+        except:
+            pass
+    def reset_tool_state():
+        """Clear selection only, preserve control values for next gear creation"""
+        try:
+            try:
+                sel_target.Items.Clear()
+            except:
+                pass
+            try:
+                if getattr(sel_target, 'Root', None) is not None:
+                    sel_target.PreviousSelection = sel_target.Root.NewObjectCollector()
+                else:
+                    sel_target.PreviousSelection = None
+            except:
+                sel_target.PreviousSelection = None
+            try:
+                sel_target.myTimer.Stop()
+                if sel_target.tracker is not None:
+                    sel_target.tracker.reset()
+                    sel_target.myTimer.Interval = sel_target.tracker.interval_ms
+                sel_target.myTimer.Start()
+            except:
+                pass
+            try:
+                sel_target.Focus()
+                form.Activate()
+            except:
+                pass
+        except Exception as reset_ex:
+            log.warning('Reset warning: %s', reset_ex)
+    @safe_try
+    def create_gear_click(sender, e):
+        try:
+            number_of_teeth = int(num_teeth.Value)
+            module = float(num_module.Value)
+            pressure_angle = float(num_pressure.Value)
+            profile_shift = float(num_profile_shift.Value)
+            thickness = float(num_thickness.Value)
+            is_internal = rb_internal.Checked
+            optimal_profile_shift = chk_optimal.Checked
+            full_outline = chk_full_outline.Checked
+            if sel_target.Items.Count == 0 or sel_target.PreviousSelection is None:
+                show_info("Please select a plane", "Input Required")
+                return
+            selected_item = sel_target.PreviousSelection.Item(0)
+            target = getattr(selected_item, 'Target', None)
+            if target is None:
+                show_error('Could not resolve the selected plane.', 'Selection Error')
+                return
+            target_type = str(target.GetType().Name).upper()
+            if 'PLANE' not in target_type:
+                show_error('Please select a valid plane. Selected type: %s' % target_type, 'Invalid Selection')
+                return
+            try:
+                plane_name = str(target.Name)
+                proper_plane = MyPart.GetPlane(plane_name)
+            except Exception as plane_ex:
+                show_error('Could not get plane object: %s' % plane_ex, 'Plane Access Error')
+                return
+            gear_type = "Internal" if is_internal else "External"
+            unique_name = "Gear%d_%s_%dT_M%g" % (gear_counter[0], gear_type, number_of_teeth, module)
+            try:
+                result = create_gear_with_plane(
+                    z=number_of_teeth,
+                    m=module,
+                    alpha_deg=pressure_angle,
+                    plane=proper_plane,
+                    profile_shift=profile_shift,
+                    thickness=thickness,
+                    internal=is_internal,
+                    full_outline=full_outline,
+                    name=unique_name,
+                    undercut_auto_suppress=optimal_profile_shift
+                )
+                gear_counter[0] += 1
+                #show_info("Gear '%s' created successfully!" % unique_name, "Success")
+                if not chk_stay_open.Checked:
+                    close_form_safely()
+                else:
+                    reset_tool_state()
+            except Exception as create_ex:
+                show_error("Failed to create gear: %s" % create_ex, "Create Gear Error", include_trace=True)
+        except Exception as ex:
+            show_error("Failed to create gear: %s" % ex, "Create Gear Error", include_trace=True)
+    def cancel_click(sender, e):
+        close_form_safely()
+    def gear_train_click(sender, e):
+        dialog = OpenFileDialog()
+        dialog.Title = 'Open gear-train spec file'
+        dialog.Filter = 'Gear-train specs (*.csv;*.jsonl)|*.csv;*.jsonl|All files (*.*)|*.*'
+        if dialog.ShowDialog(form) != DialogResult.OK:
+            return
+        def progress(phase, done, total):
+            lbl_train_status.Text = '%s %d/%d' % (phase.capitalize(), done, total)
+            lbl_train_status.Refresh()
+        btn_train.Enabled = False
+        try:
+            from gear_train import create_gear_train
+            report = create_gear_train(dialog.FileName, MyPart, ParameterTypes, progress=progress)
+            log.info(report.format())
+            failed = len(report.batch.failed) + len(report.spec_errors)
+            lbl_train_status.Text = '%d of %d gears created in %.1f s%s' % (
+                len(report.batch.succeeded), len(report.batch.jobs) + len(report.spec_errors),
+                report.batch.timings['total'], ', %d failed (see console)' % failed if failed else '')
+        except Exception as train_ex:
+            log.error('Gear train failed: %s', train_ex)
+            lbl_train_status.Text = 'Gear train failed: %s' % train_ex
+        finally:
+            btn_train.Enabled = True
+    found_pairs = []
+    def find_pairs_click(sender, e):
+        center = float(num_center.Value)
+        pairs = standard_catalog(float(num_pressure.Value)).find_pairs(
+            float(num_ratio.Value), center if center > 0 else None, float(num_ratio_tolerance.Value),
+            float(num_center_tolerance.Value), chk_pair_internal.Checked, limit=200)
+        found_pairs[:] = pairs
+        lst_pairs.Items.Clear()
+        for pair in pairs:
+            lst_pairs.Items.Add("m %g:  %d / %d%s  ratio %.3f  center %.2f mm%s" % (
+                pair.m, pair.gear_1.z, pair.gear_2.z, " ring" if pair.internal else "", pair.ratio,
+                pair.center_distance, "  (undercut)" if pair.gear_1.undercut or pair.gear_2.undercut else ""))
+        if not pairs:
+            lst_pairs.Items.Add("No standard pair in range")
+    def use_gear(index):
+        def click(sender, e):
+            if not 0 <= lst_pairs.SelectedIndex < len(found_pairs):
+                show_info("Please select a pair", "Input Required")
+                return
+            gear = (found_pairs[lst_pairs.SelectedIndex].gear_1, found_pairs[lst_pairs.SelectedIndex].gear_2)[index]
+            num_module.Value = gear.m
+            num_teeth.Value = gear.z
+            num_profile_shift.Value = 0.0
+            rb_internal.Checked = gear.internal
+            rb_external.Checked = not gear.internal
+        return click
+    btn_create = create_professional_button("Create Gear", True)
+    btn_create.Dock = DockStyle.Fill
+    add_control_row(btn_create, extra_margin_bottom=8, fixed_height=50)
+    btn_train = create_professional_button("Create Gears From Spec File...", False)
+    btn_train.Dock = DockStyle.Fill
+    add_control_row(btn_train, extra_margin_bottom=4, fixed_height=40)
+    lbl_train_status = create_professional_label("")
+    add_control_row(lbl_train_status)
+    btn_close = create_professional_button("Close", False)
+    btn_close.Dock = DockStyle.Fill
+    add_control_row(btn_close, extra_margin_bottom=0, fixed_height=40)
+    btn_create.Click += create_gear_click
+    btn_close.Click += safe_try(cancel_click)
+    btn_train.Click += safe_try(gear_train_click)
+    btn_find_pairs.Click += safe_try(find_pairs_click)
+    btn_use_gear_1.Click += safe_try(use_gear(0))
+    btn_use_gear_2.Click += safe_try(use_gear(1))
+    tooltip = ToolTip()
+    tooltip.SetToolTip(sel_target, "Click here, then select a plane in the Alibre workspace")
+    tooltip.SetToolTip(num_teeth, "Number of teeth on the gear (6-200)")
+    tooltip.SetToolTip(num_module, "Module defines the tooth size")
+    tooltip.SetToolTip(num_pressure, "Pressure angle affects tooth shape")
+    tooltip.SetToolTip(num_profile_shift, "Profile shift for gear modifications")
+    tooltip.SetToolTip(rb_external, "Standard external spur gear")
+    tooltip.SetToolTip(rb_internal, "Internal ring gear")
+    tooltip.SetToolTip(chk_optimal, "Automatically calculate optimal profile shift")
+    tooltip.SetToolTip(chk_full_outline, "Draw every tooth as one closed loop, ready to extrude")
+    tooltip.SetToolTip(chk_stay_open, "Leave this window open after creating the gear")
+    tooltip.SetToolTip(num_ratio, "Tooth ratio z2 / z1 of the pair (at least 1)")
+    tooltip.SetToolTip(num_center, "Center distance of the pair; 0 searches by ratio only")
+    tooltip.SetToolTip(chk_pair_internal, "Search pinions with an internal ring gear as mate")
+    tooltip.SetToolTip(btn_find_pairs, "List standard-module pairs within the ratio and center-distance ranges")
+    tooltip.SetToolTip(btn_train, "Create every gear of a CSV/JSONL spec file (plane name and offset per gear) with one regeneration")
+    table.PerformLayout()
+    main_panel.PerformLayout()
+    try:
+        pref = table.PreferredSize
+        total_hpad = form.Padding.Left + form.Padding.Right + main_panel.Padding.Left + main_panel.Padding.Right
+        total_vpad = form.Padding.Top + form.Padding.Bottom + main_panel.Padding.Top + main_panel.Padding.Bottom
+        min_width = 420
+        width = max(min_width, pref.Width + total_hpad)
+        height = pref.Height + total_vpad
+        height = min(height, 2400)
+        form.ClientSize = Size(int(width), int(height))
+        form.MinimumSize = Size(min_width, 400)
+    except Exception as ex:
+        log.warning('Form sizing warning: %s', ex)
+    try:
+        form.Show()
+    except Exception as ex:
+        show_error('Failed to display form: %s' % ex, include_trace=True)
+        return None
+    return form
+launch_history = []
+def launch(started=None, warm=False):
+    """
+    Connect to Alibre and show the gear dialog, the entry point of Template.py.
+    started: launcher clock reading (same clock as _timer) taken before its imports;
+    warm: True when this module was already loaded by an earlier launch.
+    Each launch appends {'warm', 'import_seconds', 'connect_seconds', 'dialog_seconds', 'trace'}
+    to launch_history, 'trace' being the startup_trace spans of the launch.
+    """
+    entered = _timer()
+    if started is None:
+        started = entered
+    entry = {'warm': warm, 'import_seconds': entered - started, 'connect_seconds': None, 'dialog_seconds': None}
+    launch_history.append(entry)
+    with startup_trace.span('resolve Part'):
+        connect()
+    entry['connect_seconds'] = _timer() - entered
+    try:
+        with startup_trace.span('build and show dialog'):
+            form = show_gear_form()
+    except Exception as ex:
+        show_error('Fatal error while creating the gear generator UI: %s' % ex, include_trace=True)
+        return None
+    finally:
+        entry['trace'] = [tuple(span) for span in startup_trace.spans]
+    if form is not None:
+        entry['dialog_seconds'] = _timer() - started
+        log.info("py-gear %s start: dialog after %.0f ms (imports %.0f ms, connect %.0f ms)",
+                 'warm' if warm else 'cold', 1000 * entry['dialog_seconds'],
+                 1000 * entry['import_seconds'], 1000 * entry['connect_seconds'])
+        log.debug(startup_trace.report())
+    return form
+def launch_stats():
+    """Mean launch-to-dialog seconds of the cold and warm launches seen by this engine."""
+    stats = {}
+    for name, warm in (('cold', False), ('warm', True)):
+        times = [entry['dialog_seconds'] for entry in launch_history
+                 if entry['warm'] == warm and entry['dialog_seconds'] is not None]
+        stats[name] = {'launches': len(times), 'mean_seconds': sum(times) / len(times) if times else None}
+    return stats
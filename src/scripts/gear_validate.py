@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""
+Validity checks for generated gear outlines: self-intersections, folds, zero-length segments,
+a clamped dedendum and a rim cutting into the teeth.
+polyline_intersections() is a sweep-line segment-intersection test: the segments are sorted by
+their start along a sweep axis, and each one is only tested against the segments still active
+at that position whose cross-axis extents overlap, so a polyline costs O(n log n) plus the
+overlapping pairs. With numpy the sweep runs as one sort, a searchsorted for the active ranges
+and a batched exact test of the candidate pairs.
+validate_profile() runs it on tooth 0 and the tooth after it, swept along the tooth axis,
+instead of the whole gear: the outline repeats every pitch, so any crossing shows up in that
+window and the cost does not grow with the tooth count.
+Headless.
+"""
+import heapq
+import math
+import time
+from gear_geometry import _tooth_chain, get_array_backend
+try:
+    import numpy
+except ImportError:
+    numpy = None
+DEDENDUM_FLOOR = 0.01
+RELATIVE_TOLERANCE = 1e-9
+_timer = getattr(time, 'perf_counter', time.time)
+class OutlineReport(object):
+    """
+    Result of validate_profile(): intersections [(i, j, x, y), ...] of segments i and j (segment i
+    runs from point i to point i + 1 of generate_full_gear_outline()['points']), issues
+    [(code, message), ...] and valid (no issues).
+    """
+    __slots__ = ('intersections', 'issues', 'seconds')
+    def __init__(self, intersections, issues, seconds=0.0):
+        self.intersections = intersections
+        self.issues = issues
+        self.seconds = seconds
+    @property
+    def valid(self):
+        return not self.issues
+    def codes(self):
+        return [code for code, message in self.issues]
+    def message(self):
+        return ' '.join(message for code, message in self.issues)
+    def to_dict(self):
+        return {'valid': self.valid, 'intersections': [list(hit) for hit in self.intersections],
+                'issues': [list(issue) for issue in self.issues]}
+def _segment_hit(a, b, c, d, tolerance):
+    """Crossing or touching point of segments ab and cd (within tolerance), or None."""
+    rx, ry = b[0] - a[0], b[1] - a[1]
+    sx, sy = d[0] - c[0], d[1] - c[1]
+    denominator = rx * sy - ry * sx
+    qx, qy = c[0] - a[0], c[1] - a[1]
+    if denominator != 0.0:
+        t = (qx * sy - qy * sx) / denominator
+        u = (qx * ry - qy * rx) / denominator
+        if 0.0 <= t <= 1.0 and 0.0 <= u <= 1.0:
+            return a[0] + t * rx, a[1] + t * ry
+    # no proper crossing: touching (or collinear overlap) when an endpoint lies on the other segment
+    best = None
+    for p, s, e in ((a, c, d), (b, c, d), (c, a, b), (d, a, b)):
+        ex, ey = e[0] - s[0], e[1] - s[1]
+        length_sq = ex * ex + ey * ey
+        t = ((p[0] - s[0]) * ex + (p[1] - s[1]) * ey) / length_sq if length_sq > 0.0 else 0.0
+        t = min(1.0, max(0.0, t))
+        distance = math.hypot(p[0] - s[0] - t * ex, p[1] - s[1] - t * ey)
+        if distance <= tolerance and (best is None or distance < best[0]):
+            best = (distance, p[0], p[1])
+    return None if best is None else best[1:]
+def _fold(a, b, c, tolerance):
+    """b when segments ab and bc double back onto each other, else None."""
+    dx1, dy1 = b[0] - a[0], b[1] - a[1]
+    dx2, dy2 = c[0] - b[0], c[1] - b[1]
+    if dx1 * dx2 + dy1 * dy2 >= 0.0:
+        return None
+    length_1 = math.hypot(dx1, dy1)
+    length_2 = math.hypot(dx2, dy2)
+    if min(length_1, length_2) <= tolerance or abs(dx1 * dy2 - dy1 * dx2) > tolerance * max(length_1, length_2):
+        return None
+    return b
+def polyline_intersections(points, closed=True, tolerance=None, axis=None, use_numpy=None):
+    """
+    Self-intersections of the polyline through points ((x, y) pairs or an (N, 2) array; closed:
+    back to the first point) as sorted [(i, j, x, y), ...] with i < j, segment i running from
+    points[i] to points[i + 1]. Segments sharing a vertex only count when they fold back onto
+    each other; touching within tolerance (default RELATIVE_TOLERANCE times the extent) counts
+    as crossing. axis: unit sweep direction (default x), best along the direction most segments
+    are short in.
+    """
+    use_numpy = numpy is not None if use_numpy is None else use_numpy
+    n = len(points)
+    count = n if closed else n - 1
+    if count < 2:
+        return []
+    if use_numpy:
+        xy = numpy.asarray(points, dtype=float).reshape(-1, 2)
+        if tolerance is None:
+            tolerance = RELATIVE_TOLERANCE * max(float(numpy.abs(xy).max()), 1.0)
+        return _intersections_numpy(xy, closed, tolerance, axis or (1.0, 0.0))
+    points = [(float(x), float(y)) for x, y in points]
+    if tolerance is None:
+        tolerance = RELATIVE_TOLERANCE * max(max(max(abs(x), abs(y)) for x, y in points), 1.0)
+    ax, ay = axis or (1.0, 0.0)
+    u = [x * ax + y * ay for x, y in points]
+    v = [y * ax - x * ay for x, y in points]
+    order = sorted((min(u[i], u[(i + 1) % n]), i) for i in range(count))
+    hits = []
+    active = {}
+    expiry = []
+    for start, i in order:
+        while expiry and expiry[0][0] < start - tolerance:
+            del active[heapq.heappop(expiry)[1]]
+        i1 = (i + 1) % n
+        low = min(v[i], v[i1]) - tolerance
+        high = max(v[i], v[i1]) + tolerance
+        for j, (other_low, other_high) in active.items():
+            if other_low > high or other_high < low:
+                continue
+            first, second = (i, j) if i < j else (j, i)
+            if second == first + 1:
+                hit = _fold(points[first], points[second], points[(second + 1) % n], tolerance)
+            elif closed and first == 0 and second == count - 1:
+                hit = _fold(points[second], points[0], points[1], tolerance)
+            else:
+                hit = _segment_hit(points[first], points[first + 1], points[second], points[(second + 1) % n], tolerance)
+            if hit is not None:
+                hits.append((first, second, hit[0], hit[1]))
+        active[i] = (low, high)
+        heapq.heappush(expiry, (max(u[i], u[i1]), i))
+    hits.sort()
+    return hits
+def _intersections_numpy(xy, closed, tolerance, axis):
+    n = len(xy)
+    count = n if closed else n - 1
+    index = numpy.arange(count)
+    a = xy[:count]
+    b = xy[(index + 1) % n]
+    u_a = a[:, 0] * axis[0] + a[:, 1] * axis[1]
+    u_b = b[:, 0] * axis[0] + b[:, 1] * axis[1]
+    v_a = a[:, 1] * axis[0] - a[:, 0] * axis[1]
+    v_b = b[:, 1] * axis[0] - b[:, 0] * axis[1]
+    u_low = numpy.minimum(u_a, u_b)
+    v_low = numpy.minimum(v_a, v_b) - tolerance
+    v_high = numpy.maximum(v_a, v_b) + tolerance
+    # the sweep: every segment is paired with the later-starting ones that start before it ends
+    order = numpy.argsort(u_low, kind='mergesort')
+    ends = numpy.searchsorted(u_low[order], numpy.maximum(u_a, u_b)[order] + tolerance, side='right')
+    counts = numpy.maximum(ends - index - 1, 0)
+    total = int(counts.sum())
+    owner = numpy.repeat(index, counts)
+    later = numpy.arange(total) - numpy.repeat(numpy.cumsum(counts) - counts, counts) + owner + 1
+    i = order[owner]
+    j = order[later]
+    overlap = (v_low[j] <= v_high[i]) & (v_high[j] >= v_low[i])
+    first = numpy.minimum(i, j)[overlap]
+    second = numpy.maximum(i, j)[overlap]
+    neighbours = (second == first + 1) | (closed & (first == 0) & (second == count - 1))
+    first, second = first[~neighbours], second[~neighbours]
+    hits = []
+    if len(first):
+        p = a[first]
+        r = b[first] - p
+        c = a[second]
+        s = b[second] - c
+        q = c - p
+        denominator = r[:, 0] * s[:, 1] - r[:, 1] * s[:, 0]
+        safe = numpy.where(denominator != 0.0, denominator, 1.0)
+        t = (q[:, 0] * s[:, 1] - q[:, 1] * s[:, 0]) / safe
+        w = (q[:, 0] * r[:, 1] - q[:, 1] * r[:, 0]) / safe
+        proper = (denominator != 0.0) & (t >= 0.0) & (t <= 1.0) & (w >= 0.0) & (w <= 1.0)
+        hit_xy = p + t[:, None] * r
+        best = numpy.full(len(first), numpy.inf)
+        touch_xy = numpy.zeros_like(p)
+        for point, start, direction in ((p, c, s), (b[first], c, s), (c, p, r), (b[second], p, r)):
+            length_sq = (direction * direction).sum(1)
+            f = numpy.clip(((point - start) * direction).sum(1) / numpy.where(length_sq > 0.0, length_sq, 1.0), 0.0, 1.0)
+            distance = numpy.hypot(*(point - start - f[:, None] * direction).T)
+            closer = (distance <= tolerance) & (distance < best)
+            best = numpy.where(closer, distance, best)
+            touch_xy[closer] = point[closer]
+        found = proper | (best <= tolerance)
+        hit_xy = numpy.where(proper[:, None], hit_xy, touch_xy)
+        hits = [(int(f), int(g), float(x), float(y)) for f, g, (x, y) in zip(first[found], second[found], hit_xy[found])]
+    # neighbouring segments always overlap in the sweep; they only count when they fold back
+    k = numpy.arange(count if closed else count - 1)
+    d1 = b[k] - a[k]
+    d2 = b[(k + 1) % count] - a[(k + 1) % count]
+    length_1 = numpy.hypot(d1[:, 0], d1[:, 1])
+    length_2 = numpy.hypot(d2[:, 0], d2[:, 1])
+    folded = (((d1 * d2).sum(1) < 0.0) & (numpy.minimum(length_1, length_2) > tolerance)
+              & (numpy.abs(d1[:, 0] * d2[:, 1] - d1[:, 1] * d2[:, 0]) <= tolerance * numpy.maximum(length_1, length_2)))
+    for f in numpy.flatnonzero(folded):
+        g = (f + 1) % count
+        x, y = b[f]
+        hits.append((int(min(f, g)), int(max(f, g)), float(x), float(y)))
+    hits.sort()
+    return hits
+def _pattern(tooth, angles, use_numpy):
+    """Copies of tooth rotated by each angle, concatenated."""
+    if use_numpy:
+        c = numpy.cos(angles)[:, None]
+        s = numpy.sin(angles)[:, None]
+        return numpy.column_stack(((tooth[:, 0] * c - tooth[:, 1] * s).ravel(), (tooth[:, 0] * s + tooth[:, 1] * c).ravel()))
+    return [(x * math.cos(a) - y * math.sin(a), x * math.sin(a) + y * math.cos(a)) for a in angles for x, y in tooth]
+def validate_profile(profile, backend=None, tolerance=None, use_numpy=None):
+    """
+    Check a generated tooth profile (GearProfile) for geometry the CAD sketch cannot take.
+    Intersections are searched between tooth 0 and itself or the next tooth and reported with
+    their indices in generate_full_gear_outline()['points']; every other tooth repeats them.
+    Issue codes: 'intersection', 'fold' (neighbouring segments doubling back), 'zero_length' (a
+    named curve segment or repeated points), 'dedendum_clamped' (dedendum radius at the
+    DEDENDUM_FLOOR clamp), 'tooth_span' (the tooth reaches past its neighbours) and 'rim'
+    (internal gear rim at or inside the teeth). Returns an OutlineReport.
+    """
+    started = _timer()
+    use_numpy = numpy is not None if use_numpy is None else use_numpy
+    bk = get_array_backend(backend)
+    parameters = profile['parameters']
+    z = int(parameters['z'])
+    if tolerance is None:
+        tolerance = RELATIVE_TOLERANCE * max(parameters['addendum_radius'], parameters['dedendum_radius'], 1.0)
+    issues = []
+    for name in profile.names:
+        last = profile.segment_length(name) - 1
+        if name != 'external_arc' and last > 0:
+            x0, y0 = profile.point(name, 0)
+            x1, y1 = profile.point(name, last)
+            if math.hypot(x1 - x0, y1 - y0) <= tolerance:
+                issues.append(('zero_length', "Segment '%s' has zero length." % name))
+    if parameters['dedendum_radius'] <= DEDENDUM_FLOOR:
+        issues.append(('dedendum_clamped', 'Dedendum radius is clamped to %g mm.' % DEDENDUM_FLOOR))
+    tooth = bk.concat([points[:-1] for kind, points in _tooth_chain(profile, bk)])
+    tooth = numpy.asarray(tooth, dtype=float).reshape(-1, 2) if use_numpy else bk.to_tuples(tooth)
+    n = len(tooth)
+    pitch = 2.0 * math.pi / z
+    # tooth 0 fills the sector from its first point to that point's repeat one pitch on
+    center = math.atan2(tooth[0][1], tooth[0][0]) - pitch / 2.0
+    axis = (math.cos(center), math.sin(center))
+    if use_numpy:
+        radii = numpy.hypot(tooth[:, 0], tooth[:, 1])
+        spread = numpy.arctan2(tooth[:, 1] * axis[0] - tooth[:, 0] * axis[1], tooth[:, 0] * axis[0] + tooth[:, 1] * axis[1])
+        span = float(numpy.abs(spread[radii > tolerance]).max())
+        outer = float(radii.max())
+    else:
+        span = max(abs(math.atan2(y * axis[0] - x * axis[1], x * axis[0] + y * axis[1]))
+                   for x, y in tooth if math.hypot(x, y) > tolerance)
+        outer = max(math.hypot(x, y) for x, y in tooth)
+    if z > 3 and span > 1.5 * pitch:
+        issues.append(('tooth_span', 'The tooth reaches %.1f pitches from its centre.' % (span / pitch)))
+    closed = z <= 3
+    # tooth 0 and tooth 1 (up to the start of tooth 2), or the whole gear when the two are all of it
+    window = _pattern(tooth, [-k * pitch for k in range(z if closed else 3)], use_numpy)
+    window = window[:len(window) if closed else 2 * n + 1]
+    # repeated points would make the segments either side of them touch
+    if use_numpy:
+        moved = numpy.hypot(*numpy.diff(window, axis=0).T) > tolerance
+        keep = numpy.concatenate(([0], numpy.flatnonzero(moved) + 1))
+        repeated = int(n - numpy.count_nonzero(moved[:n]))
+    else:
+        moved = [math.hypot(window[k][0] - window[k - 1][0], window[k][1] - window[k - 1][1]) > tolerance
+                 for k in range(1, len(window))]
+        keep = [0] + [k + 1 for k in range(len(moved)) if moved[k]]
+        repeated = n - sum(moved[:n])
+    if closed and len(keep) > 1 and math.hypot(window[keep[-1]][0] - window[0][0], window[keep[-1]][1] - window[0][1]) <= tolerance:
+        keep = keep[:-1]
+        repeated += 1
+    if repeated:
+        issues.append(('zero_length', '%d repeated outline point(s) per tooth.' % repeated))
+    points = window[keep] if use_numpy else [window[k] for k in keep]
+    last = len(keep) - 1
+    folds = []
+    crossings = []
+    for i, j, x, y in polyline_intersections(points, closed, tolerance, axis, use_numpy):
+        if keep[i] >= n and not closed:
+            continue
+        hit = (int(keep[i]), int(keep[j]), x, y)
+        if j == i + 1 or (closed and i == 0 and j == last):
+            folds.append(hit)
+        else:
+            crossings.append(hit)
+    if crossings:
+        issues.append(('intersection', '%d self-intersection(s) per tooth, the first at (%.4g, %.4g).'
+                       % (len(crossings), crossings[0][2], crossings[0][3])))
+    if folds:
+        issues.append(('fold', '%d fold(s) per tooth, the first at (%.4g, %.4g).' % (len(folds), folds[0][2], folds[0][3])))
+    if 'external_arc' in profile:
+        x, y = profile.point('external_arc', 0)
+        rim_radius = math.hypot(x, y)
+        if rim_radius <= outer + tolerance:
+            issues.append(('rim', 'The rim (radius %.4g) cuts into the teeth.' % rim_radius))
+    return OutlineReport(sorted(crossings + folds), issues, _timer() - started)